@@ -0,0 +1,217 @@
+#! /usr/bin/env python3
+"""
+Benchmarks the GUI of :module:`orchid` without a display: building the desktop window, opening and closing tabs,
+routing the signals of many loading tabs, and applying the theme. Qt runs on its offscreen platform unless a display
+is chosen with $QT_QPA_PLATFORM, so this also runs under Xvfb, and every page comes from a local fixture server.
+"""
+
+from argparse import ArgumentParser
+from os import environ, makedirs
+from os.path import dirname, join, abspath
+from shutil import copyfile
+from statistics import median
+from tempfile import mkdtemp
+from time import perf_counter
+from PyQt5.QtCore import Qt, QCoreApplication, QEvent, QEventLoop, QUrl
+from PyQt5.QtWidgets import QApplication
+from orchid.utils.instrument import Instrumentation
+from orchid.utils.theme import Themer
+from orchid.widgets import TabWidget
+from orchid.widgets.windows import _DesktopWindow
+from harness import Results, FixtureServer, time_calls
+
+
+# The theme shipped with orchid, which the fixture home folder is given.
+THEME_FILE = join(dirname(dirname(abspath(__file__))), "themes", "default.json")
+
+
+def make_app():
+    """
+    Creates the :class:`QApplication` the benchmarks run in. The home folder is pointed at an empty folder with only
+    the default theme in it first, so the benchmarks never read or change the real history, session or settings.
+
+    :return: The application.
+    :rtype: QApplication
+    """
+    environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    environ["HOME"] = mkdtemp(prefix="orchid-bench-")
+    theme_file = join(environ["HOME"], ".orchid", "themes", "default.json")
+    makedirs(dirname(theme_file), exist_ok=True)
+    copyfile(THEME_FILE, theme_file)
+
+    QCoreApplication.setAttribute(Qt.AA_ShareOpenGLContexts)  # The web engine needs this before the application.
+    return QApplication.instance() or QApplication(["orchid-bench"])
+
+
+def wait_until(condition, timeout: float) -> bool:
+    """
+    Runs the event loop until a condition is met.
+
+    :param condition: A function that returns True once the wait is over.
+    :param timeout: The most seconds to wait.
+    :type timeout: float
+    :return: True if the condition was met, or False if the wait timed out.
+    :rtype: bool
+    """
+    deadline = perf_counter() + timeout
+    while not condition():
+        if perf_counter() > deadline:
+            return False
+        QApplication.processEvents(QEventLoop.AllEvents, 10)
+    return True
+
+
+def settle() -> None:
+    """
+    Runs the event loop until it is idle, so deleted widgets are gone before the next measurement.
+    """
+    QCoreApplication.sendPostedEvents(None, QEvent.DeferredDelete)
+    QApplication.processEvents()
+
+
+def run_window(results: Results, repeats: int) -> None:
+    """
+    Times building the desktop window with all of its bars and its tab widget.
+
+    :param results: The results to record the times in.
+    :type results: Results
+    :param repeats: How many windows to build.
+    :type repeats: int
+    """
+    windows = []
+    times = time_calls(lambda: windows.append(_DesktopWindow()), repeats)
+    for window in windows:
+        window.deleteLater()
+    settle()
+    results.record("window.construct_ms", median(times), "ms")
+
+
+def run_tabs(results: Results, server: FixtureServer, tab_count: int) -> None:
+    """
+    Opens tabs on fixture pages, waits for every page to load, and closes them again.
+
+    :param results: The results to record the times in.
+    :type results: Results
+    :param server: The server of the fixture pages.
+    :type server: FixtureServer
+    :param tab_count: How many tabs to open.
+    :type tab_count: int
+    """
+    tab_widget = TabWidget()
+    tab_widget.resize(1280, 800)
+    tab_widget.show()
+
+    loaded = []
+    create_times = []
+    start = perf_counter()
+    for i in range(tab_count):
+        create_start = perf_counter()
+        webview = tab_widget.create_tab(QUrl(server.url("/page/{}".format(i))))
+        create_times.append((perf_counter() - create_start) * 1000)
+        webview.loadFinished.connect(loaded.append)
+    if not wait_until(lambda: len(loaded) >= tab_count, 60):
+        raise RuntimeError("Only {} of {} tabs loaded".format(len(loaded), tab_count))
+    load_elapsed = perf_counter() - start
+
+    # Closing the last tab opens a new one, so the first tab is left open.
+    close_times = time_calls(lambda: tab_widget.close_tab(tab_widget.count() - 2), tab_count - 1)
+    tab_widget.deleteLater()
+    settle()
+
+    results.record("tabs.create_ms", median(create_times), "ms")
+    results.record("tabs.loaded_per_s", tab_count / load_elapsed, "per_s", lower_is_better=False)
+    results.record("tabs.close_ms", median(close_times), "ms")
+
+
+def run_signals(results: Results, server: FixtureServer, tab_count: int) -> None:
+    """
+    Measures what the tab widget's signal handlers cost while many tabs load at once. The handlers are measured with
+    :class:`Instrumentation`, which stays on for the rest of the process, so this runs after the other benchmarks.
+
+    :param results: The results to record the costs in.
+    :type results: Results
+    :param server: The server of the fixture pages.
+    :type server: FixtureServer
+    :param tab_count: How many tabs to load at once.
+    :type tab_count: int
+    """
+    instrumentation = Instrumentation()
+    instrumentation.enable(join(environ["HOME"], "metrics.json"))
+    instrumentation.instrument_methods(TabWidget, prefix="_on_")
+
+    tab_widget = TabWidget()
+    tab_widget.resize(1280, 800)
+    tab_widget.show()
+
+    loaded = []
+    for i in range(tab_count):
+        webview = tab_widget.create_background_tab(QUrl(server.url("/slow/500/{}".format(i))))
+        webview.loadFinished.connect(loaded.append)
+    if not wait_until(lambda: len(loaded) >= tab_count, 60):
+        raise RuntimeError("Only {} of {} tabs loaded".format(len(loaded), tab_count))
+    tab_widget.deleteLater()
+    settle()
+
+    histograms = [histogram for name, histogram in instrumentation.get_snapshot().items()
+                  if name.startswith("TabWidget._on_")]
+    count = sum(histogram["count"] for histogram in histograms)
+    total = sum(histogram["total"] for histogram in histograms)
+    results.record("signals.{}_tabs.handled".format(tab_count), count, "signals")
+    results.record("signals.{}_tabs.mean_us".format(tab_count), total / count if count else 0, "us")
+    results.record("signals.{}_tabs.p99_us".format(tab_count),
+                   max((histogram["p99"] for histogram in histograms), default=0), "us")
+
+
+def run_theme(results: Results, repeats: int) -> None:
+    """
+    Times applying the theme while a desktop window is shown, so the new palette reaches a full set of widgets.
+
+    :param results: The results to record the times in.
+    :type results: Results
+    :param repeats: How many times to apply the theme.
+    :type repeats: int
+    """
+    window = _DesktopWindow()
+    window.resize(1280, 800)
+    window.show()
+    settle()
+
+    times = time_calls(lambda: (Themer().apply_theme(), settle()), repeats)
+    window.deleteLater()
+    settle()
+    results.record("theme.apply_ms", median(times), "ms")
+
+
+def run_suite(results: Results, repeats: int = 20, tab_count: int = 20, loading_tab_count: int = 20) -> None:
+    """
+    Runs every GUI benchmark.
+
+    :param results: The results to record the measurements in.
+    :type results: Results
+    :param repeats: How many times to repeat the window and theme benchmarks.
+    :type repeats: int
+    :param tab_count: How many tabs to open and close.
+    :type tab_count: int
+    :param loading_tab_count: How many tabs to load at once while measuring the signal handlers.
+    :type loading_tab_count: int
+    """
+    make_app()
+    with FixtureServer() as server:
+        run_window(results, repeats)
+        run_theme(results, repeats)
+        run_tabs(results, server, tab_count)
+        run_signals(results, server, loading_tab_count)
+
+
+if __name__ == '__main__':
+    parser = ArgumentParser(description="Benchmark the orchid GUI without a display.")
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--tabs", type=int, default=20)
+    parser.add_argument("--loading-tabs", type=int, default=20)
+    parser.add_argument("--output", help="Write the results to this JSON file.")
+    args = parser.parse_args()
+
+    gui_results = Results()
+    run_suite(gui_results, args.repeats, args.tabs, args.loading_tabs)
+    if args.output:
+        gui_results.save(args.output)
@@ -0,0 +1,228 @@
+"""
+Shared pieces of the headless benchmarks: a local HTTP server for the pages the web benchmarks load, an Xvfb server for
+the window manager benchmarks, and machine-readable results that are compared against a stored baseline.
+"""
+
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from json import load, dump
+from os import environ
+from shutil import which
+from subprocess import Popen, DEVNULL
+from threading import Thread
+from time import sleep, perf_counter
+
+
+class MissingRequirement(Exception):
+    """
+    Raised when a suite cannot run because something it needs outside of Python is missing, like Xvfb or the system
+    libraries of the web engine.
+    """
+
+
+class Results:
+    """
+    The measurements of a benchmark run, keyed by name.
+    """
+
+    def __init__(self) -> None:
+        """
+        Creates an empty set of results.
+        """
+        self.measurements = {}
+        self.suite = None  # The suite being run, which each measurement is recorded with.
+
+    def record(self, name: str, value: float, unit: str, lower_is_better: bool = True) -> None:
+        """
+        Records a measurement and prints it.
+
+        :param name: The name of the measurement, like "tabs.create_ms".
+        :type name: str
+        :param value: The measured value.
+        :type value: float
+        :param unit: The unit of the value, like "ms" or "per_s".
+        :type unit: str
+        :param lower_is_better: Whether a lower value is an improvement, as for times, or a regression, as for rates.
+        :type lower_is_better: bool
+        """
+        self.measurements[name] = {"value": value, "unit": unit, "lower_is_better": lower_is_better,
+                                   "suite": self.suite}
+        print("{:>48}: {:12.3f} {}".format(name, value, unit), flush=True)
+
+    def save(self, path: str) -> None:
+        """
+        Writes the results as JSON.
+
+        :param path: The file to write.
+        :type path: str
+        """
+        with open(path, "w") as file:
+            dump(self.measurements, file, indent=4, sort_keys=True)
+
+    def compare(self, baseline_path: str, tolerance: float, suites: list = None) -> list:
+        """
+        Compares the results with a baseline saved by :method:`save()`. A measurement of the baseline that is missing
+        from the results is a regression, unless its suite was not run. Measurements missing from the baseline are
+        not compared.
+
+        :param baseline_path: The baseline file.
+        :type baseline_path: str
+        :param tolerance: How much worse than the baseline a measurement may be, as a fraction like 0.2 for 20%.
+        :type tolerance: float
+        :param suites: The suites that were run, or None if every measurement of the baseline is expected.
+        :type suites: list
+        :return: The (name, baseline value, value, fraction worse) of each measurement that regressed. The value and
+        fraction are None for missing measurements.
+        :rtype: list
+        """
+        with open(baseline_path, "r") as file:
+            baseline = load(file)
+
+        regressions = []
+        for name, expected in sorted(baseline.items()):
+            if name not in self.measurements and (suites is None or expected.get("suite") in suites):
+                regressions.append((name, expected["value"], None, None))
+
+        for name, measurement in sorted(self.measurements.items()):
+            expected = baseline.get(name)
+            if expected is None or expected["value"] <= 0:
+                continue
+            change = (measurement["value"] - expected["value"]) / expected["value"]
+            if not measurement["lower_is_better"]:
+                change = -change
+            if change > tolerance:
+                regressions.append((name, expected["value"], measurement["value"], change))
+        return regressions
+
+
+def time_calls(function, repeats: int) -> list:
+    """
+    Calls a function repeatedly and times every call.
+
+    :param function: The function to call with no arguments.
+    :param repeats: How many times to call it.
+    :type repeats: int
+    :return: The milliseconds each call took.
+    :rtype: list
+    """
+    times = []
+    for _ in range(repeats):
+        start = perf_counter()
+        function()
+        times.append((perf_counter() - start) * 1000)
+    return times
+
+
+class _FixtureHandler(BaseHTTPRequestHandler):
+    """
+    Serves the fixture pages. /page/<n> is a small page with a title, and /slow/<ms>/<n> is the same page sent after a
+    delay, so pages stay loading for a while.
+    """
+
+    def do_GET(self) -> None:
+        """
+        Sends a fixture page.
+        """
+        parts = self.path.strip("/").split("/")
+        if parts[0] == "slow" and len(parts) == 3:
+            sleep(int(parts[1]) / 1000)
+            number = parts[2]
+        elif parts[0] == "page" and len(parts) == 2:
+            number = parts[1]
+        else:
+            self.send_error(404)
+            return
+
+        paragraphs = "".join("<p>Paragraph {} of fixture page {}.</p>".format(i, number) for i in range(50))
+        body = "<!doctype html><html><head><title>Fixture page {}</title></head><body>{}</body></html>".format(
+            number, paragraphs).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args) -> None:
+        """
+        Keeps requests out of the benchmark output.
+        """
+
+
+class FixtureServer:
+    """
+    A local HTTP server of fixture pages, run on a background thread so pages load without touching the network.
+    """
+
+    def __enter__(self) -> "FixtureServer":
+        """
+        Starts the server on a free port.
+
+        :return: The running server.
+        :rtype: FixtureServer
+        """
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), _FixtureHandler)
+        self._server.daemon_threads = True
+        Thread(target=self._server.serve_forever, name="fixture-server", daemon=True).start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        """
+        Stops the server.
+        """
+        self._server.shutdown()
+        self._server.server_close()
+
+    def url(self, path: str) -> str:
+        """
+        Returns the URL of a path on the server.
+
+        :param path: The path, like "/page/1".
+        :type path: str
+        :return: The full URL.
+        :rtype: str
+        """
+        return "http://127.0.0.1:{}{}".format(self._server.server_address[1], path)
+
+
+class Xvfb:
+    """
+    A virtual X server for the window manager benchmarks. If one is already given in $DISPLAY and Xvfb is not
+    installed, that display is used instead.
+    """
+
+    def __init__(self, display: str = ":99") -> None:
+        """
+        Describes the server without starting it.
+
+        :param display: The display the server runs on.
+        :type display: str
+        """
+        self.display = display
+        self._process = None
+
+    def __enter__(self) -> "Xvfb":
+        """
+        Starts the server and points $DISPLAY at it.
+
+        :return: The running server.
+        :rtype: Xvfb
+        :raises MissingRequirement: If Xvfb is not installed and no display is set.
+        """
+        if which("Xvfb") is None:
+            if not environ.get("DISPLAY"):
+                raise MissingRequirement("Xvfb is not installed and no X display is set")
+            self.display = environ["DISPLAY"]
+            return self
+
+        self._process = Popen(["Xvfb", self.display, "-screen", "0", "1920x1080x24", "-nolisten", "tcp"],
+                              stdout=DEVNULL, stderr=DEVNULL)
+        sleep(0.5)  # Xvfb has no ready signal; give it time to open its socket.
+        environ["DISPLAY"] = self.display
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        """
+        Stops the server if it was started here.
+        """
+        if self._process is not None:
+            self._process.terminate()
+            self._process.wait()
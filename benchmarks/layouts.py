@@ -0,0 +1,61 @@
+#! /usr/bin/env python3
+"""
+Benchmarks the tiling layouts of :module:`orchid.wm` with synthetic window sets. No X server is needed.
+"""
+
+from argparse import ArgumentParser
+from random import Random
+from time import perf_counter
+from orchid.wm.layouts import MasterStackLayout, GridLayout, BSPLayout
+
+
+def run(layout_type: type, window_count: int, operations: int, seed: int = 0) -> dict:
+    """
+    Fills a layout with windows and then randomly maps and unmaps windows, timing every operation.
+
+    :param layout_type: The :class:`Layout` subclass to benchmark.
+    :type layout_type: type
+    :param window_count: The number of windows kept open in the layout.
+    :type window_count: int
+    :param operations: The number of unmap/map pairs to time.
+    :type operations: int
+    :param seed: The seed of the random window choices.
+    :type seed: int
+    :return: The mean time per operation in microseconds and the mean number of windows re-placed per operation.
+    :rtype: dict
+    """
+    random = Random(seed)
+    layout = layout_type()
+    layout.set_area(0, 0, 3840, 2160)
+    windows = list(range(window_count))
+    for window_id in windows:
+        layout.add(window_id)
+
+    next_id = window_count
+    changed = 0
+    start = perf_counter()
+    for _ in range(operations):
+        window_id = windows.pop(random.randrange(len(windows)))
+        changed += len(layout.remove(window_id))
+        windows.append(next_id)
+        changed += len(layout.add(next_id))
+        next_id += 1
+    elapsed = perf_counter() - start
+
+    return {"layout": layout_type.__name__,
+            "windows": window_count,
+            "us_per_operation": elapsed / (operations * 2) * 1e6,
+            "windows_placed_per_operation": changed / (operations * 2)}
+
+
+if __name__ == '__main__':
+    parser = ArgumentParser(description="Benchmark the orchid tiling layouts.")
+    parser.add_argument("--windows", type=int, nargs="+", default=[8, 32, 128])
+    parser.add_argument("--operations", type=int, default=2000)
+    args = parser.parse_args()
+
+    for layout_type in (MasterStackLayout, GridLayout, BSPLayout):
+        for count in args.windows:
+            result = run(layout_type, count, args.operations)
+            print("{layout:>17} {windows:>5} windows: {us_per_operation:8.2f} us/op, "
+                  "{windows_placed_per_operation:6.2f} windows placed/op".format(**result))
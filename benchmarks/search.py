@@ -0,0 +1,99 @@
+#! /usr/bin/env python3
+"""
+Benchmarks the omni-search index of :module:`orchid.search` with a synthetic corpus of page titles and URLs. No display
+is needed.
+"""
+
+from argparse import ArgumentParser
+from random import Random
+from time import perf_counter
+from orchid.search import SearchIndex, KIND_HISTORY, KIND_BOOKMARK
+
+
+# Syllables the synthetic words are made of, so words share prefixes and substrings like real ones do.
+SYLLABLES = ["ka", "lo", "mi", "ne", "ru", "ta", "vo", "shi", "pe", "zu", "dan", "gor", "bel", "fin", "mar"]
+
+
+def make_word(random: Random) -> str:
+    """
+    Makes a random word out of two to four syllables.
+
+    :param random: The random number generator to use.
+    :type random: Random
+    :return: The word.
+    :rtype: str
+    """
+    return "".join(random.choice(SYLLABLES) for _ in range(random.randint(2, 4)))
+
+
+def build(entry_count: int, seed: int = 0) -> tuple:
+    """
+    Fills an index with synthetic history entries and a few bookmarks.
+
+    :param entry_count: The number of entries to add.
+    :type entry_count: int
+    :param seed: The seed of the random corpus.
+    :type seed: int
+    :return: The index and the seconds it took to build.
+    :rtype: tuple
+    """
+    random = Random(seed)
+    index = SearchIndex()
+    start = perf_counter()
+    for i in range(entry_count):
+        kind = KIND_BOOKMARK if i % 1000 == 0 else KIND_HISTORY
+        title = " ".join(make_word(random) for _ in range(4))
+        url = "https://www.{}.com/{}/{}".format(make_word(random), make_word(random), make_word(random))
+        index.add(kind, i, title, url, random.random() * 10)
+    return index, perf_counter() - start
+
+
+def run(index: SearchIndex, queries: list, repeats: int) -> list:
+    """
+    Times every query against the index, including every prefix of it as if it were being typed. Each prefix is timed
+    both on its own and narrowed down from the prefix before it, the way the search bar runs it.
+
+    :param index: The index to search.
+    :type index: SearchIndex
+    :param queries: The queries to time.
+    :type queries: list
+    :param repeats: How many times to run each query.
+    :type repeats: int
+    :return: A result for each query with its mean and worst times in milliseconds.
+    :rtype: list
+    """
+    # The first query after words are added sorts the words, which typing into a built index doesn't pay for.
+    index.search(queries[0])
+
+    results = []
+    for query in queries:
+        times = []
+        typed_times = []
+        for _ in range(repeats):
+            previous = None
+            for length in range(1, len(query) + 1):
+                start = perf_counter()
+                index.search(query[:length])
+                times.append((perf_counter() - start) * 1000)
+
+                start = perf_counter()
+                for previous in index.iter_search(query[:length], previous=previous):
+                    pass
+                typed_times.append((perf_counter() - start) * 1000)
+        results.append({"query": query, "mean_ms": sum(times) / len(times), "worst_ms": max(times),
+                        "typed_mean_ms": sum(typed_times) / len(typed_times), "typed_worst_ms": max(typed_times)})
+    return results
+
+
+if __name__ == '__main__':
+    parser = ArgumentParser(description="Benchmark the orchid omni-search index.")
+    parser.add_argument("--entries", type=int, default=1000000)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("queries", nargs="*", default=["kalomi", "danfin", "marbel gor", "kalomi rutavo", "kalxmi"])
+    args = parser.parse_args()
+
+    index, elapsed = build(args.entries)
+    print("Indexed {} entries in {:.1f} s".format(len(index), elapsed))
+    for result in run(index, args.queries, args.repeats):
+        print("{query!r:>16}: {mean_ms:6.2f} ms mean, {worst_ms:6.2f} ms worst, "
+              "as typed {typed_mean_ms:6.2f} ms mean, {typed_worst_ms:6.2f} ms worst".format(**result))
@@ -0,0 +1,127 @@
+#! /usr/bin/env python3
+"""
+Runs the benchmarks of :module:`orchid` headlessly, writes the results as JSON, and compares them with a stored
+baseline. The exit status is 1 if any measurement is more than the tolerance worse than the baseline, so this can gate
+changes in CI, as is a measurement of the baseline that is missing from the results. Suites are only skipped when
+something they need outside of Python is missing, like Xvfb for the window manager or the web engine's system
+libraries for the GUI.
+
+Run it with "python benchmarks/suite.py" from anywhere; it imports :module:`orchid` from the repository it is in. The
+suites can also be run on their own from the root of the repository, like "PYTHONPATH=. python benchmarks/gui.py".
+"""
+
+from argparse import ArgumentParser
+from os.path import dirname, join, abspath, exists
+from sys import exit, path
+from harness import Results, MissingRequirement
+
+
+# The baseline the results are compared with by default.
+BASELINE_FILE = join(dirname(abspath(__file__)), "baseline.json")
+
+# Import orchid from this repository rather than from wherever it may be installed.
+path.insert(0, dirname(dirname(abspath(__file__))))
+
+
+def run_layouts(results: Results) -> None:
+    """
+    Records the cost of the tiling layouts.
+
+    :param results: The results to record the measurements in.
+    :type results: Results
+    """
+    import layouts
+    for layout_type in (layouts.MasterStackLayout, layouts.GridLayout, layouts.BSPLayout):
+        result = layouts.run(layout_type, 128, 2000)
+        results.record("layouts.{}.us_per_operation".format(layout_type.__name__), result["us_per_operation"], "us")
+
+
+def run_search(results: Results) -> None:
+    """
+    Records the cost of typing queries into the omni-search index.
+
+    :param results: The results to record the measurements in.
+    :type results: Results
+    """
+    import search
+    index, _ = search.build(100000)
+    for result in search.run(index, ["kalomi", "marbel gor", "kalxmi"], 3):
+        name = result["query"].replace(" ", "_")
+        results.record("search.{}.typed_mean_ms".format(name), result["typed_mean_ms"], "ms")
+
+
+def run_gui(results: Results) -> None:
+    """
+    Records the cost of the desktop window, tabs, signal routing and theme.
+
+    :param results: The results to record the measurements in.
+    :type results: Results
+    :raises MissingRequirement: If the web engine's system libraries are missing.
+    """
+    try:
+        import gui
+    except ImportError as error:
+        # Only a missing system library, like libXdamage on a headless machine, is a reason to skip the suite.
+        if "cannot open shared object file" not in str(error):
+            raise
+        raise MissingRequirement("The web engine could not be loaded: {}".format(error)) from error
+    gui.run_suite(results)
+
+
+def run_wm(results: Results) -> None:
+    """
+    Records how quickly the X window manager maps new windows.
+
+    :param results: The results to record the measurements in.
+    :type results: Results
+    """
+    import wm
+    wm.run_suite(results)
+
+
+# Every suite by name, in the order they run. The window manager runs last since it changes $DISPLAY.
+SUITES = {"layouts": run_layouts, "search": run_search, "gui": run_gui, "wm": run_wm}
+
+
+if __name__ == '__main__':
+    parser = ArgumentParser(description="Run the orchid benchmarks and compare them with a baseline.")
+    parser.add_argument("suites", nargs="*", metavar="suite",
+                        help="The suites to run out of {}, all of them by default.".format(", ".join(SUITES)))
+    parser.add_argument("--output", default="benchmark-results.json", help="Write the results to this JSON file.")
+    parser.add_argument("--baseline", default=BASELINE_FILE, help="Compare the results with this JSON file.")
+    parser.add_argument("--save-baseline", action="store_true", help="Save the results as the new baseline.")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="How much worse than the baseline a measurement may be, like 0.2 for 20%%.")
+    args = parser.parse_args()
+    for suite in args.suites:
+        if suite not in SUITES:
+            parser.error("There is no {} suite".format(suite))
+
+    suite_results = Results()
+    ran = []
+    for suite in args.suites or list(SUITES):
+        print("Running the {} benchmarks".format(suite), flush=True)
+        suite_results.suite = suite
+        try:
+            SUITES[suite](suite_results)
+        except MissingRequirement as error:
+            print("Skipped the {} benchmarks: {}".format(suite, error), flush=True)
+        else:
+            ran.append(suite)
+    suite_results.save(args.output)
+
+    if args.save_baseline:
+        suite_results.save(args.baseline)
+        print("Saved the baseline to {}".format(args.baseline))
+    elif not exists(args.baseline):
+        print("There is no baseline at {}; save one with --save-baseline".format(args.baseline))
+    else:
+        regressions = suite_results.compare(args.baseline, args.tolerance, ran)
+        for name, expected, value, change in regressions:
+            if value is None:
+                print("Regression in {}: {:.3f} -> missing".format(name, expected))
+            else:
+                print("Regression in {}: {:.3f} -> {:.3f} ({:.0%} worse)".format(name, expected, value, change))
+        if regressions:
+            exit(1)
+        print("No regressions beyond {:.0%} of the baseline".format(args.tolerance))
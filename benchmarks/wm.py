@@ -0,0 +1,105 @@
+#! /usr/bin/env python3
+"""
+Benchmarks how quickly the X window manager of :module:`orchid.wm` handles new windows. An Xvfb server is started for
+the benchmark, and synthetic clients on their own X connection map plain windows on it, which the window manager has
+to place and map.
+"""
+
+from argparse import ArgumentParser
+from statistics import median
+from time import perf_counter
+from PyQt5.QtCore import QCoreApplication, QEventLoop
+from Xlib.display import Display
+from Xlib.X import StructureNotifyMask, CopyFromParent, MapNotify
+from orchid.wm import XWindowsManager
+from harness import Results, Xvfb
+
+
+def wait_for_maps(display, window_ids: set, timeout: float) -> None:
+    """
+    Runs the event loop, which lets the window manager handle its events, until every given window is mapped.
+
+    :param display: The clients' X connection.
+    :type display: Display
+    :param window_ids: The ids of the windows to wait for. Ids are removed as their windows are mapped.
+    :type window_ids: set
+    :param timeout: The most seconds to wait.
+    :type timeout: float
+    :raises RuntimeError: If the windows were not all mapped in time.
+    """
+    deadline = perf_counter() + timeout
+    while window_ids:
+        if perf_counter() > deadline:
+            raise RuntimeError("{} windows were never mapped".format(len(window_ids)))
+        QCoreApplication.processEvents(QEventLoop.AllEvents, 1)
+        while display.pending_events() > 0:
+            event = display.next_event()
+            if event.type == MapNotify:
+                window_ids.discard(event.window.id)
+
+
+def run_suite(results: Results, window_count: int = 200) -> None:
+    """
+    Maps windows one at a time to time each map request, then maps a burst of windows at once to measure how many map
+    requests are handled per second.
+
+    :param results: The results to record the measurements in.
+    :type results: Results
+    :param window_count: How many windows to map, both one at a time and in the burst.
+    :type window_count: int
+    """
+    with Xvfb():
+        app = QCoreApplication.instance() or QCoreApplication(["orchid-bench"])
+        windows_manager = XWindowsManager()
+        windows_manager.start()
+        windows_manager.run()
+
+        display = Display()
+        root = display.screen().root
+
+        def create_window(i: int):
+            return root.create_window(10 * (i % 50), 10 * (i % 50), 320, 240, 0, CopyFromParent,
+                                      event_mask=StructureNotifyMask)
+
+        windows = []
+        times = []
+        for i in range(window_count):
+            window = create_window(i)
+            windows.append(window)
+            start = perf_counter()
+            window.map()
+            display.flush()
+            wait_for_maps(display, {window.id}, 10)
+            times.append((perf_counter() - start) * 1000)
+
+        burst = [create_window(i) for i in range(window_count)]
+        windows.extend(burst)
+        display.sync()
+        start = perf_counter()
+        for window in burst:
+            window.map()
+        display.flush()
+        wait_for_maps(display, {window.id for window in burst}, 60)
+        elapsed = perf_counter() - start
+
+        for window in windows:
+            window.destroy()
+        display.sync()
+        display.close()
+        windows_manager.stop()
+        app.processEvents()
+
+    results.record("wm.map_ms", median(times), "ms")
+    results.record("wm.maps_per_s", window_count / elapsed, "per_s", lower_is_better=False)
+
+
+if __name__ == '__main__':
+    parser = ArgumentParser(description="Benchmark the orchid X window manager on Xvfb.")
+    parser.add_argument("--windows", type=int, default=200)
+    parser.add_argument("--output", help="Write the results to this JSON file.")
+    args = parser.parse_args()
+
+    wm_results = Results()
+    run_suite(wm_results, args.windows)
+    if args.output:
+        wm_results.save(args.output)
@@ -1,17 +1,36 @@
+# Imported first, since the startup trace starts when it is imported.
+from orchid.utils.startup import StartupTrace
 from sys import exit
 from platform import system as system_name
 from logging import getLogger, basicConfig, DEBUG
-from PyQt5.QtCore import QObject
-from orchid.widgets.windows import DesktopWindow
+from PyQt5.QtCore import QObject, QThread, QDir, QTimer
+from PyQt5.QtWidgets import QApplication
 from orchid.utils.theme import Themer
-if system_name() == "Windows":
-    from orchid.wm import Win32WindowsManager as WindowsManager
-elif system_name() == "Linux":
-    from orchid.wm import XWindowsManager as WindowsManager
-else:
-    logger = getLogger(__name__)
-    logger.critical("Failure to manage unknown OS.")
-    exit(1)
+from orchid.utils.instrument import Instrumentation
+from orchid.io import FileManager
+from orchid.search.files import FileIndexer
+from orchid.utils.memory import get_physical_memory
+
+# The desktop window pulls in the web engine and the window managers pull in Xlib, which are slow to import, so they
+# are imported when the desktop environment is created rather than when this package is.
+
+
+def _import_windows_manager() -> type:
+    """
+    Imports the window manager for this OS.
+
+    :return: The window manager class.
+    :rtype: type
+    """
+    if system_name() == "Windows":
+        from orchid.wm import Win32WindowsManager as WindowsManager
+    elif system_name() == "Linux":
+        from orchid.wm import XWindowsManager as WindowsManager
+    else:
+        logger = getLogger(__name__)
+        logger.critical("Failure to manage unknown OS.")
+        exit(1)
+    return WindowsManager
 
 
 class DesktopEnvironment(QObject):
@@ -25,30 +44,136 @@ class DesktopEnvironment(QObject):
         app based on the theme file and configures the loggers.
         """
         super().__init__()
+        trace = StartupTrace()
 
         # Configure loggers.
         basicConfig(level=DEBUG)
         self._logger = getLogger(__name__)
 
-        # Theme the application.
-        #Themer().apply_theme()
+        # Load every config file at once, so nothing after startup has to wait on the disk for them.
+        file_manager = FileManager()
+        file_manager.load_all(file_manager.get_config_files())
+        settings = file_manager.get_cached_json(file_manager.get_settings_file())
+        self._settings = settings if isinstance(settings, dict) else {}
+        trace.mark("config")
+
+        # Import the desktop window, which loads the web engine, and the window manager, which loads Xlib. Measure
+        # their hot paths when instrumentation is on; the classes are changed before anything is connected.
+        from orchid.widgets.windows import DesktopWindow
+        from orchid.widgets import TabWidget
+        from orchid.widgets.bars import SearchBar
+        WindowsManager = _import_windows_manager()
+        instrumentation = Instrumentation()
+        instrumentation.instrument_methods(TabWidget, prefix="_on_")
+        instrumentation.instrument_methods(SearchBar, prefix="set_")
+        instrumentation.instrument_methods(WindowsManager, ["_process_pending_events"], prefix="_on_")
+        instrumentation.instrument_methods(Themer, ["apply_theme"])
+        trace.mark("imports")
 
-        # Create the desktop window.
+        # Load the compiled theme and theme the application.
+        themer = Themer()
+        #themer.apply_theme()
+        trace.mark("theme")
+
+        # Create the desktop window. The web engine is only started once the window is shown.
         self._desktop = DesktopWindow()
+        self._desktop.get_tab_widget().set_memory_budget(self._get_memory_budget())
+        trace.mark("window")
+
+        # Create the window manager and run it in its own thread so it and the GUI can never stall each other. Without
+        # a display to manage, the desktop still runs, just without window management.
+        self._wm_thread = QThread()
+        try:
+            self._wm = WindowsManager()
+        except ConnectionError as error:
+            self._logger.error(f"Running without window management: {error}")
+            self._wm = None
+        if self._wm is not None:
+            # Showing application windows in tabs is opt-in with the "embed_clients" setting.
+            self._wm.set_embed_clients(self._settings.get("embed_clients") is True)
+            self._wm.moveToThread(self._wm_thread)
+            self._wm_thread.started.connect(self._wm.run)
+
+            # Listen for the window manager's events and let it know which tabs are closed.
+            self._wm.get_event_bridge().signal_ready.connect(self._on_wm_events_ready)
+            self._desktop.get_tab_widget().signal_client_close_requested.connect(self._wm.close_client)
+        trace.mark("window manager")
+        QApplication.instance().aboutToQuit.connect(self._on_about_to_quit)
 
-        # Create the window manager.
-        #self._wm_thread = QThread()
-        #self._wm = WindowsManager()
-        #self._wm.moveToThread(self._wm_thread)
-        #self._wm_thread.started.connect(self._wm.run)
-        #self._wm.start()
-        #self._wm_thread.start()
+        # Index the user's files in the background so the search bar can find them.
+        self._file_indexer = FileIndexer(FileManager().get_file_index_file(), QDir.homePath())
+        self._file_indexer.set_search_index(self._desktop.get_search_index())
+
+    def _get_memory_budget(self) -> int:
+        """
+        Returns how much memory the web pages may use before background tabs are discarded. This is the
+        "memory_budget_mb" setting, or a quarter of the physical memory if it is not set.
+
+        :return: The memory budget in megabytes, or 0 to never discard tabs.
+        :rtype: int
+        """
+        budget = self._settings.get("memory_budget_mb")
+        if isinstance(budget, int) and budget >= 0:
+            return budget
+        if budget is not None:
+            self._logger.warning(f"Ignoring memory_budget_mb={budget!r}, which is not a number of megabytes")
+
+        physical_memory = get_physical_memory()
+        return physical_memory // 4 // (1024 * 1024) if physical_memory else 0
 
     def run(self) -> None:
         """
-        Startup the environment.
+        Startup the environment. The tabs are opened once the bare window had a chance to be painted, since opening
+        them starts the web engine.
         """
+        trace = StartupTrace()
+        trace.watch_first_paint(self._desktop.instance)
         self._desktop.show()
-        #self._wm.stop()
-        #self._wm_thread.quit()
-        #self._wm_thread.wait()
+        trace.mark("show")
+        QTimer.singleShot(0, self._on_shown)
+
+        if self._wm is not None:
+            self._wm.start()
+            self._wm_thread.start()
+        self._file_indexer.start()
+        self._desktop.get_history_store().start()
+        self._desktop.get_icon_cache().start()
+
+    def _on_shown(self) -> None:
+        """
+        Opens the tabs once the desktop window is shown.
+        """
+        self._desktop.open_tabs()
+        StartupTrace().mark("tabs")
+
+    def _on_wm_events_ready(self) -> None:
+        """
+        Applies every event the window manager has queued to the tabs. The bridge only keeps the latest title of each
+        window.
+        """
+        from orchid.wm.bridge import CLIENT_MAPPED, CLIENT_TITLE_CHANGED, CLIENT_DESTROYED
+        tab_widget = self._desktop.get_tab_widget()
+        for record in self._wm.get_event_bridge().drain():
+            if record.kind == CLIENT_MAPPED:
+                tab_widget.add_client_tab(record.window_id, record.title)
+            elif record.kind == CLIENT_TITLE_CHANGED:
+                tab_widget.set_client_title(record.window_id, record.title)
+            elif record.kind == CLIENT_DESTROYED:
+                tab_widget.remove_client_tab(record.window_id)
+
+    def _on_about_to_quit(self) -> None:
+        """
+        Saves the session, stops the window manager, the file indexer, the history store, the icon cache and the file
+        manager and waits for their threads to finish.
+        """
+        self._desktop.get_session_journal().stop()
+        if self._wm is not None:
+            self._wm_thread.quit()
+            self._wm_thread.wait()
+            self._wm.stop()
+        self._file_indexer.stop()
+        self._desktop.get_history_store().stop()
+        self._desktop.get_icon_cache().stop()
+        if Instrumentation().is_enabled():
+            Instrumentation().dump()
+        FileManager().shutdown()
@@ -1,11 +1,17 @@
-from os import mkdir
-from os.path import exists, join, dirname
+from os import makedirs, replace, fsync, stat, remove
+from os.path import join, dirname
 from pathlib import Path
+from json import loads, dumps
+from threading import Lock
+from concurrent.futures import ThreadPoolExecutor, Future, wait
+from logging import getLogger
+from PyQt5.QtCore import QObject, pyqtSignal
 
 
 class FileManager:
     """
-    A manager of all files in and out of :module:`orchid`.
+    A manager of all files in and out of :module:`orchid`. Files are read and written on an I/O thread pool, so after
+    startup no disk I/O runs on the GUI thread; results are handed back to the GUI thread through callbacks.
     """
 
     instance = None
@@ -26,6 +32,227 @@ class FileManager:
         """
         return FileManager.instance.theme_file
 
+    def get_compiled_theme_file(self) -> str:
+        """
+        Returns an absolute path to the compiled form of the theme file, which is loaded instead of the theme file as
+        long as the theme file has not changed.
+
+        :return: The path to the compiled theme.
+        :rtype: str
+        """
+        return FileManager.instance.compiled_theme_file
+
+    def get_settings_file(self) -> str:
+        """
+        Returns an absolute path to the user's settings. The file is optional; missing settings keep their defaults.
+
+        :return: The path to the settings file.
+        :rtype: str
+        """
+        return FileManager.instance.settings_file
+
+    def get_history_file(self) -> str:
+        """
+        Returns an absolute path to the database the browsing history is stored in.
+
+        :return: The path to the history database.
+        :rtype: str
+        """
+        return FileManager.instance.history_file
+
+    def get_session_file(self) -> str:
+        """
+        Returns an absolute path to the journal the open tabs are saved to.
+
+        :return: The path to the session journal.
+        :rtype: str
+        """
+        return FileManager.instance.session_file
+
+    def get_icon_store_file(self) -> str:
+        """
+        Returns an absolute path to the store the favicons of visited sites are kept in.
+
+        :return: The path to the icon store.
+        :rtype: str
+        """
+        return FileManager.instance.icon_store_file
+
+    def get_metrics_file(self) -> str:
+        """
+        Returns an absolute path to the file the instrumentation's latency histograms are dumped to.
+
+        :return: The path to the metrics file.
+        :rtype: str
+        """
+        return FileManager.instance.metrics_file
+
+    def get_stalls_file(self) -> str:
+        """
+        Returns an absolute path to the file the stacks sampled during event loop stalls are written to.
+
+        :return: The path to the stalls file.
+        :rtype: str
+        """
+        return FileManager.instance.stalls_file
+
+    def get_file_index_file(self) -> str:
+        """
+        Returns an absolute path to the file the index of the user's files is saved to.
+
+        :return: The path to the file index.
+        :rtype: str
+        """
+        return FileManager.instance.file_index_file
+
+    def get_config_files(self) -> list:
+        """
+        Returns the absolute paths of every JSON config file, which are loaded together at startup. The theme file is
+        not one of them, since the :class:`Themer` loads its compiled form instead.
+
+        :return: The paths of the config files.
+        :rtype: list
+        """
+        return [FileManager.instance.settings_file]
+
+    def load_all(self, paths: list) -> dict:
+        """
+        Reads and parses many JSON files at once, in parallel on the I/O threads, and waits for all of them. This
+        blocks and is meant for startup; afterwards use :method:`read_json()`.
+
+        :param paths: The files to load.
+        :type paths: list
+        :return: The parsed document of each path, or None for paths that could not be loaded.
+        :rtype: dict
+        """
+        futures = {path: FileManager.instance.submit(FileManager.instance.read_json, path) for path in paths}
+        wait(futures.values())
+        return {path: future.result() for path, future in futures.items()}
+
+    def load_json(self, path: str):
+        """
+        Returns the parsed document of a JSON file, reading it only if it is not cached or changed on disk since it
+        was cached. This blocks and is meant for startup; afterwards use :method:`read_json()`.
+
+        :param path: The file to load.
+        :type path: str
+        :return: The parsed document, or None if it could not be loaded. It is shared with the cache, so do not
+        change it.
+        """
+        return FileManager.instance.submit(FileManager.instance.read_json, path).result()
+
+    def get_cached_json(self, path: str):
+        """
+        Returns the parsed document of a JSON file as it was last read or written, without touching the disk.
+
+        :param path: The file whose document to return.
+        :type path: str
+        :return: The parsed document, or None if it is not cached. It is shared with the cache, so do not change it.
+        """
+        return FileManager.instance.get_cached(path)
+
+    def read_json(self, path: str, callback=None) -> Future:
+        """
+        Reads and parses a JSON file on the I/O threads. The cached document is used if the file has not changed.
+
+        :param path: The file to read.
+        :type path: str
+        :param callback: An optional function called on the GUI thread with the parsed document, or with None if the
+        file could not be loaded.
+        :return: The future of the parsed document.
+        :rtype: Future
+        """
+        return FileManager.instance.submit(FileManager.instance.read_json, path, callback=callback)
+
+    def read_bytes(self, path: str, callback=None) -> Future:
+        """
+        Reads a file on the I/O threads.
+
+        :param path: The file to read.
+        :type path: str
+        :param callback: An optional function called on the GUI thread with the contents, or with None if the file
+        could not be read.
+        :return: The future of the contents.
+        :rtype: Future
+        """
+        return FileManager.instance.submit(FileManager.instance.read_bytes, path, callback=callback)
+
+    def write_json(self, path: str, document, callback=None) -> Future:
+        """
+        Serializes a document and atomically replaces a JSON file with it on the I/O writer thread. The document is
+        cached right away, so reads see it before it reaches the disk.
+
+        :param path: The file to write.
+        :type path: str
+        :param document: The document to write. It is shared with the cache, so do not change it afterwards.
+        :param callback: An optional function called on the GUI thread with whether the write succeeded.
+        :return: The future of whether the write succeeded.
+        :rtype: Future
+        """
+        FileManager.instance.set_cached(path, document)
+        return FileManager.instance.submit_write(FileManager.instance.write_json, path, document, callback=callback)
+
+    def write_bytes(self, path: str, data, callback=None) -> Future:
+        """
+        Atomically replaces a file with the given contents on the I/O writer thread. Writes happen in the order they
+        are made.
+
+        :param path: The file to write.
+        :type path: str
+        :param data: The new contents of the file, or a function returning them. The function is called on the writer
+        thread, so serializing a large document does not block the GUI thread.
+        :param callback: An optional function called on the GUI thread with whether the write succeeded.
+        :return: The future of whether the write succeeded.
+        :rtype: Future
+        """
+        return FileManager.instance.submit_write(FileManager.instance.write_bytes, path, data, callback=callback)
+
+    def append_bytes(self, path: str, data: bytes, callback=None) -> Future:
+        """
+        Appends to a file on the I/O writer thread. Appends and writes happen in the order they are made.
+
+        :param path: The file to append to.
+        :type path: str
+        :param data: What to append to the file.
+        :type data: bytes
+        :param callback: An optional function called on the GUI thread with whether the append succeeded.
+        :return: The future of whether the append succeeded.
+        :rtype: Future
+        """
+        return FileManager.instance.submit_write(FileManager.instance.append_bytes, path, data, callback=callback)
+
+    def shutdown(self) -> None:
+        """
+        Waits for every queued write to reach the disk and stops the I/O threads.
+        """
+        FileManager.instance.shutdown()
+
+
+class _CallbackBridge(QObject):
+    """
+    Carries the results of I/O tasks back to the thread the :class:`FileManager` was created on.
+    """
+
+    # Class signals.
+    signal_done = pyqtSignal(object, object)
+
+    def __init__(self) -> None:
+        """
+        Creates the bridge and connects it to itself, so callbacks run in its thread.
+        """
+        super().__init__()
+        self.signal_done.connect(self._on_done)
+
+    @staticmethod
+    def _on_done(callback, result) -> None:
+        """
+        Calls a callback with the result of its task.
+
+        :param callback: The callback of the task.
+        :param result: The result of the task.
+        """
+        callback(result)
+
 
 class _FileManager:
     """
@@ -33,15 +260,217 @@ class _FileManager:
     exists. This is a singleton.
     """
 
+    READ_WORKERS = 4
+
     def __init__(self) -> None:
         """
-        Verifies and creates all of the files for :module:`orchid`.
+        Creates the I/O threads and all of the folders for :module:`orchid`.
         """
+        self._logger = getLogger(__name__)
         self.theme_file = join(Path.home(), ".orchid", "themes", "default.json")
+        self.compiled_theme_file = join(Path.home(), ".orchid", "themes", "default.theme")
+        self.settings_file = join(Path.home(), ".orchid", "settings.json")
+        self.history_file = join(Path.home(), ".orchid", "history.sqlite")
+        self.file_index_file = join(Path.home(), ".orchid", "index", "files.idx")
+        self.session_file = join(Path.home(), ".orchid", "session.journal")
+        self.icon_store_file = join(Path.home(), ".orchid", "icons.store")
+        self.metrics_file = join(Path.home(), ".orchid", "metrics.json")
+        self.stalls_file = join(Path.home(), ".orchid", "stalls.folded")
+
+        # Reads can run in any order, but writes go through a single thread so they reach the disk in order.
+        self._reader = ThreadPoolExecutor(self.READ_WORKERS, thread_name_prefix="orchid-io-read")
+        self._writer = ThreadPoolExecutor(1, thread_name_prefix="orchid-io-write")
+        self._bridge = _CallbackBridge()
+        self._cache_lock = Lock()
+        self._cache = {}  # The (mtime in nanoseconds, parsed document) of each JSON file, by path.
+
+        makedirs(dirname(self.theme_file), exist_ok=True)
+        makedirs(dirname(self.file_index_file), exist_ok=True)
+        # TODO: Copy theme file into directory.
+
+    def submit(self, function, *args, callback=None) -> Future:
+        """
+        Runs a function on the reader threads.
+
+        :param function: The function to run.
+        :param args: The arguments of the function.
+        :param callback: An optional function called on the GUI thread with the result.
+        :return: The future of the result.
+        :rtype: Future
+        """
+        return self._with_callback(self._reader.submit(function, *args), callback)
+
+    def submit_write(self, function, *args, callback=None) -> Future:
+        """
+        Runs a function on the writer thread, after every write submitted before it.
+
+        :param function: The function to run.
+        :param args: The arguments of the function.
+        :param callback: An optional function called on the GUI thread with the result.
+        :return: The future of the result.
+        :rtype: Future
+        """
+        return self._with_callback(self._writer.submit(function, *args), callback)
+
+    def _with_callback(self, future: Future, callback) -> Future:
+        """
+        Has a callback called on the GUI thread once a future is done.
 
-        if not exists(dirname(self.theme_file)):
-            mkdir(dirname(self.theme_file))
-            # TODO: Copy theme file into directory.
-        elif not exists(self.theme_file):
-            # TODO: Copy theme file into directory.
-            pass
+        :param future: The future of a task.
+        :type future: Future
+        :param callback: The function to call with the result, or None.
+        :return: The same future.
+        :rtype: Future
+        """
+        if callback is not None:
+            future.add_done_callback(lambda done: self._bridge.signal_done.emit(callback, done.result()))
+        return future
+
+    def get_cached(self, path: str):
+        """
+        Returns the cached document of a JSON file.
+
+        :param path: The file whose document to return.
+        :type path: str
+        :return: The parsed document, or None if it is not cached.
+        """
+        with self._cache_lock:
+            cached = self._cache.get(path)
+        return cached[1] if cached is not None else None
+
+    def set_cached(self, path: str, document, mtime: int = None) -> None:
+        """
+        Caches the document of a JSON file.
+
+        :param path: The file of the document.
+        :type path: str
+        :param document: The parsed document.
+        :param mtime: The modification time in nanoseconds of the file the document was read from, or None if the
+        document has not reached the disk yet.
+        :type mtime: int
+        """
+        with self._cache_lock:
+            self._cache[path] = (mtime, document)
+
+    def read_bytes(self, path: str):
+        """
+        Reads a file. Runs on an I/O thread.
+
+        :param path: The file to read.
+        :type path: str
+        :return: The contents of the file, or None if it could not be read.
+        """
+        try:
+            with open(path, "rb") as file:
+                return file.read()
+        except OSError as error:
+            self._logger.warning(f"Could not read {path}: {error}")
+            return None
+
+    def read_json(self, path: str):
+        """
+        Reads and parses a JSON file unless the cached document is as new as the file. Runs on an I/O thread.
+
+        :param path: The file to read.
+        :type path: str
+        :return: The parsed document, or None if the file could not be loaded.
+        """
+        with self._cache_lock:
+            cached = self._cache.get(path)
+        try:
+            mtime = stat(path).st_mtime_ns
+        except OSError:
+            return cached[1] if cached is not None else None
+        if cached is not None and (cached[0] is None or cached[0] == mtime):
+            return cached[1]  # Either unchanged on disk, or written by us and the write is still queued.
+
+        data = self.read_bytes(path)
+        if data is None:
+            return None
+        try:
+            document = loads(data)
+        except ValueError as error:
+            self._logger.warning(f"Could not parse {path}: {error}")
+            return None
+        self.set_cached(path, document, mtime)
+        return document
+
+    def write_bytes(self, path: str, data) -> bool:
+        """
+        Atomically replaces a file by writing a temporary file next to it and renaming it over the file. Runs on the
+        writer thread.
+
+        :param path: The file to write.
+        :type path: str
+        :param data: The new contents of the file, or a function returning them.
+        :return: True if the file was written.
+        :rtype: bool
+        """
+        if callable(data):
+            data = data()
+        temporary_path = path + ".tmp"
+        try:
+            makedirs(dirname(path), exist_ok=True)
+            with open(temporary_path, "wb") as file:
+                file.write(data)
+                file.flush()
+                fsync(file.fileno())
+            replace(temporary_path, path)
+        except OSError as error:
+            self._logger.warning(f"Could not write {path}: {error}")
+            try:
+                remove(temporary_path)
+            except OSError:
+                pass
+            return False
+        return True
+
+    def append_bytes(self, path: str, data: bytes) -> bool:
+        """
+        Appends to a file. The data is handed to the operating system before this returns, so it survives the app
+        crashing. Runs on the writer thread.
+
+        :param path: The file to append to.
+        :type path: str
+        :param data: What to append to the file.
+        :type data: bytes
+        :return: True if the data was appended.
+        :rtype: bool
+        """
+        try:
+            with open(path, "ab") as file:
+                file.write(data)
+        except OSError as error:
+            self._logger.warning(f"Could not append to {path}: {error}")
+            return False
+        return True
+
+    def write_json(self, path: str, document) -> bool:
+        """
+        Serializes a document and atomically replaces a JSON file with it. Runs on the writer thread.
+
+        :param path: The file to write.
+        :type path: str
+        :param document: The document to write.
+        :return: True if the file was written.
+        :rtype: bool
+        """
+        if not self.write_bytes(path, dumps(document, indent=4).encode()):
+            return False
+
+        # Record the file's new modification time, unless a newer document was cached while it was written.
+        with self._cache_lock:
+            cached = self._cache.get(path)
+            if cached is not None and cached[1] is document:
+                try:
+                    self._cache[path] = (stat(path).st_mtime_ns, document)
+                except OSError:
+                    pass
+        return True
+
+    def shutdown(self) -> None:
+        """
+        Waits for every queued write and stops the I/O threads.
+        """
+        self._writer.shutdown(wait=True)
+        self._reader.shutdown(wait=False)
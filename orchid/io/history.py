@@ -0,0 +1,417 @@
+from bisect import bisect_left, insort
+from collections import deque
+from heapq import nlargest
+from logging import getLogger
+from math import exp, log, log1p
+from sqlite3 import connect, Error as SQLiteError
+from threading import Thread, Condition
+from time import time, perf_counter
+from PyQt5.QtCore import QObject, QTimer, QUrl, pyqtSignal
+from orchid.search import SearchIndex, KIND_HISTORY
+
+
+# How quickly old visits stop counting. A visit counts half as much after this many seconds.
+FRECENCY_HALF_LIFE = 30 * 24 * 60 * 60
+_DECAY = log(2) / FRECENCY_HALF_LIFE
+
+# Pages with these schemes are never kept in the history.
+_IGNORED_SCHEMES = {"", "about", "data", "blob", "chrome", "qrc", "view-source", "javascript"}
+
+
+def strip_url(url: str) -> str:
+    """
+    Returns a URL without its scheme and leading "www.", lowercased, which is how URLs are typed when looking for
+    them.
+
+    :param url: The URL.
+    :type url: str
+    :return: The stripped URL.
+    :rtype: str
+    """
+    url = url.lower()
+    scheme_end = url.find("://")
+    if scheme_end >= 0:
+        url = url[scheme_end + 3:]
+    if url.startswith("www."):
+        url = url[4:]
+    return url
+
+
+def _add_keys(first: float, second: float) -> float:
+    """
+    Adds two frecency keys. A frecency key is the logarithm of the sum of e^(decay * visit time) over all visits, so
+    keys of different pages compare the same way at any time, and counting a visit only needs the old key. The sum is
+    computed without leaving the logarithm so it cannot overflow.
+
+    :param first: The first key, or None for a page that was never visited.
+    :type first: float
+    :param second: The second key, or None for a page that was never visited.
+    :type second: float
+    :return: The key of the visits of both keys.
+    :rtype: float
+    """
+    if first is None:
+        return second
+    if second is None:
+        return first
+    high, low = max(first, second), min(first, second)
+    return high + log1p(exp(low - high))
+
+
+class HistoryEntry:
+    """
+    A page in the browsing history.
+    """
+
+    def __init__(self, url: str, title: str = "", visit_count: int = 0, last_visit: float = 0.0,
+                 frecency_key: float = None) -> None:
+        """
+        Creates the entry.
+
+        :param url: The URL of the page.
+        :type url: str
+        :param title: The title of the page.
+        :type title: str
+        :param visit_count: How many times the page was visited.
+        :type visit_count: int
+        :param last_visit: When the page was last visited in seconds since the epoch.
+        :type last_visit: float
+        :param frecency_key: The frecency key of the page, or None if it was never visited.
+        :type frecency_key: float
+        """
+        self.url = url
+        self.title = title
+        self.visit_count = visit_count
+        self.last_visit = last_visit
+        self.frecency_key = frecency_key
+
+    def get_frecency(self, now: float = None) -> float:
+        """
+        Returns how often and how recently the page was visited, as the number of visits where each visit counts half
+        as much every :data:`FRECENCY_HALF_LIFE` seconds.
+
+        :param now: The time to compute the frecency at, or None for the current time.
+        :type now: float
+        :return: The frecency of the page.
+        :rtype: float
+        """
+        if self.frecency_key is None:
+            return 0.0
+        return exp(self.frecency_key - _DECAY * (time() if now is None else now))
+
+
+class HistoryStore(QObject):
+    """
+    The browsing history. Every page is kept in memory, sorted by its URL for prefix lookups and by its frecency for
+    lookups of the most used pages, so lookups never touch the disk and only look at a bounded number of pages.
+
+    The pages are stored in an SQLite database in WAL mode by a writer thread. Changes are buffered and the writer
+    saves them in one transaction every second, or sooner when many pile up, so the GUI thread never waits on the disk.
+    """
+
+    # Class signals.
+    signal_loaded = pyqtSignal(list)
+
+    # How often buffered changes are saved in seconds, and how many changes make the writer save them sooner.
+    FLUSH_INTERVAL = 1.0
+    FLUSH_SIZE = 256
+
+    # The most pages a prefix lookup looks at.
+    PREFIX_SCAN_LIMIT = 2000
+
+    # How long loaded pages may be fed to the search index before letting the event loop run.
+    SLICE_TIME = 0.008
+
+    def __init__(self, path: str, parent: QObject = None) -> None:
+        """
+        Creates the store. The history is loaded once :method:`start()` is called.
+
+        :param path: The database file.
+        :type path: str
+        :param parent: An optional parent object for this store.
+        :type parent: QObject
+        """
+        super().__init__(parent)
+        self._logger = getLogger(__name__)
+        self._path = path
+
+        self._entries = {}  # The pages keyed by URL.
+        self._prefixes = []  # Sorted (stripped URL, URL) pairs.
+        self._by_frecency = []  # Sorted (negated frecency key, URL) pairs of the visited pages.
+
+        # Changes waiting for the writer thread keyed by URL. Each row holds the visits since the last save, which the
+        # writer adds to the stored page, so visits made before the history was loaded never replace it.
+        self._pending = {}
+        self._condition = Condition()
+        self._is_stopping = False
+        self._is_failed = False  # Set once the database could not be opened, after which changes are not buffered.
+        self._thread = None
+
+        # Loaded pages waiting to be fed to the search index.
+        self._search_index = None
+        self._unindexed = deque()
+        self._slice_timer = QTimer(self)
+        self._slice_timer.setInterval(0)
+        self._slice_timer.timeout.connect(self._on_slice_timeout)
+        self.signal_loaded.connect(self._on_loaded)
+
+    def set_search_index(self, search_index: SearchIndex) -> None:
+        """
+        Sets the :class:`SearchIndex` the pages are kept in, weighted by their frecency.
+
+        :param search_index: The index to keep the pages in.
+        :type search_index: SearchIndex
+        """
+        self._search_index = search_index
+        self._unindexed.extend(self._entries)
+        if self._unindexed:
+            self._slice_timer.start()
+
+    def start(self) -> None:
+        """
+        Starts the writer thread, which loads the history and then saves changes to it.
+        """
+        if self._thread is None:
+            self._is_stopping = False
+            self._is_failed = False
+            self._thread = Thread(target=self._run, name="orchid-history-writer", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        """
+        Saves the buffered changes and stops the writer thread.
+        """
+        if self._thread is not None:
+            with self._condition:
+                self._is_stopping = True
+                self._condition.notify()
+            self._thread.join()
+            self._thread = None
+        self._slice_timer.stop()
+
+    def add_visit(self, url: QUrl, visit_time: float = None) -> None:
+        """
+        Records a visit to a page.
+
+        :param url: The URL of the page.
+        :type url: QUrl
+        :param visit_time: When the visit happened in seconds since the epoch, or None for now.
+        :type visit_time: float
+        """
+        if url.scheme() in _IGNORED_SCHEMES:
+            return
+        key = url.toString()
+        visit_time = time() if visit_time is None else visit_time
+
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = HistoryEntry(key)
+            self._entries[key] = entry
+            insort(self._prefixes, (strip_url(key), key))
+        else:
+            self._remove_frecency(entry)
+
+        entry.visit_count += 1
+        entry.last_visit = max(entry.last_visit, visit_time)
+        entry.frecency_key = _add_keys(entry.frecency_key, _DECAY * visit_time)
+        insort(self._by_frecency, (-entry.frecency_key, key))
+        self._queue(key, entry.title, 1, visit_time, _DECAY * visit_time)
+        self._index(entry)
+
+    def set_title(self, url: QUrl, title: str) -> None:
+        """
+        Sets the title of a page in the history.
+
+        :param url: The URL of the page.
+        :type url: QUrl
+        :param title: The title of the page.
+        :type title: str
+        """
+        entry = self._entries.get(url.toString())
+        if entry is not None and title and entry.title != title:
+            entry.title = title
+            self._queue(entry.url, title, 0, 0.0, None)
+            self._index(entry)
+
+    def get_entry(self, url: str) -> HistoryEntry:
+        """
+        Returns the history of a page.
+
+        :param url: The URL of the page.
+        :type url: str
+        :return: The page, or None if it is not in the history.
+        :rtype: HistoryEntry
+        """
+        return self._entries.get(url)
+
+    def get_prefix_matches(self, prefix: str, limit: int = 10) -> list:
+        """
+        Returns the most frecent pages whose URL starts with what was typed, ignoring the scheme and "www.". At most
+        :attr:`PREFIX_SCAN_LIMIT` pages are looked at, so a short prefix costs as little as a long one.
+
+        :param prefix: What was typed.
+        :type prefix: str
+        :param limit: The most pages to return.
+        :type limit: int
+        :return: The matching :class:`HistoryEntry`s, most frecent first.
+        :rtype: list
+        """
+        prefix = strip_url(prefix)
+        if not prefix:
+            return []
+
+        matches = []
+        start = bisect_left(self._prefixes, (prefix,))
+        for stripped, url in self._prefixes[start:start + self.PREFIX_SCAN_LIMIT]:
+            if not stripped.startswith(prefix):
+                break
+            matches.append(self._entries[url])
+        return nlargest(limit, matches, key=lambda entry: entry.frecency_key)
+
+    def get_top_entries(self, limit: int = 10) -> list:
+        """
+        Returns the most frecent pages.
+
+        :param limit: The most pages to return.
+        :type limit: int
+        :return: The :class:`HistoryEntry`s, most frecent first.
+        :rtype: list
+        """
+        return [self._entries[url] for _, url in self._by_frecency[:limit]]
+
+    def _remove_frecency(self, entry: HistoryEntry) -> None:
+        """
+        Takes a page out of the frecency order before its frecency changes.
+
+        :param entry: The page.
+        :type entry: HistoryEntry
+        """
+        if entry.frecency_key is not None:
+            pair = (-entry.frecency_key, entry.url)
+            i = bisect_left(self._by_frecency, pair)
+            if i < len(self._by_frecency) and self._by_frecency[i] == pair:
+                del self._by_frecency[i]
+
+    def _queue(self, url: str, title: str, visit_count: int, last_visit: float, frecency_key: float) -> None:
+        """
+        Queues a change to a page to be saved, adding it to the change already waiting for the page.
+
+        :param url: The URL of the page.
+        :type url: str
+        :param title: The title of the page, or an empty string to keep the saved one.
+        :type title: str
+        :param visit_count: The number of new visits.
+        :type visit_count: int
+        :param last_visit: The time of the latest new visit, or 0 if there is none.
+        :type last_visit: float
+        :param frecency_key: The frecency key of the new visits, or None if there are none.
+        :type frecency_key: float
+        """
+        with self._condition:
+            if self._is_failed:
+                return
+            row = self._pending.get(url)
+            if row is not None:
+                title = title or row[1]
+                visit_count += row[2]
+                last_visit = max(last_visit, row[3])
+                frecency_key = _add_keys(row[4], frecency_key)
+            self._pending[url] = (url, title, visit_count, last_visit, frecency_key)
+            if len(self._pending) >= self.FLUSH_SIZE:
+                self._condition.notify()
+
+    def _index(self, entry: HistoryEntry) -> None:
+        """
+        Updates a changed page in the search index.
+
+        :param entry: The page that changed.
+        :type entry: HistoryEntry
+        """
+        if self._search_index is not None:
+            self._search_index.add(KIND_HISTORY, entry.url, entry.title, entry.url, entry.get_frecency())
+
+    def _on_loaded(self, rows: list) -> None:
+        """
+        Adds the pages loaded by the writer thread, merging them with pages visited while they were loading.
+
+        :param rows: The rows of the pages table.
+        :type rows: list
+        """
+        start = perf_counter()
+        for url, title, visit_count, last_visit, frecency_key in rows:
+            entry = self._entries.get(url)
+            if entry is None:
+                self._entries[url] = HistoryEntry(url, title, visit_count, last_visit, frecency_key)
+            else:
+                # The page was visited before its history was loaded, so count both. The writer adds the new visits to
+                # the stored page the same way, and the search index is updated below.
+                entry.title = entry.title or title
+                entry.visit_count += visit_count
+                entry.last_visit = max(entry.last_visit, last_visit)
+                entry.frecency_key = _add_keys(entry.frecency_key, frecency_key)
+
+        self._prefixes = sorted((strip_url(url), url) for url in self._entries)
+        self._by_frecency = sorted((-entry.frecency_key, url) for url, entry in self._entries.items()
+                                   if entry.frecency_key is not None)
+        self._logger.debug("Loaded {} history entries in {:.2f} ms".format(len(rows), (perf_counter() - start) * 1000))
+
+        if self._search_index is not None:
+            self._unindexed.extend(url for url, _, _, _, _ in rows)
+            self._slice_timer.start()
+
+    def _on_slice_timeout(self) -> None:
+        """
+        Feeds loaded pages to the search index for a slice of time.
+        """
+        deadline = perf_counter() + self.SLICE_TIME
+        now = time()
+        while self._unindexed:
+            entry = self._entries.get(self._unindexed.popleft())
+            if entry is not None:
+                self._search_index.add(KIND_HISTORY, entry.url, entry.title, entry.url, entry.get_frecency(now))
+            if perf_counter() >= deadline:
+                return
+        self._slice_timer.stop()
+
+    def _run(self) -> None:
+        """
+        Loads the history and then saves buffered changes until the store is stopped. Runs in the writer thread.
+        """
+        try:
+            connection = connect(self._path)
+            connection.create_function("add_keys", 2, _add_keys)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute("CREATE TABLE IF NOT EXISTS pages (url TEXT PRIMARY KEY, title TEXT NOT NULL, "
+                               "visit_count INTEGER NOT NULL, last_visit REAL NOT NULL, frecency REAL)")
+            rows = connection.execute("SELECT url, title, visit_count, last_visit, frecency FROM pages").fetchall()
+        except SQLiteError as error:
+            # Nothing will ever save the changes, so stop buffering them. The history still works for this session.
+            self._logger.error("Could not open the history: {}".format(error))
+            with self._condition:
+                self._is_failed = True
+                self._pending.clear()
+            return
+        self.signal_loaded.emit(rows)
+
+        is_stopping = False
+        while not is_stopping:
+            with self._condition:
+                self._condition.wait_for(lambda: self._is_stopping or len(self._pending) >= self.FLUSH_SIZE,
+                                         self.FLUSH_INTERVAL)
+                pending, self._pending = self._pending, {}
+                is_stopping = self._is_stopping
+
+            if pending:
+                try:
+                    with connection:
+                        connection.executemany("INSERT INTO pages VALUES (?, ?, ?, ?, ?) ON CONFLICT(url) DO UPDATE "
+                                               "SET title = CASE excluded.title WHEN '' THEN title "
+                                               "ELSE excluded.title END, "
+                                               "visit_count = visit_count + excluded.visit_count, "
+                                               "last_visit = max(last_visit, excluded.last_visit), "
+                                               "frecency = add_keys(frecency, excluded.frecency)",
+                                               pending.values())
+                except SQLiteError as error:
+                    self._logger.error("Could not save {} history entries: {}".format(len(pending), error))
+        connection.close()
@@ -0,0 +1,329 @@
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from logging import getLogger
+from os.path import exists
+from struct import pack, unpack_from, error as StructError
+from PyQt5.QtCore import QObject, QTimer, QUrl, QSize, QBuffer, QByteArray, QIODevice, pyqtSignal
+from PyQt5.QtGui import QIcon, QImage, QPixmap
+from orchid.io import FileManager
+
+
+# The first bytes of an icon store, followed by the version of its format.
+_MAGIC = b"OICN"
+_VERSION = 1
+
+
+def get_origin(url: QUrl) -> str:
+    """
+    Returns the origin of a URL, which is the scheme, host and port that a site's pages share their favicon across.
+
+    :param url: The URL.
+    :type url: QUrl
+    :return: The origin, like "https://example.com", or None if the URL has no host.
+    :rtype: str
+    """
+    host = url.host().lower()
+    if not host:
+        return None
+    port = url.port()
+    return f"{url.scheme()}://{host}" if port < 0 else f"{url.scheme()}://{host}:{port}"
+
+
+def _pack_store(icons: list) -> bytes:
+    """
+    Packs icons into the compact format of an icon store: the magic and version, then the length and UTF-8 origin
+    and the length and PNG of each icon.
+
+    :param icons: The (origin, PNG) of each icon.
+    :type icons: list
+    :return: The packed store.
+    :rtype: bytes
+    """
+    parts = [_MAGIC, pack("<H", _VERSION)]
+    for origin, png in icons:
+        origin = origin.encode()
+        parts.append(pack("<HI", len(origin), len(png)))
+        parts.append(origin)
+        parts.append(png)
+    return b"".join(parts)
+
+
+def _unpack_store(data: bytes) -> list:
+    """
+    Unpacks the icons of an icon store. The PNGs are not decoded.
+
+    :param data: The packed store.
+    :type data: bytes
+    :return: The (origin, PNG) of each icon, or an empty list if the store is not in a known format. A store cut short
+    keeps the icons before the cut.
+    :rtype: list
+    """
+    if data is None or data[:len(_MAGIC)] != _MAGIC:
+        return []
+    icons = []
+    try:
+        offset = len(_MAGIC)
+        version, = unpack_from("<H", data, offset)
+        if version != _VERSION:
+            return []
+        offset += 2
+        while offset < len(data):
+            origin_length, png_length = unpack_from("<HI", data, offset)
+            offset += 6
+            end = offset + origin_length + png_length
+            if end > len(data):
+                break
+            icons.append((data[offset:offset + origin_length].decode(), data[offset + origin_length:end]))
+            offset = end
+    except (StructError, UnicodeDecodeError):
+        pass
+    return icons
+
+
+class IconCache(QObject):
+    """
+    Remembers the favicon of every site, keyed by origin, so tabs, bookmarks and suggestions have an icon before a page
+    of the site is loaded, and after a restart. The icons are kept as PNGs in a compact store file that the
+    :class:`FileManager` reads and writes, and the icons in use are kept decoded as :class:`QPixmap`s, the
+    :attr:`MAX_PIXMAPS` most recently used of them. Icons are decoded and encoded on a worker thread, so asking for
+    an icon that is not decoded yet returns None and :attr:`signal_icon_ready` is sent once it is.
+    """
+
+    # Class signals.
+    signal_icon_ready = pyqtSignal(str, QIcon)
+    _signal_done = pyqtSignal()
+
+    # The size the icons are stored at.
+    ICON_SIZE = QSize(32, 32)
+
+    # How many decoded icons are kept in memory, and how many icons are kept in the store.
+    MAX_PIXMAPS = 256
+    MAX_STORED = 2048
+
+    # How many milliseconds after an icon changes the store is saved.
+    SAVE_DELAY = 5000
+
+    def __init__(self, path: str, parent: QObject = None) -> None:
+        """
+        Creates an empty cache. The store is only read once :method:`start()` is called.
+
+        :param path: The store file.
+        :type path: str
+        :param parent: An optional parent object for this cache.
+        :type parent: QObject
+        """
+        super().__init__(parent)
+        self._logger = getLogger(__name__)
+        self._path = path
+        self._stored = OrderedDict()  # The PNG of each icon keyed by origin, least recently used first.
+        self._pixmaps = OrderedDict()  # The decoded icons keyed by origin, least recently used first.
+        self._decoding = set()  # The origins being decoded.
+        self._requested = set()  # The origins asked for before the store was loaded.
+        self._is_loaded = False
+        self._is_changed = False
+        self._worker = None
+        self._done = deque()  # The (callback, result) of each job the worker finished, for the GUI thread to handle.
+
+        self._save_timer = QTimer(self)
+        self._save_timer.setSingleShot(True)
+        self._save_timer.setInterval(self.SAVE_DELAY)
+        self._save_timer.timeout.connect(self.save)
+
+        self._signal_done.connect(self._on_done)
+
+    def start(self) -> None:
+        """
+        Starts the worker thread and reads the store in the background.
+        """
+        if self._worker is not None:
+            return
+        self._worker = ThreadPoolExecutor(1, thread_name_prefix="orchid-icons")
+        if exists(self._path):
+            future = FileManager().read_bytes(self._path)
+            self._submit(self._on_store_loaded, lambda: _unpack_store(future.result()))
+        else:
+            self._on_store_loaded([])
+
+    def stop(self) -> None:
+        """
+        Saves the changed icons and stops the worker thread. The :class:`FileManager` writes the store before it shuts
+        down.
+        """
+        if self._worker is not None:
+            self._worker.shutdown(wait=True)
+            self._worker = None
+            self._on_done()  # Take in the icons encoded before the stop.
+        self.save()
+
+    def get_icon(self, url: QUrl) -> QIcon:
+        """
+        Returns the icon of a URL's site. If the icon is stored but not decoded, it is decoded in the background and
+        :attr:`signal_icon_ready` is sent with it.
+
+        :param url: The URL of a page of the site.
+        :type url: QUrl
+        :return: The icon, or None if it is not decoded yet or the site has none.
+        :rtype: QIcon
+        """
+        origin = get_origin(url)
+        if origin is None:
+            return None
+        pixmap = self._pixmaps.get(origin)
+        if pixmap is not None:
+            self._pixmaps.move_to_end(origin)
+            return QIcon(pixmap)
+
+        if not self._is_loaded:
+            self._requested.add(origin)
+        else:
+            self._decode(origin)
+        return None
+
+    def set_icon(self, url: QUrl, icon: QIcon) -> None:
+        """
+        Remembers the icon of a URL's site. The icon is used right away and stored once it is encoded in the
+        background.
+
+        :param url: The URL of the page the icon came from.
+        :type url: QUrl
+        :param icon: The icon. Null icons are ignored.
+        :type icon: QIcon
+        """
+        origin = get_origin(url)
+        if origin is None or icon.isNull() or self._worker is None:
+            return
+        pixmap = icon.pixmap(self.ICON_SIZE)
+        self._add_pixmap(origin, pixmap)
+        image = pixmap.toImage()
+        self._submit(lambda png: self._on_encoded(origin, png), self._encode, image)
+
+    def save(self) -> None:
+        """
+        Writes the store if any icon changed since it was last written. The store is packed on the writer thread.
+        """
+        self._save_timer.stop()
+        if not self._is_changed:
+            return
+        icons = list(self._stored.items())
+        FileManager().write_bytes(self._path, lambda: _pack_store(icons))
+        self._is_changed = False
+
+    def _decode(self, origin: str) -> None:
+        """
+        Decodes a stored icon on the worker thread.
+
+        :param origin: The origin of the icon.
+        :type origin: str
+        """
+        png = self._stored.get(origin)
+        if png is None or origin in self._decoding or self._worker is None:
+            return
+        self._stored.move_to_end(origin)
+        self._decoding.add(origin)
+        self._submit(lambda image: self._on_decoded(origin, image), QImage.fromData, png, "PNG")
+
+    def _submit(self, callback, function, *args) -> None:
+        """
+        Runs a function on the worker thread and has a callback called with its result on the GUI thread.
+
+        :param callback: The function called with the result.
+        :param function: The function to run.
+        :param args: The arguments of the function.
+        """
+        def run() -> None:
+            self._done.append((callback, function(*args)))
+            self._signal_done.emit()
+
+        self._worker.submit(run)
+
+    def _add_pixmap(self, origin: str, pixmap: QPixmap) -> None:
+        """
+        Keeps a decoded icon, dropping the least recently used one if there are too many.
+
+        :param origin: The origin of the icon.
+        :type origin: str
+        :param pixmap: The decoded icon.
+        :type pixmap: QPixmap
+        """
+        self._pixmaps[origin] = pixmap
+        self._pixmaps.move_to_end(origin)
+        if len(self._pixmaps) > self.MAX_PIXMAPS:
+            self._pixmaps.popitem(last=False)
+
+    @staticmethod
+    def _encode(image: QImage) -> bytes:
+        """
+        Encodes an icon as a PNG. Runs on the worker thread.
+
+        :param image: The icon.
+        :type image: QImage
+        :return: The PNG.
+        :rtype: bytes
+        """
+        data = QByteArray()
+        buffer = QBuffer(data)
+        buffer.open(QIODevice.WriteOnly)
+        image.save(buffer, "PNG")
+        buffer.close()
+        return bytes(data)
+
+    def _on_done(self) -> None:
+        """
+        Hands the results of the worker's finished jobs to their callbacks.
+        """
+        while self._done:
+            callback, result = self._done.popleft()
+            callback(result)
+
+    def _on_store_loaded(self, icons: list) -> None:
+        """
+        Adds the icons read from the store and decodes the ones asked for while it was being read. Icons set since
+        then are newer, so they are kept.
+
+        :param icons: The (origin, PNG) of each stored icon, least recently used first.
+        :type icons: list
+        """
+        stored = OrderedDict(icons)
+        stored.update(self._stored)
+        self._stored = stored
+        self._is_loaded = True
+        self._logger.debug(f"Loaded {len(icons)} icons from {self._path}")
+
+        for origin in self._requested:
+            self._decode(origin)
+        self._requested.clear()
+
+    def _on_decoded(self, origin: str, image: QImage) -> None:
+        """
+        Keeps a decoded icon and lets listeners know it is ready.
+
+        :param origin: The origin of the icon.
+        :type origin: str
+        :param image: The decoded icon, which is null if the stored PNG is broken.
+        :type image: QImage
+        """
+        self._decoding.discard(origin)
+        if image.isNull():
+            self._stored.pop(origin, None)
+            return
+        pixmap = QPixmap.fromImage(image)
+        self._add_pixmap(origin, pixmap)
+        self.signal_icon_ready.emit(origin, QIcon(pixmap))
+
+    def _on_encoded(self, origin: str, png: bytes) -> None:
+        """
+        Stores an encoded icon and saves the store soon if the icon changed.
+
+        :param origin: The origin of the icon.
+        :type origin: str
+        :param png: The encoded icon.
+        :type png: bytes
+        """
+        if self._stored.get(origin) != png:
+            self._is_changed = True
+            if not self._save_timer.isActive():
+                self._save_timer.start()
+        self._stored[origin] = png
+        self._stored.move_to_end(origin)
+        while len(self._stored) > self.MAX_STORED:
+            self._stored.popitem(last=False)
@@ -0,0 +1,291 @@
+from collections import namedtuple
+from json import loads, dumps
+from logging import getLogger
+from os.path import exists
+from PyQt5.QtCore import QObject, QTimer, QUrl, QByteArray
+from orchid.io import FileManager
+
+
+# A tab to restore, as it was when the session was last saved.
+SessionTab = namedtuple("SessionTab", ["url", "title", "history"])
+
+
+class SessionJournal(QObject):
+    """
+    Saves the open tabs as an append-only journal. Every change to a tab is a small record, and the records made
+    within :attr:`FLUSH_INTERVAL` are merged and appended together, so at most that much is lost when the app crashes.
+    Once the records outgrow the session they describe, the journal is compacted into a single snapshot record. Both
+    the appends and the compaction run on the :class:`FileManager`'s writer thread.
+
+    Tabs are identified by their widgets, and only widgets with a :method:`save_history()` method have their
+    navigation history saved.
+    """
+
+    # How many milliseconds of changes are merged into one append.
+    FLUSH_INTERVAL = 1000
+
+    # How many bytes may be appended after a snapshot, on top of the snapshot's own size, before compacting.
+    COMPACT_SIZE = 256 * 1024
+
+    def __init__(self, path: str, parent: QObject = None) -> None:
+        """
+        Creates the journal. The saved session is only read once :method:`load()` is called.
+
+        :param path: The journal file.
+        :type path: str
+        :param parent: An optional parent object for this journal.
+        :type parent: QObject
+        """
+        super().__init__(parent)
+        self._logger = getLogger(__name__)
+        self._path = path
+        self._ids = {}  # The id of each tab keyed by widget.
+        self._next_id = 0
+        self._tabs = {}  # The url, title and Base64 history of each tab keyed by id.
+        self._order = []  # The ids of the tabs in the order they are shown.
+        self._active = None  # The id of the current tab.
+        self._pending = {}  # The records waiting to be appended, keyed by what they are about.
+        self._changed_histories = set()  # The widgets whose history is saved on the next flush.
+        self._appended_size = 0
+        self._snapshot_size = 0
+        self._needs_snapshot = True  # Nothing is appended until the journal is known to match the tabs.
+
+        self._flush_timer = QTimer(self)
+        self._flush_timer.setSingleShot(True)
+        self._flush_timer.setInterval(self.FLUSH_INTERVAL)
+        self._flush_timer.timeout.connect(self.flush)
+
+    def load(self) -> tuple:
+        """
+        Reads the saved session. This blocks and is meant for startup. The tabs are not tracked by the journal until
+        they are opened again with :method:`open_tab()`, and the next flush replaces the journal with a snapshot of
+        them.
+
+        :return: The :class:`SessionTab`s in the order they were shown and the index of the current tab, or -1 if there
+        was none.
+        :rtype: tuple
+        """
+        data = FileManager().read_bytes(self._path).result() if exists(self._path) else None
+        if data:
+            for line in data.splitlines():
+                try:
+                    self._apply(loads(line))
+                except (ValueError, KeyError, TypeError):
+                    # The last record can be cut short by a crash; everything before it is still good.
+                    self._logger.warning(f"Skipping a damaged record in {self._path}")
+
+        tabs = []
+        for tab_id in self._order:
+            tab = self._tabs[tab_id]
+            history = QByteArray.fromBase64(tab["history"].encode()) if tab["history"] else None
+            tabs.append(SessionTab(QUrl(tab["url"]), tab["title"], history))
+        active = self._order.index(self._active) if self._active in self._order else -1
+
+        self._tabs.clear()
+        self._order = []
+        self._active = None
+        self._needs_snapshot = True
+        return tabs, active
+
+    def has_tab(self, widget) -> bool:
+        """
+        Returns whether the given widget's tab is saved.
+
+        :param widget: The widget in the tab.
+        :return: True if the tab is saved.
+        :rtype: bool
+        """
+        return widget in self._ids
+
+    def open_tab(self, widget, url: QUrl, title: str, history: QByteArray = None) -> None:
+        """
+        Starts saving a tab. It is saved in its place once :method:`set_order()` is called.
+
+        :param widget: The widget in the tab.
+        :param url: The URL of the tab.
+        :type url: QUrl
+        :param title: The title of the tab.
+        :type title: str
+        :param history: The navigation history of the tab, if it has one yet.
+        :type history: QByteArray
+        """
+        tab_id = self._next_id
+        self._next_id += 1
+        self._ids[widget] = tab_id
+        history = bytes(history.toBase64()).decode() if history is not None else ""
+        self._record(("tab", tab_id), {"op": "open", "id": tab_id, "url": url.toString(), "title": title,
+                                       "history": history})
+
+    def replace_tab(self, old_widget, new_widget) -> None:
+        """
+        Moves a tab to a new widget, like when a placeholder is replaced with a real page. The saved state is kept.
+
+        :param old_widget: The widget the tab had.
+        :param new_widget: The widget the tab has now.
+        """
+        tab_id = self._ids.pop(old_widget, None)
+        if tab_id is not None:
+            self._ids[new_widget] = tab_id
+            if old_widget in self._changed_histories:
+                self._changed_histories.discard(old_widget)
+                self._changed_histories.add(new_widget)
+
+    def set_order(self, widgets: list) -> None:
+        """
+        Saves the order of the tabs. Saved tabs whose widget is not given are closed.
+
+        :param widgets: The widgets of the tabs in the order they are shown. Widgets that are not saved are ignored.
+        :type widgets: list
+        """
+        order = [self._ids[widget] for widget in widgets if widget in self._ids]
+        if len(order) < len(self._ids):
+            shown = set(widgets)
+            for widget in [widget for widget in self._ids if widget not in shown]:
+                tab_id = self._ids.pop(widget)
+                self._changed_histories.discard(widget)
+                self._pending.pop(("tab", tab_id), None)
+                self._record(("close", tab_id), {"op": "close", "id": tab_id})
+        if order != self._order:
+            self._record(("order",), {"op": "order", "ids": order})
+
+    def set_active(self, widget) -> None:
+        """
+        Saves which tab is the current tab.
+
+        :param widget: The widget in the current tab.
+        """
+        tab_id = self._ids.get(widget)
+        if tab_id is not None and tab_id != self._active:
+            self._record(("active",), {"op": "active", "id": tab_id})
+
+    def set_url(self, widget, url: QUrl) -> None:
+        """
+        Saves the URL of a tab. The tab's navigation history is saved with it on the next flush.
+
+        :param widget: The widget in the tab.
+        :param url: The new URL of the tab.
+        :type url: QUrl
+        """
+        tab_id = self._ids.get(widget)
+        if tab_id is not None:
+            self._update(tab_id, "url", url.toString())
+            if hasattr(widget, "save_history"):
+                self._changed_histories.add(widget)
+
+    def set_title(self, widget, title: str) -> None:
+        """
+        Saves the title of a tab.
+
+        :param widget: The widget in the tab.
+        :param title: The new title of the tab.
+        :type title: str
+        """
+        tab_id = self._ids.get(widget)
+        if tab_id is not None:
+            self._update(tab_id, "title", title)
+
+    def flush(self) -> None:
+        """
+        Appends the waiting records to the journal, or replaces the journal with a snapshot once it is too long.
+        """
+        self._flush_timer.stop()
+
+        # Serializing the history is the expensive part, so it is done once per flush however often a tab navigates.
+        for widget in self._changed_histories:
+            self._update(self._ids[widget], "history", bytes(widget.save_history().toBase64()).decode())
+        self._changed_histories.clear()
+
+        if self._needs_snapshot or self._appended_size > self._snapshot_size + self.COMPACT_SIZE:
+            self._compact()
+        elif self._pending:
+            data = "".join(dumps(record) + "\n" for record in self._pending.values()).encode()
+            self._appended_size += len(data)
+            FileManager().append_bytes(self._path, data)
+        self._pending.clear()
+
+    def stop(self) -> None:
+        """
+        Saves the waiting records. The :class:`FileManager` writes them before it shuts down.
+        """
+        self.flush()
+
+    def _compact(self) -> None:
+        """
+        Replaces the journal with a single record of the current session. Only the copy of the session is made on the
+        GUI thread; it is serialized and written on the writer thread, after every append made before it.
+        """
+        tabs = [dict(self._tabs[tab_id], id=tab_id) for tab_id in self._order]
+        snapshot = {"op": "snapshot", "tabs": tabs, "active": self._active}
+
+        def serialize() -> bytes:
+            data = (dumps(snapshot) + "\n").encode()
+            self._snapshot_size = len(data)
+            return data
+
+        FileManager().write_bytes(self._path, serialize)
+        self._appended_size = 0
+        self._needs_snapshot = False
+
+    def _update(self, tab_id: int, key: str, value: str) -> None:
+        """
+        Saves a new value for one property of a tab. Changes to a tab's properties within a flush are merged into one
+        record.
+
+        :param tab_id: The id of the tab.
+        :type tab_id: int
+        :param key: The property, which is "url", "title" or "history".
+        :type key: str
+        :param value: The new value of the property.
+        :type value: str
+        """
+        if self._tabs[tab_id].get(key) == value:
+            return
+        record = self._pending.get(("tab", tab_id))
+        if record is None:
+            record = {"op": "update", "id": tab_id}
+        record[key] = value
+        self._record(("tab", tab_id), record)
+
+    def _record(self, key: tuple, record: dict) -> None:
+        """
+        Applies a record to the session and queues it to be appended, replacing a waiting record with the same key.
+        Replaced order and active records move to the end, so they follow the records of the tabs they name.
+
+        :param key: What the record is about.
+        :type key: tuple
+        :param record: The record.
+        :type record: dict
+        """
+        self._apply(record)
+        if record["op"] in ("order", "active"):
+            # Any other record keeps its place, since an order record naming its tab may already be waiting behind it.
+            self._pending.pop(key, None)
+        self._pending[key] = record
+        if not self._flush_timer.isActive():
+            self._flush_timer.start()
+
+    def _apply(self, record: dict) -> None:
+        """
+        Changes the session the way a record says.
+
+        :param record: The record.
+        :type record: dict
+        """
+        op = record["op"]
+        if op == "snapshot":
+            self._tabs = {tab["id"]: {"url": tab["url"], "title": tab["title"], "history": tab["history"]}
+                          for tab in record["tabs"]}
+            self._order = [tab["id"] for tab in record["tabs"]]
+            self._active = record["active"]
+        elif op == "open":
+            self._tabs[record["id"]] = {"url": record["url"], "title": record["title"], "history": record["history"]}
+        elif op == "update":
+            tab = self._tabs.get(record["id"])
+            if tab is not None:
+                tab.update((key, record[key]) for key in ("url", "title", "history") if key in record)
+        elif op == "close":
+            self._tabs.pop(record["id"], None)
+        elif op == "order":
+            self._order = [tab_id for tab_id in record["ids"] if tab_id in self._tabs]
+        elif op == "active":
+            self._active = record["id"]
@@ -0,0 +1,585 @@
+from array import array
+from bisect import bisect_left, insort
+from collections import Counter
+from heapq import nlargest
+from math import log1p
+from re import compile as compile_regex
+
+
+# The kinds of things that can be searched for.
+KIND_TAB = 0
+KIND_BOOKMARK = 1
+KIND_HISTORY = 2
+KIND_FILE = 3
+
+# How much more likely each kind of thing is to be what the user is looking for.
+KIND_WEIGHTS = {KIND_TAB: 3.0, KIND_BOOKMARK: 2.0, KIND_HISTORY: 1.0, KIND_FILE: 0.5}
+
+# How well a word in the index has to match a word of the query.
+_EXACT_MATCH = 4.0
+_PREFIX_MATCH = 3.0
+_SUBSTRING_MATCH = 1.5
+_FUZZY_MATCH = 1.0
+
+# How many entries a query looks at between checks of whether it is still wanted.
+_SLICE_SIZE = 512
+
+# Words that are in nearly every URL and so say nothing about it.
+_STOP_WORDS = {"http", "https", "www", "file"}
+
+_WORD_PATTERN = compile_regex(r"[^\W_]+")
+
+
+def tokenize(text: str) -> list:
+    """
+    Splits text into lowercase words.
+
+    :param text: The text to split.
+    :type text: str
+    :return: The words of the text.
+    :rtype: list
+    """
+    return _WORD_PATTERN.findall(text.lower())
+
+
+def trigrams(word: str) -> set:
+    """
+    Returns every three letter piece of a word, padded so the start and end of the word also count.
+
+    :param word: The word to split.
+    :type word: str
+    :return: The trigrams of the word.
+    :rtype: set
+    """
+    padded = " {} ".format(word)
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class SearchResult:
+    """
+    One thing found by a :class:`SearchIndex`.
+    """
+
+    def __init__(self, kind: int, key, title: str, url: str, score: float) -> None:
+        """
+        Creates the result.
+
+        :param kind: The kind of thing found, like :data:`KIND_TAB`.
+        :type kind: int
+        :param key: The key the thing was added to the index with.
+        :param title: The title of the thing.
+        :type title: str
+        :param url: The URL or path of the thing.
+        :type url: str
+        :param score: How well the thing matched the query. Higher is better.
+        :type score: float
+        """
+        self.kind = kind
+        self.key = key
+        self.title = title
+        self.url = url
+        self.score = score
+
+    def __repr__(self) -> str:
+        return "SearchResult({}, {!r}, {!r}, {:.2f})".format(self.kind, self.title, self.url, self.score)
+
+
+class SearchState:
+    """
+    What a :class:`SearchIndex` found for a query, kept so that the next, longer query the user types can be answered
+    by narrowing down these entries instead of looking everything up again.
+    """
+
+    def __init__(self, words: list, kinds: set, generation: int, candidates: dict, is_complete: bool,
+                 results: list) -> None:
+        """
+        Creates the state.
+
+        :param words: The words of the query.
+        :type words: list
+        :param kinds: The kinds of entries the query was limited to, or None for every kind.
+        :type kinds: set
+        :param generation: The generation of the index the query was answered from.
+        :type generation: int
+        :param candidates: The match quality of every entry that matched keyed by entry id.
+        :type candidates: dict
+        :param is_complete: Whether the candidates hold every entry that contains the words of the query.
+        :type is_complete: bool
+        :param results: The best :class:`SearchResult`s, best first.
+        :type results: list
+        """
+        self.words = words
+        self.kinds = kinds
+        self.generation = generation
+        self.candidates = candidates
+        self.is_complete = is_complete
+        self.results = results
+
+    def can_narrow(self, words: list, kinds: set, generation: int) -> bool:
+        """
+        Returns whether a new query can be answered from the entries that matched this one. That is the case when
+        every entry that matches the new query also matches this one, which holds when every word of this query is
+        part of a word of the new one.
+
+        :param words: The words of the new query.
+        :type words: list
+        :param kinds: The kinds of entries the new query is limited to.
+        :type kinds: set
+        :param generation: The current generation of the index.
+        :type generation: int
+        :return: True if the new query can be answered by filtering the candidates of this one.
+        :rtype: bool
+        """
+        if not self.is_complete or not self.words or generation != self.generation or kinds != self.kinds:
+            return False
+
+        # The entries were found through this query's longest word, so the new longest word has to contain it.
+        if max(self.words, key=len) not in max(words, key=len):
+            return False
+        return all(any(word in new_word for new_word in words) for word in self.words)
+
+
+class SearchIndex:
+    """
+    An in-memory index of everything the omni-search can find: open tabs, bookmarks, browsing history, and files.
+
+    Every word of a title or URL is kept in an inverted index that maps the word to the entries containing it. The
+    sorted list of words answers prefix queries with a binary search, and an index of the three letter pieces of every
+    word finds words that contain the query or are spelled almost like it. A query is answered from its most selective
+    word and the other words only filter and rank those entries, so the work done does not grow with the size of the
+    index.
+    """
+
+    # How many new words are inserted into the sorted words one at a time before merging them in is cheaper.
+    MAX_WORD_INSERTS = 64
+
+    def __init__(self, candidate_limit: int = 5000) -> None:
+        """
+        Creates an empty index.
+
+        :param candidate_limit: The most entries a single query looks at before ranking.
+        :type candidate_limit: int
+        """
+        self._candidate_limit = candidate_limit
+
+        # The entries, stored column by column. An entry's position is its id.
+        self._kinds = array("b")
+        self._keys = []
+        self._titles = []
+        self._urls = []
+        self._texts = []  # The lowercase title and URL, for checking the other words of a query.
+        self._weights = array("d")
+        self._ranks = array("d")  # How important each entry is regardless of the query.
+        self._alive = bytearray()
+        self._entry_ids = {}  # Entry ids keyed by (kind, key).
+
+        # The words.
+        self._word_ids = {}
+        self._words = []
+        self._postings = []  # The ids of the entries containing each word, indexed by word id.
+        self._trigrams = {}  # The ids of the words containing each trigram.
+        self._sorted_words = []  # The words in order, for prefix queries.
+        self._unsorted_words = []  # The words added since the sorted words were last brought up to date.
+
+        # Changes every time entries are added or removed, which makes the answers to earlier queries out of date.
+        self._generation = 0
+
+        # Changes every time the index is compacted, which gives the entries new ids.
+        self._epoch = 0
+
+    def __len__(self) -> int:
+        return len(self._entry_ids)
+
+    def get_generation(self) -> int:
+        """
+        Returns a number that changes every time entries are added or removed.
+
+        :return: The generation of the index.
+        :rtype: int
+        """
+        return self._generation
+
+    def get_epoch(self) -> int:
+        """
+        Returns a number that changes every time the index is compacted. Entries are only ever appended or marked as
+        removed in between, so a query that is running can carry on as long as the epoch stays the same.
+
+        :return: The epoch of the index.
+        :rtype: int
+        """
+        return self._epoch
+
+    def add(self, kind: int, key, title: str, url: str, weight: float = 0.0) -> None:
+        """
+        Adds an entry to the index, replacing any entry of the same kind with the same key.
+
+        :param kind: The kind of the entry, like :data:`KIND_TAB`.
+        :type kind: int
+        :param key: Something that identifies the entry among entries of its kind, like a URL or a path.
+        :param title: The title of the entry.
+        :type title: str
+        :param url: The URL or path of the entry.
+        :type url: str
+        :param weight: How important the entry is, like how often and how recently a page was visited.
+        :type weight: float
+        """
+        self.remove(kind, key)
+        self._generation += 1
+
+        entry_id = len(self._keys)
+        self._kinds.append(kind)
+        self._keys.append(key)
+        self._titles.append(title)
+        self._urls.append(url)
+        self._texts.append("{}\n{}".format(title, url).lower())
+        self._weights.append(weight)
+        self._ranks.append(self._get_rank(kind, weight))
+        self._alive.append(1)
+        self._entry_ids[(kind, key)] = entry_id
+
+        for word in set(tokenize(title)).union(tokenize(url)) - _STOP_WORDS:
+            self._postings[self._get_word_id(word)].append(entry_id)
+
+    def remove(self, kind: int, key) -> bool:
+        """
+        Removes an entry from the index.
+
+        :param kind: The kind of the entry.
+        :type kind: int
+        :param key: The key the entry was added with.
+        :return: True if the entry was in the index.
+        :rtype: bool
+        """
+        entry_id = self._entry_ids.pop((kind, key), None)
+        if entry_id is None:
+            return False
+
+        # The entry stays in the postings but is skipped from now on.
+        self._alive[entry_id] = 0
+        self._generation += 1
+        if len(self._keys) > 1024 and len(self._entry_ids) < len(self._keys) // 2:
+            self.compact()
+        return True
+
+    def set_weight(self, kind: int, key, weight: float) -> None:
+        """
+        Changes how important an entry is.
+
+        :param kind: The kind of the entry.
+        :type kind: int
+        :param key: The key the entry was added with.
+        :param weight: The new weight of the entry.
+        :type weight: float
+        """
+        entry_id = self._entry_ids.get((kind, key))
+        if entry_id is not None:
+            self._weights[entry_id] = weight
+            self._ranks[entry_id] = self._get_rank(kind, weight)
+
+    def compact(self) -> None:
+        """
+        Rebuilds the index without the entries that were removed.
+        """
+        entries = [(self._kinds[i], self._keys[i], self._titles[i], self._urls[i], self._weights[i])
+                   for i in sorted(self._entry_ids.values())]
+        generation = self._generation
+        epoch = self._epoch
+        self.__init__(self._candidate_limit)
+        self._generation = generation
+        self._epoch = epoch + 1
+        for entry in entries:
+            self.add(*entry)
+
+    def search(self, query: str, limit: int = 10, kinds: set = None) -> list:
+        """
+        Returns the entries that best match the query. Every word of the query has to match a word of the entry
+        exactly, as a prefix, as part of the word, or, failing those, by being spelled almost the same.
+
+        :param query: What the user typed.
+        :type query: str
+        :param limit: The most results to return.
+        :type limit: int
+        :param kinds: The kinds of entries to return, or None for every kind.
+        :type kinds: set
+        :return: The best :class:`SearchResult`s, best first.
+        :rtype: list
+        """
+        for state in self.iter_search(query, limit, kinds):
+            pass
+        return state.results
+
+    def iter_search(self, query: str, limit: int = 10, kinds: set = None, previous: "SearchState" = None):
+        """
+        Answers a query a slice at a time, like :method:`search()`, so the caller can stop as soon as the answer is
+        no longer wanted. The generator yields None after every slice of work and yields a :class:`SearchState` as its
+        last value.
+
+        When the query only adds letters or words to the previous query of the same kinds, and the index has not
+        changed since, the entries that matched the previous query are filtered instead of being looked up again.
+
+        :param query: What the user typed.
+        :type query: str
+        :param limit: The most results to return.
+        :type limit: int
+        :param kinds: The kinds of entries to return, or None for every kind.
+        :type kinds: set
+        :param previous: The state of the previous query, if any.
+        :type previous: SearchState
+        :return: A generator that ends with the state of this query.
+        """
+        # Entries added while the query runs may be missed, so the answer is only as new as the index it started on.
+        generation = self._generation
+        words = list(dict.fromkeys(word for word in tokenize(query) if word not in _STOP_WORDS))
+        if not words:
+            yield SearchState(words, kinds, generation, {}, True, [])
+            return
+
+        # Answer the query from its longest word, which is likely the one that matches the fewest entries, and only
+        # check that the other words appear in the entries it finds.
+        pivot = max(words, key=len)
+        candidates = None
+        if previous is not None and previous.can_narrow(words, kinds, generation):
+            candidates = yield from self._narrow_candidates(previous.candidates, words, pivot)
+            is_complete = True
+
+            # Entries only spelled like the query are never among the previous ones, so look again for those.
+            if not candidates:
+                candidates = None
+
+        if candidates is None:
+            collected = yield from self._collect_candidates(self._iter_matches(pivot), kinds)
+            others = [word for word in words if word != pivot]
+            candidates = yield from self._filter_candidates(collected, others)
+
+            # A longer query can only be answered from these entries if none were left out and none merely look
+            # like the query. Words shorter than a trigram are only matched as prefixes, which leaves out the entries
+            # that merely contain them.
+            is_complete = (len(pivot) >= 3 and len(collected) < self._candidate_limit and
+                           min(collected.values(), default=_EXACT_MATCH) >= _SUBSTRING_MATCH)
+
+        yield SearchState(words, kinds, generation, candidates, is_complete,
+                          self._rank(candidates, words, limit))
+
+    def _rank(self, candidates: dict, words: list, limit: int) -> list:
+        """
+        Returns the best matching candidates as :class:`SearchResult`s.
+
+        :param candidates: The match quality of each matching entry keyed by entry id.
+        :type candidates: dict
+        :param words: The words of the query.
+        :type words: list
+        :param limit: The most results to return.
+        :type limit: int
+        :return: The best results, best first.
+        :rtype: list
+        """
+        # Rank the candidates by how well they matched and how important they are.
+        # Entries removed while the query ran are left out.
+        ranks = self._ranks
+        alive = self._alive
+        bonus = (len(words) - 1) * _SUBSTRING_MATCH
+        scores = [(quality + bonus + ranks[entry_id], entry_id) for entry_id, quality in candidates.items()
+                  if alive[entry_id]]
+
+        # Matching the title beats matching the URL, which only needs checking for the best few.
+        results = []
+        for score, entry_id in nlargest(limit * 4, scores):
+            title = self._texts[entry_id].partition("\n")[0]
+            score += sum(1.0 for word in words if word in title)
+            results.append(SearchResult(self._kinds[entry_id], self._keys[entry_id], self._titles[entry_id],
+                                        self._urls[entry_id], score))
+        results.sort(key=lambda result: result.score, reverse=True)
+        return results[:limit]
+
+    @staticmethod
+    def _get_rank(kind: int, weight: float) -> float:
+        """
+        Returns how important an entry is regardless of the query.
+
+        :param kind: The kind of the entry.
+        :type kind: int
+        :param weight: The weight of the entry.
+        :type weight: float
+        :return: The rank of the entry.
+        :rtype: float
+        """
+        return KIND_WEIGHTS.get(kind, 0.0) + log1p(max(weight, 0.0))
+
+    def _get_word_id(self, word: str) -> int:
+        """
+        Returns the id of a word, adding the word to the index if it is new.
+
+        :param word: The word.
+        :type word: str
+        :return: The id of the word.
+        :rtype: int
+        """
+        word_id = self._word_ids.get(word)
+        if word_id is None:
+            word_id = len(self._words)
+            self._word_ids[word] = word_id
+            self._words.append(word)
+            self._postings.append(array("I"))
+            for trigram in trigrams(word):
+                self._trigrams.setdefault(trigram, array("I")).append(word_id)
+            self._unsorted_words.append(word)
+        return word_id
+
+    def _sort_words(self) -> None:
+        """
+        Adds the words added since the last query to the sorted words. A few words are inserted in place, and many
+        are sorted on their own and merged in, which the sort does in a single pass over the two sorted runs.
+        """
+        if not self._unsorted_words:
+            return
+        if len(self._unsorted_words) <= self.MAX_WORD_INSERTS:
+            for word in self._unsorted_words:
+                insort(self._sorted_words, word)
+        else:
+            self._unsorted_words.sort()
+            self._sorted_words.extend(self._unsorted_words)
+            self._sorted_words.sort()
+        self._unsorted_words.clear()
+
+    def _iter_matches(self, word: str):
+        """
+        Yields the words of the index that match a word of a query, best matches first, along with how well they
+        match. The slower kinds of matching are only done if the caller asks for more words.
+
+        :param word: The word of the query.
+        :type word: str
+        :return: A generator of (word id, match quality) pairs.
+        """
+        found = set()
+
+        # Words that start with the query word, the word itself and shorter words first.
+        self._sort_words()
+        start = bisect_left(self._sorted_words, word)
+        end = bisect_left(self._sorted_words, word + "\uffff", start)
+        for indexed_word in sorted(self._sorted_words[start:end], key=len):
+            word_id = self._word_ids[indexed_word]
+            found.add(word_id)
+            yield word_id, _EXACT_MATCH if indexed_word == word else _PREFIX_MATCH
+
+        if len(word) < 3:
+            return
+
+        # Words that contain the query word share all of its inner trigrams.
+        inner = trigrams(word) - {" " + word[:2], word[-2:] + " "}
+        postings = sorted((self._trigrams.get(trigram, ()) for trigram in inner), key=len)
+        if postings and postings[0]:
+            for word_id in set(postings[0]).intersection(*postings[1:]):
+                if word_id not in found and word in self._words[word_id]:
+                    found.add(word_id)
+                    yield word_id, _SUBSTRING_MATCH
+
+        # Fall back to words spelled almost the same when nothing else matched.
+        if not found and len(word) >= 4:
+            word_trigrams = trigrams(word)
+            counts = Counter()
+            for trigram in word_trigrams:
+                counts.update(self._trigrams.get(trigram, ()))
+            size = len(word_trigrams)
+            similar = []
+            for word_id, count in counts.items():
+                # A word has as many trigrams as letters, so the union of both sets needs no building.
+                similarity = count / (size + len(self._words[word_id]) - count)
+                if similarity >= 0.3:
+                    similar.append((similarity, word_id))
+            for similarity, word_id in sorted(similar, reverse=True):
+                yield word_id, _FUZZY_MATCH * similarity
+
+    def _collect_candidates(self, matches, kinds: set):
+        """
+        Collects the entries containing the matched words until the candidate limit is reached, yielding None after
+        every slice of work. Since the words come best matches first, an entry's quality is that of the first word it
+        is found through.
+
+        :param matches: The (word id, match quality) pairs from :method:`_iter_matches()`.
+        :param kinds: The kinds of entries to collect, or None for every kind.
+        :type kinds: set
+        :return: A generator that returns the match quality of each entry keyed by entry id.
+        """
+        candidates = {}
+        alive = self._alive
+        entry_kinds = self._kinds
+        for word_id, quality in matches:
+            postings = self._postings[word_id]
+            for start in range(0, len(postings), _SLICE_SIZE):
+                for entry_id in postings[start:start + _SLICE_SIZE]:
+                    if entry_id in candidates or not alive[entry_id]:
+                        continue
+                    if kinds is not None and entry_kinds[entry_id] not in kinds:
+                        continue
+                    candidates[entry_id] = quality
+                    if len(candidates) >= self._candidate_limit:
+                        return candidates
+                yield
+        return candidates
+
+    def _narrow_candidates(self, candidates: dict, words: list, pivot: str):
+        """
+        Filters the candidates of an earlier query down to the entries that match a longer one, yielding None after
+        every slice of work. The match quality of each remaining entry is worked out again for the new longest word,
+        so the entries rank as they would if the query was answered from scratch.
+
+        :param candidates: The match quality of each entry that matched the earlier query keyed by entry id.
+        :type candidates: dict
+        :param words: The words of the new query, which every entry must contain.
+        :type words: list
+        :param pivot: The longest word of the new query, which the entries are found through.
+        :type pivot: str
+        :return: A generator that returns the match quality of each remaining entry keyed by entry id.
+        """
+        alive = self._alive
+        texts = self._texts
+        items = list(candidates)
+        narrowed = {}
+        for start in range(0, len(items), _SLICE_SIZE):
+            for entry_id in items[start:start + _SLICE_SIZE]:
+                text = texts[entry_id]
+                if not alive[entry_id] or not all(word in text for word in words):
+                    continue
+
+                # The quality is that of the best indexed word of the entry that contains the longest word.
+                quality = 0.0
+                for word in tokenize(text):
+                    if word == pivot:
+                        quality = _EXACT_MATCH
+                        break
+                    if pivot in word and word not in _STOP_WORDS:
+                        quality = max(quality, _PREFIX_MATCH if word.startswith(pivot) else _SUBSTRING_MATCH)
+                if quality:
+                    narrowed[entry_id] = quality
+            yield
+        return narrowed
+
+    def _filter_candidates(self, candidates: dict, words: list):
+        """
+        Filters out the candidates that were removed from the index or do not contain every one of the given words,
+        yielding None after every slice of work.
+
+        :param candidates: The match quality of each entry keyed by entry id.
+        :type candidates: dict
+        :param words: The words every entry must contain.
+        :type words: list
+        :return: A generator that returns the match quality of each remaining entry keyed by entry id.
+        """
+        if not words:
+            return candidates
+
+        alive = self._alive
+        texts = self._texts
+        items = list(candidates.items())
+        filtered = {}
+        for start in range(0, len(items), _SLICE_SIZE):
+            for entry_id, quality in items[start:start + _SLICE_SIZE]:
+                if alive[entry_id]:
+                    text = texts[entry_id]
+                    for word in words:
+                        if word not in text:
+                            break
+                    else:
+                        filtered[entry_id] = quality
+            yield
+        return filtered
@@ -0,0 +1,783 @@
+from array import array
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from errno import ENOSPC
+from logging import getLogger
+from mmap import mmap, ACCESS_READ
+from os import scandir, stat, replace, cpu_count, fsencode, fsdecode
+from os.path import join, basename
+from struct import Struct
+from threading import Thread, Event
+from time import time, monotonic, perf_counter
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+from orchid.search import SearchIndex, KIND_FILE
+from orchid.search.inotify import Inotify, is_supported, IN_CREATE, IN_DELETE, IN_MOVED_FROM, IN_MOVED_TO, \
+    IN_DELETE_SELF, IN_ONLYDIR, IN_DONT_FOLLOW, IN_EXCL_UNLINK, IN_Q_OVERFLOW, IN_IGNORED, IN_ISDIR
+
+
+# The kinds of file changes.
+FILE_ADDED = 0
+FILE_REMOVED = 1
+
+# Folders that hold many files nobody searches for.
+EXCLUDED_NAMES = {"node_modules", "__pycache__", "site-packages"}
+
+# What happens in a watched folder that changes the index.
+_WATCH_MASK = (IN_CREATE | IN_DELETE | IN_MOVED_FROM | IN_MOVED_TO | IN_DELETE_SELF | IN_ONLYDIR | IN_DONT_FOLLOW |
+               IN_EXCL_UNLINK)
+
+
+def is_excluded(name: str) -> bool:
+    """
+    Returns whether a file or folder with the given name is left out of the index. Hidden files and folders are left
+    out, and so are folders that hold many files nobody searches for.
+
+    :param name: The name of the file or folder.
+    :type name: str
+    :return: True if the file or folder is not indexed.
+    :rtype: bool
+    """
+    return name.startswith(".") or name in EXCLUDED_NAMES
+
+
+class FileIndex:
+    """
+    A compact table of every file and folder under a root folder. Each entry takes four ints in a single array: the id
+    of its parent folder, where its name starts in a shared buffer of names, how long the name is, and its flags. An
+    entry's position in the array is its id, the root folder is entry 0, and removed entries are only flagged.
+
+    The index is saved as a header followed by the two buffers, so loading it is a memory map and two copies with
+    nothing to parse per entry.
+    """
+
+    # The header of a saved index: magic, version, entry count, size of the names, and when it was saved.
+    _HEADER = Struct("<4sIIId")
+    _MAGIC = b"OFIX"
+    _VERSION = 1
+
+    # The fields of an entry and its flags.
+    _FIELDS = 4
+    _IS_DIR = 1
+    _IS_REMOVED = 2
+
+    def __init__(self, root: str) -> None:
+        """
+        Creates an index with only the root folder in it.
+
+        :param root: The absolute path of the root folder.
+        :type root: str
+        """
+        self._records = array("i")
+        self._names = bytearray()
+        self._children = {0: {}}  # The ids of the entries in each folder keyed by name, keyed by folder id.
+        self._dir_paths = {}  # The paths of folders keyed by id, filled in as they are asked for.
+        self._count = 0
+        self.saved_at = 0.0
+        self._append(-1, root, True)
+
+    def __len__(self) -> int:
+        return self._count
+
+    @classmethod
+    def load(cls, path: str, root: str):
+        """
+        Loads a saved index.
+
+        :param path: The file the index was saved to.
+        :type path: str
+        :param root: The root folder the index must be of.
+        :type root: str
+        :return: The index, or None if there is no usable index in the file.
+        :rtype: FileIndex
+        """
+        try:
+            with open(path, "rb") as file, mmap(file.fileno(), 0, access=ACCESS_READ) as mapped:
+                magic, version, count, names_size, saved_at = cls._HEADER.unpack_from(mapped)
+                records_size = count * cls._FIELDS * 4
+                if magic != cls._MAGIC or version != cls._VERSION or \
+                        len(mapped) != cls._HEADER.size + records_size + names_size:
+                    return None
+
+                index = cls.__new__(cls)
+                index._records = array("i")
+                with memoryview(mapped) as view:
+                    index._records.frombytes(view[cls._HEADER.size:cls._HEADER.size + records_size])
+                    index._names = bytearray(view[cls._HEADER.size + records_size:])
+        except (OSError, ValueError):
+            return None
+
+        index._dir_paths = {}
+        index.saved_at = saved_at
+        index._rebuild_children()
+        if index.get_path(0) != root:
+            return None
+        return index
+
+    def save(self, path: str) -> None:
+        """
+        Saves the index. The index is written next to the file and then moved over it, so a crash never leaves a
+        half written index behind.
+
+        :param path: The file to save the index to.
+        :type path: str
+        """
+        self.saved_at = time()
+        temporary_path = path + ".tmp"
+        with open(temporary_path, "wb") as file:
+            file.write(self._HEADER.pack(self._MAGIC, self._VERSION, len(self._records) // self._FIELDS,
+                                         len(self._names), self.saved_at))
+            file.write(self._records.tobytes())
+            file.write(self._names)
+        replace(temporary_path, path)
+
+    def add(self, parent_id: int, name: str, is_dir: bool) -> tuple:
+        """
+        Adds a file or folder to the index, unless the folder already has an entry with that name.
+
+        :param parent_id: The id of the folder the entry is in.
+        :type parent_id: int
+        :param name: The name of the file or folder.
+        :type name: str
+        :param is_dir: Whether the entry is a folder.
+        :type is_dir: bool
+        :return: The id of the entry and whether it is new.
+        :rtype: tuple
+        """
+        entry_id = self.find(parent_id, name)
+        if entry_id >= 0:
+            if self.is_dir(entry_id) == is_dir:
+                return entry_id, False
+            self.remove(entry_id)  # A file was replaced by a folder of the same name or the other way around.
+        return self._append(parent_id, name, is_dir), True
+
+    def remove(self, entry_id: int) -> list:
+        """
+        Removes an entry and, if it is a folder, everything in it.
+
+        :param entry_id: The id of the entry.
+        :type entry_id: int
+        :return: The ids of the removed entries, folders before what is in them.
+        :rtype: list
+        """
+        records = self._records
+        parent_id = records[entry_id * self._FIELDS]
+        self._children.get(parent_id, {}).pop(self.get_name(entry_id), None)
+
+        removed = []
+        stack = [entry_id]
+        while stack:
+            removed_id = stack.pop()
+            removed.append(removed_id)
+            records[removed_id * self._FIELDS + 3] |= self._IS_REMOVED
+            self._dir_paths.pop(removed_id, None)
+            stack.extend(self._children.pop(removed_id, {}).values())
+        self._count -= len(removed)
+        return removed
+
+    def find(self, parent_id: int, name: str) -> int:
+        """
+        Returns the id of the entry with the given name in a folder.
+
+        :param parent_id: The id of the folder.
+        :type parent_id: int
+        :param name: The name of the entry.
+        :type name: str
+        :return: The id of the entry, or -1 if there is none.
+        :rtype: int
+        """
+        return self._children.get(parent_id, {}).get(name, -1)
+
+    def get_children(self, dir_id: int) -> dict:
+        """
+        Returns the entries in a folder.
+
+        :param dir_id: The id of the folder.
+        :type dir_id: int
+        :return: The ids of the entries keyed by name.
+        :rtype: dict
+        """
+        return self._children.get(dir_id, {})
+
+    def get_name(self, entry_id: int) -> str:
+        """
+        Returns the name of an entry.
+
+        :param entry_id: The id of the entry.
+        :type entry_id: int
+        :return: The name of the file or folder.
+        :rtype: str
+        """
+        offset = self._records[entry_id * self._FIELDS + 1]
+        return fsdecode(bytes(self._names[offset:offset + self._records[entry_id * self._FIELDS + 2]]))
+
+    def get_path(self, entry_id: int) -> str:
+        """
+        Returns the absolute path of an entry.
+
+        :param entry_id: The id of the entry.
+        :type entry_id: int
+        :return: The path of the file or folder.
+        :rtype: str
+        """
+        if entry_id == 0:
+            return self.get_name(0)
+        path = self._dir_paths.get(entry_id)
+        if path is None:
+            path = join(self.get_path(self._records[entry_id * self._FIELDS]), self.get_name(entry_id))
+            if self.is_dir(entry_id):
+                self._dir_paths[entry_id] = path
+        return path
+
+    def is_dir(self, entry_id: int) -> bool:
+        """
+        Returns whether an entry is a folder.
+
+        :param entry_id: The id of the entry.
+        :type entry_id: int
+        :return: True if the entry is a folder.
+        :rtype: bool
+        """
+        return bool(self._records[entry_id * self._FIELDS + 3] & self._IS_DIR)
+
+    def is_removed(self, entry_id: int) -> bool:
+        """
+        Returns whether an entry was removed.
+
+        :param entry_id: The id of the entry.
+        :type entry_id: int
+        :return: True if the entry was removed.
+        :rtype: bool
+        """
+        return bool(self._records[entry_id * self._FIELDS + 3] & self._IS_REMOVED)
+
+    def iter_entries(self, dirs_only: bool = False):
+        """
+        Yields the id of every entry that was not removed, folders before what is in them.
+
+        :param dirs_only: Whether to only yield folders.
+        :type dirs_only: bool
+        :return: A generator of entry ids.
+        """
+        records = self._records
+        for entry_id in range(len(records) // self._FIELDS):
+            flags = records[entry_id * self._FIELDS + 3]
+            if not flags & self._IS_REMOVED and (flags & self._IS_DIR or not dirs_only):
+                yield entry_id
+
+    def _append(self, parent_id: int, name: str, is_dir: bool) -> int:
+        """
+        Adds an entry to the end of the table.
+
+        :param parent_id: The id of the folder the entry is in.
+        :type parent_id: int
+        :param name: The name of the file or folder.
+        :type name: str
+        :param is_dir: Whether the entry is a folder.
+        :type is_dir: bool
+        :return: The id of the entry.
+        :rtype: int
+        """
+        entry_id = len(self._records) // self._FIELDS
+        encoded = fsencode(name)
+        self._records.extend((parent_id, len(self._names), len(encoded), self._IS_DIR if is_dir else 0))
+        self._names += encoded
+        if parent_id >= 0:
+            self._children.setdefault(parent_id, {})[name] = entry_id
+        if is_dir:
+            self._children.setdefault(entry_id, {})
+        self._count += 1
+        return entry_id
+
+    def _rebuild_children(self) -> None:
+        """
+        Rebuilds the lookup of the entries in each folder after loading, dropping removed entries for good when they
+        make up most of the table.
+        """
+        if self._count_removed() > len(self._records) // self._FIELDS // 2:
+            self._compact()
+
+        self._children = {}
+        self._count = 0
+        for entry_id in self.iter_entries():
+            parent_id = self._records[entry_id * self._FIELDS]
+            if parent_id >= 0:
+                self._children.setdefault(parent_id, {})[self.get_name(entry_id)] = entry_id
+            if self.is_dir(entry_id):
+                self._children.setdefault(entry_id, {})
+            self._count += 1
+
+    def _count_removed(self) -> int:
+        """
+        Counts the entries that were removed.
+
+        :return: The number of removed entries.
+        :rtype: int
+        """
+        flags = self._records[3::self._FIELDS]
+        return sum(1 for flag in flags if flag & self._IS_REMOVED)
+
+    def _compact(self) -> None:
+        """
+        Rewrites the table without the removed entries, giving the remaining entries new ids. Since folders are
+        always added before what is in them, every parent gets its new id before its children need it.
+        """
+        records = self._records
+        names = self._names
+        new_ids = array("i", [-1]) * (len(records) // self._FIELDS)
+        self._records = array("i")
+        self._names = bytearray()
+        for entry_id in range(len(records) // self._FIELDS):
+            parent_id, offset, length, flags = records[entry_id * self._FIELDS:(entry_id + 1) * self._FIELDS]
+            if not flags & self._IS_REMOVED:
+                new_ids[entry_id] = len(self._records) // self._FIELDS
+                self._records.extend((new_ids[parent_id] if parent_id >= 0 else -1, len(self._names), length, flags))
+                self._names += names[offset:offset + length]
+
+
+class FileIndexer(QObject):
+    """
+    Keeps a :class:`FileIndex` of everything under a folder up to date from a background thread, and feeds the files
+    and folders it finds to a :class:`SearchIndex`.
+
+    The first time, the folder is scanned with a pool of threads that each read one folder at a time. Each folder is
+    watched with inotify before it is read, so nothing created during the scan is missed, and from then on the index
+    only changes by the events inotify sends. The index is saved under `~/.orchid` and loaded with a memory map on
+    the next start; only the folders that changed while orchid was not running are read again.
+
+    Changes reach the GUI thread through a queue, like the window manager's :class:`EventBridge`, and are applied to
+    the search index a few milliseconds at a time so a large first scan never stalls the GUI.
+    """
+
+    # Class signals.
+    signal_ready = pyqtSignal()
+
+    # How often the index is saved while it changes, in seconds.
+    SAVE_INTERVAL = 300
+
+    # How long changes may be applied to the search index before letting the event loop run.
+    SLICE_TIME = 0.008
+
+    def __init__(self, index_file: str, root: str, parent: QObject = None) -> None:
+        """
+        Creates the indexer. Nothing is read until :method:`start()` is called.
+
+        :param index_file: The file the index is saved to.
+        :type index_file: str
+        :param root: The absolute path of the folder to index.
+        :type root: str
+        :param parent: An optional parent object for this indexer.
+        :type parent: QObject
+        """
+        super().__init__(parent)
+        self._logger = getLogger(__name__)
+        self._index_file = index_file
+        self._root = root
+        self._thread = None
+        self._stopping = Event()
+
+        # Changes waiting for the GUI thread, as (kind, paths) batches.
+        self._queue = deque()
+        self._is_signalled = False
+
+        # Changes being applied to the search index, and how far into the first batch they are.
+        self._search_index = None
+        self._pending = deque()
+        self._pending_position = 0
+        self._slice_timer = QTimer(self)
+        self._slice_timer.setInterval(0)
+        self._slice_timer.timeout.connect(self._on_slice_timeout)
+        self.signal_ready.connect(self._on_changes_ready)
+
+        # State of the indexer thread.
+        self._index = None
+        self._inotify = None
+        self._watches = {}  # The id of each watched folder keyed by watch descriptor.
+        self._watched_dirs = {}  # The watch descriptor of each watched folder keyed by id.
+        self._early_events = {}  # Events of folders whose read is not applied yet, keyed by watch descriptor.
+        self._to_scan = deque()  # (folder id, whether to read its subfolders too) pairs waiting to be read.
+        self._is_dirty = False
+        self._is_out_of_watches = False
+
+    def set_search_index(self, search_index: SearchIndex) -> None:
+        """
+        Sets the :class:`SearchIndex` the files and folders are fed to.
+
+        :param search_index: The index to feed.
+        :type search_index: SearchIndex
+        """
+        self._search_index = search_index
+
+    def start(self) -> None:
+        """
+        Starts indexing in a background thread.
+        """
+        if self._thread is None:
+            self._stopping.clear()
+            self._thread = Thread(target=self._run, name="orchid-file-indexer", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        """
+        Stops indexing and waits for the index to be saved.
+        """
+        if self._thread is not None:
+            self._stopping.set()
+            self._thread.join()
+            self._thread = None
+        self._slice_timer.stop()
+
+    def drain(self) -> list:
+        """
+        Takes every batch of changes out of the queue. Called from the GUI thread in response to
+        :attr:`signal_ready`.
+
+        :return: The (kind, paths) batches in the order they happened, where the kind is like :data:`FILE_ADDED`.
+        :rtype: list
+        """
+        # Clear the flag before draining so a batch pushed during the drain signals again rather than being missed.
+        self._is_signalled = False
+        batches = []
+        while self._queue:
+            batches.append(self._queue.popleft())
+        return batches
+
+    def _on_changes_ready(self) -> None:
+        """
+        Starts applying the queued changes to the search index.
+        """
+        self._pending.extend(self.drain())
+        if self._search_index is not None and self._pending:
+            self._slice_timer.start()
+
+    def _on_slice_timeout(self) -> None:
+        """
+        Applies the queued changes to the search index for a slice of time.
+        """
+        deadline = perf_counter() + self.SLICE_TIME
+        search_index = self._search_index
+        while self._pending:
+            kind, paths = self._pending[0]
+            for i in range(self._pending_position, len(paths)):
+                path = paths[i]
+                if kind == FILE_ADDED:
+                    search_index.add(KIND_FILE, path, basename(path), path)
+                else:
+                    search_index.remove(KIND_FILE, path)
+                if i % 64 == 63 and perf_counter() >= deadline:
+                    self._pending_position = i + 1
+                    return
+            self._pending.popleft()
+            self._pending_position = 0
+        self._slice_timer.stop()
+
+    def _push(self, kind: int, paths: list) -> None:
+        """
+        Queues a batch of changes for the GUI thread. Called from the indexer thread.
+
+        :param kind: The kind of the changes, like :data:`FILE_ADDED`.
+        :type kind: int
+        :param paths: The paths of the changed files and folders.
+        :type paths: list
+        """
+        if not paths:
+            return
+        self._queue.append((kind, paths))
+        if not self._is_signalled:
+            self._is_signalled = True
+            self.signal_ready.emit()
+
+    def _run(self) -> None:
+        """
+        Loads or builds the index and then keeps it up to date until the indexer is stopped. Runs in the indexer
+        thread.
+        """
+        start = perf_counter()
+        if is_supported():
+            try:
+                self._inotify = Inotify()
+            except OSError as error:
+                self._logger.warning("Files will not be watched for changes: {}".format(error))
+
+        with ThreadPoolExecutor(min(8, (cpu_count() or 1) * 2), "orchid-file-scanner") as pool:
+            self._index = FileIndex.load(self._index_file, self._root)
+            if self._index is not None:
+                self._logger.debug("Loaded {} indexed files in {:.2f} s".format(len(self._index),
+                                                                              perf_counter() - start))
+                self._push(FILE_ADDED, [self._index.get_path(entry_id) for entry_id in self._index.iter_entries()
+                                        if entry_id > 0])
+                self._watch_indexed_dirs(pool)
+            else:
+                self._index = FileIndex(self._root)
+                self._to_scan.append((0, True))
+                self._is_dirty = True
+
+            futures = {}
+            saved_at = monotonic()
+            while not self._stopping.is_set():
+                while self._to_scan:
+                    dir_id, is_recursive = self._to_scan.popleft()
+                    if not self._index.is_removed(dir_id):
+                        future = pool.submit(self._read_dir, self._index.get_path(dir_id))
+                        futures[future] = (dir_id, is_recursive)
+
+                if futures:
+                    done, _ = wait(futures, timeout=0.05, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        dir_id, is_recursive = futures.pop(future)
+                        self._apply_scan(dir_id, is_recursive, *future.result())
+                    if not futures and not self._to_scan:
+                        self._early_events.clear()  # No read is waiting for these any more.
+                    if not futures and not self._to_scan and start is not None:
+                        self._logger.debug("Indexed {} files in {:.2f} s".format(len(self._index),
+                                                                               perf_counter() - start))
+                        start = None
+
+                is_busy = bool(futures or self._to_scan)
+                if self._inotify is not None:
+                    self._apply_events(self._inotify.read_events(0 if is_busy else 1.0))
+                elif not is_busy:
+                    self._stopping.wait(1.0)
+
+                if self._is_dirty and not futures and monotonic() - saved_at >= self.SAVE_INTERVAL:
+                    self._save()
+                    saved_at = monotonic()
+
+            for future in futures:
+                future.cancel()
+
+        if self._is_dirty:
+            self._save()
+        if self._inotify is not None:
+            self._inotify.close()
+
+    def _save(self) -> None:
+        """
+        Saves the index, logging instead of failing if it cannot be written.
+        """
+        try:
+            self._index.save(self._index_file)
+            self._is_dirty = False
+        except OSError as error:
+            self._logger.warning("Could not save the file index: {}".format(error))
+
+    def _watch(self, path: str) -> int:
+        """
+        Starts watching a folder. Called from the scanner threads.
+
+        :param path: The path of the folder.
+        :type path: str
+        :return: The watch descriptor, or -1 if the folder is not watched.
+        :rtype: int
+        """
+        if self._inotify is None or self._is_out_of_watches:
+            return -1
+        try:
+            return self._inotify.add_watch(path, _WATCH_MASK)
+        except OSError as error:
+            if error.errno == ENOSPC:
+                self._is_out_of_watches = True
+                self._logger.warning("Ran out of inotify watches; raise fs.inotify.max_user_watches to watch every "
+                                     "folder")
+            return -1
+
+    def _read_dir(self, path: str) -> tuple:
+        """
+        Watches a folder and then reads what is in it. Called from the scanner threads.
+
+        :param path: The path of the folder.
+        :type path: str
+        :return: The watch descriptor of the folder and the (name, is folder) pairs of what is in it.
+        :rtype: tuple
+        """
+        wd = self._watch(path)
+        entries = []
+        try:
+            with scandir(path) as iterator:
+                for entry in iterator:
+                    if not is_excluded(entry.name):
+                        try:
+                            entries.append((entry.name, entry.is_dir(follow_symlinks=False)))
+                        except OSError:
+                            pass
+        except OSError:
+            pass
+        return wd, entries
+
+    def _watch_dirs(self, dirs: list, saved_at: float) -> list:
+        """
+        Watches folders that are already indexed and checks whether they changed since the index was saved. Called
+        from the scanner threads.
+
+        :param dirs: The (id, path) pairs of the folders.
+        :type dirs: list
+        :param saved_at: When the index was saved.
+        :type saved_at: float
+        :return: The (id, watch descriptor, whether it changed) of each folder.
+        :rtype: list
+        """
+        results = []
+        for dir_id, path in dirs:
+            wd = self._watch(path)
+            try:
+                is_changed = stat(path).st_mtime >= saved_at
+            except OSError:
+                is_changed = True
+            results.append((dir_id, wd, is_changed))
+        return results
+
+    def _watch_indexed_dirs(self, pool: ThreadPoolExecutor) -> None:
+        """
+        Watches every folder of a loaded index and queues the folders that changed since it was saved to be read
+        again, without walking the disk.
+
+        :param pool: The pool of scanner threads.
+        :type pool: ThreadPoolExecutor
+        """
+        dirs = [(dir_id, self._index.get_path(dir_id)) for dir_id in self._index.iter_entries(dirs_only=True)]
+        chunks = [dirs[i:i + 256] for i in range(0, len(dirs), 256)]
+        for results in pool.map(self._watch_dirs, chunks, [self._index.saved_at] * len(chunks)):
+            for dir_id, wd, is_changed in results:
+                self._add_watch(dir_id, wd)
+                if is_changed:
+                    self._to_scan.append((dir_id, False))
+
+    def _add_watch(self, dir_id: int, wd: int) -> None:
+        """
+        Remembers which folder a watch descriptor belongs to.
+
+        :param dir_id: The id of the folder.
+        :type dir_id: int
+        :param wd: The watch descriptor, or -1 if the folder is not watched.
+        :type wd: int
+        """
+        if wd >= 0:
+            self._watches[wd] = dir_id
+            self._watched_dirs[dir_id] = wd
+
+    def _apply_scan(self, dir_id: int, is_recursive: bool, wd: int, entries: list) -> None:
+        """
+        Brings the index of a folder in line with what was read from it.
+
+        :param dir_id: The id of the folder.
+        :type dir_id: int
+        :param is_recursive: Whether to read the subfolders that were already indexed too.
+        :type is_recursive: bool
+        :param wd: The watch descriptor of the folder.
+        :type wd: int
+        :param entries: The (name, is folder) pairs of what is in the folder.
+        :type entries: list
+        """
+        early_events = self._early_events.pop(wd, None)
+        if self._index.is_removed(dir_id):
+            return
+        self._add_watch(dir_id, wd)
+
+        index = self._index
+        names = set()
+        added = []
+        for name, is_dir in entries:
+            names.add(name)
+            entry_id, is_new = self._add(dir_id, name, is_dir)
+            if is_new:
+                added.append(index.get_path(entry_id))
+            if is_dir and (is_new or is_recursive):
+                self._to_scan.append((entry_id, True))
+
+        # Anything indexed that is gone from the folder was removed while nobody was watching.
+        for name in set(index.get_children(dir_id)) - names:
+            self._remove(index.find(dir_id, name))
+
+        if added:
+            self._is_dirty = True
+            self._push(FILE_ADDED, added)
+
+        # The folder was watched before it was read, so apply what changed in it since, in order.
+        if early_events:
+            self._apply_events(early_events)
+
+    def _apply_events(self, events: list) -> None:
+        """
+        Updates the index with the events inotify sent.
+
+        :param events: The (watch descriptor, mask, cookie, name) of each event.
+        :type events: list
+        """
+        index = self._index
+        added = []
+        for wd, mask, cookie, name in events:
+            if mask & IN_Q_OVERFLOW:
+                # Events were lost, so read every folder again.
+                self._logger.warning("Missed file changes; reading every folder again")
+                self._to_scan.append((0, True))
+                continue
+
+            dir_id = self._watches.get(wd)
+            if dir_id is None:
+                # The folder is being read for the first time, so keep its events until the read is applied. A watch
+                # that is gone sends nothing after its ignored event.
+                if mask & IN_IGNORED:
+                    self._early_events.pop(wd, None)
+                else:
+                    self._early_events.setdefault(wd, []).append((wd, mask, cookie, name))
+                continue
+            if mask & IN_IGNORED:
+                self._watches.pop(wd, None)
+                self._watched_dirs.pop(dir_id, None)
+                continue
+            if not name or is_excluded(name) or index.is_removed(dir_id):
+                continue
+
+            if mask & (IN_CREATE | IN_MOVED_TO):
+                entry_id, is_new = self._add(dir_id, name, bool(mask & IN_ISDIR))
+                if is_new:
+                    added.append(index.get_path(entry_id))
+                    if index.is_dir(entry_id):
+                        self._to_scan.append((entry_id, True))
+            elif mask & (IN_DELETE | IN_MOVED_FROM):
+                # Keep the order of the changes, since a file can be removed and added again in one batch.
+                self._push(FILE_ADDED, added)
+                added = []
+                self._remove(index.find(dir_id, name))
+
+        if added:
+            self._is_dirty = True
+            self._push(FILE_ADDED, added)
+
+    def _add(self, dir_id: int, name: str, is_dir: bool) -> tuple:
+        """
+        Adds a file or folder to the index, first removing an entry of the other kind with the same name.
+
+        :param dir_id: The id of the folder the entry is in.
+        :type dir_id: int
+        :param name: The name of the file or folder.
+        :type name: str
+        :param is_dir: Whether the entry is a folder.
+        :type is_dir: bool
+        :return: The id of the entry and whether it is new.
+        :rtype: tuple
+        """
+        entry_id = self._index.find(dir_id, name)
+        if entry_id >= 0 and self._index.is_dir(entry_id) != is_dir:
+            self._remove(entry_id)
+        return self._index.add(dir_id, name, is_dir)
+
+    def _remove(self, entry_id: int) -> None:
+        """
+        Removes an entry and everything in it from the index, and stops watching the folders among them.
+
+        :param entry_id: The id of the entry, or -1 to do nothing.
+        :type entry_id: int
+        """
+        if entry_id < 0:
+            return
+
+        removed = self._index.remove(entry_id)
+        for removed_id in removed:
+            wd = self._watched_dirs.pop(removed_id, None)
+            if wd is not None:
+                # A folder that was moved away is still watched where it went.
+                self._watches.pop(wd, None)
+                self._inotify.remove_watch(wd)
+
+        self._is_dirty = True
+        self._push(FILE_REMOVED, [self._index.get_path(removed_id) for removed_id in removed])
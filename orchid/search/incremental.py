@@ -0,0 +1,118 @@
+from time import monotonic, perf_counter
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+from orchid.search import SearchIndex
+
+
+class IncrementalSearch(QObject):
+    """
+    Answers the query in the search bar while the user types. A query only starts once the user pauses for about as
+    long as they usually take between keys, runs a few milliseconds at a time between events, and is abandoned as soon
+    as another key is pressed. A query that only adds to the one before it narrows down that query's entries instead
+    of searching the whole index again.
+    """
+
+    # Class signals.
+    signal_results_ready = pyqtSignal(list)
+
+    # The longest the user is waited on before searching, and the longest gap between keys counted as typing.
+    MAX_DELAY = 0.15
+    MAX_KEY_INTERVAL = 0.5
+
+    # How long a query may run before letting the event loop handle the next key.
+    SLICE_TIME = 0.004
+
+    def __init__(self, search_index: SearchIndex, limit: int = 10, parent: QObject = None) -> None:
+        """
+        Creates the search.
+
+        :param search_index: The index to search.
+        :type search_index: SearchIndex
+        :param limit: The most results to find for each query.
+        :type limit: int
+        :param parent: An optional parent object for this search.
+        :type parent: QObject
+        """
+        super().__init__(parent)
+        self._index = search_index
+        self._limit = limit
+        self._query = ""
+        self._state = None  # What the last finished query found.
+        self._job = None
+        self._job_epoch = 0  # The epoch of the index the running query started from.
+
+        # Start with a brisk typist and learn the user's pace from their keystrokes.
+        self._key_interval = 0.05
+        self._last_key_time = None
+
+        self._delay_timer = QTimer(self)
+        self._delay_timer.setSingleShot(True)
+        self._delay_timer.timeout.connect(self._on_delay_timeout)
+
+        self._step_timer = QTimer(self)
+        self._step_timer.setInterval(0)
+        self._step_timer.timeout.connect(self._on_step_timeout)
+
+    def set_query(self, query: str) -> None:
+        """
+        Searches for the given query once the user stops typing, abandoning the query before it.
+
+        :param query: What the user typed.
+        :type query: str
+        """
+        now = monotonic()
+        if self._last_key_time is not None and now - self._last_key_time < self.MAX_KEY_INTERVAL:
+            self._key_interval = 0.7 * self._key_interval + 0.3 * (now - self._last_key_time)
+        self._last_key_time = now
+
+        self.cancel()
+        self._query = query
+        self._delay_timer.start(int(min(self._key_interval, self.MAX_DELAY) * 1000))
+
+    def get_query(self) -> str:
+        """
+        Returns the query that was last set.
+
+        :return: The query.
+        :rtype: str
+        """
+        return self._query
+
+    def cancel(self) -> None:
+        """
+        Abandons the query that is waiting or running, if any.
+        """
+        self._delay_timer.stop()
+        self._step_timer.stop()
+        if self._job is not None:
+            self._job.close()
+            self._job = None
+
+    def _on_delay_timeout(self) -> None:
+        """
+        Starts the query now that the user paused.
+        """
+        self._job = self._index.iter_search(self._query, self._limit, previous=self._state)
+        self._job_epoch = self._index.get_epoch()
+        self._step_timer.start()
+
+    def _on_step_timeout(self) -> None:
+        """
+        Runs the query for a slice of time, and sends its results if it finished.
+        """
+        # The index was compacted under the query, so the entry ids it is going through are gone. Start over. Entries
+        # added in the background are only appended, so they leave the query alone.
+        if self._index.get_epoch() != self._job_epoch:
+            self._job.close()
+            self._job = self._index.iter_search(self._query, self._limit)
+            self._job_epoch = self._index.get_epoch()
+
+        deadline = perf_counter() + self.SLICE_TIME
+        for state in self._job:
+            if state is not None:
+                self._step_timer.stop()
+                self._job = None
+                self._state = state
+                self.signal_results_ready.emit(state.results)
+                return
+            if perf_counter() >= deadline:
+                return
@@ -0,0 +1,154 @@
+from ctypes import CDLL, get_errno, c_int, c_char_p, c_uint32
+from ctypes.util import find_library
+from os import read, close, strerror, fsencode, fsdecode
+from select import select
+from struct import Struct
+
+
+# Events that can be watched for.
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+
+# Flags of the events that are read.
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+
+# Flags of the watches that are added.
+IN_ONLYDIR = 0x01000000
+IN_DONT_FOLLOW = 0x02000000
+IN_EXCL_UNLINK = 0x04000000
+
+# Flags of the inotify instance.
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+# The fixed size part of each event read from the inotify file descriptor: wd, mask, cookie and name length.
+_EVENT_HEADER = Struct("iIII")
+
+
+def _load_libc():
+    """
+    Loads the C library if it has the inotify functions.
+
+    :return: The library or None if inotify is not available.
+    """
+    name = find_library("c")
+    if name is None:
+        return None
+    try:
+        libc = CDLL(name, use_errno=True)
+        libc.inotify_init1.argtypes = [c_int]
+        libc.inotify_add_watch.argtypes = [c_int, c_char_p, c_uint32]
+        libc.inotify_rm_watch.argtypes = [c_int, c_int]
+    except (OSError, AttributeError):
+        return None
+    return libc
+
+
+_libc = _load_libc()
+
+
+def is_supported() -> bool:
+    """
+    Returns whether this system supports inotify.
+
+    :return: True if :class:`Inotify` can be used.
+    :rtype: bool
+    """
+    return _libc is not None
+
+
+class Inotify:
+    """
+    A thin wrapper around the Linux inotify API, which tells about changes to watched directories without polling.
+    """
+
+    def __init__(self) -> None:
+        """
+        Creates a new inotify instance.
+
+        :raises OSError: If inotify is not available or the instance cannot be created.
+        """
+        if _libc is None:
+            raise OSError("inotify is not supported on this system")
+        self._fd = _libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            errno = get_errno()
+            raise OSError(errno, strerror(errno))
+
+    def fileno(self) -> int:
+        """
+        Returns the file descriptor of the instance.
+
+        :return: The file descriptor.
+        :rtype: int
+        """
+        return self._fd
+
+    def add_watch(self, path: str, mask: int) -> int:
+        """
+        Starts watching a path. Watching a path that is already watched replaces the events watched for.
+
+        :param path: The path to watch.
+        :type path: str
+        :param mask: The events to watch for, like :data:`IN_CREATE`.
+        :type mask: int
+        :return: The watch descriptor of the path.
+        :rtype: int
+        :raises OSError: If the path cannot be watched, which includes running out of watches.
+        """
+        wd = _libc.inotify_add_watch(self._fd, fsencode(path), mask)
+        if wd < 0:
+            errno = get_errno()
+            raise OSError(errno, strerror(errno), path)
+        return wd
+
+    def remove_watch(self, wd: int) -> None:
+        """
+        Stops watching the path with the given watch descriptor.
+
+        :param wd: The watch descriptor.
+        :type wd: int
+        """
+        _libc.inotify_rm_watch(self._fd, wd)
+
+    def read_events(self, timeout: float = None) -> list:
+        """
+        Reads the events that happened since the last read, waiting for one if there are none.
+
+        :param timeout: The most seconds to wait, or None to wait forever.
+        :type timeout: float
+        :return: The (watch descriptor, mask, cookie, name) of each event, where the name is empty when the event is
+        about the watched path itself.
+        :rtype: list
+        """
+        readable, _, _ = select([self._fd], [], [], timeout)
+        if not readable:
+            return []
+        try:
+            data = read(self._fd, 65536)
+        except BlockingIOError:
+            return []
+
+        events = []
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            wd, mask, cookie, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = fsdecode(data[offset:offset + length].rstrip(b"\0"))
+            offset += length
+            events.append((wd, mask, cookie, name))
+        return events
+
+    def close(self) -> None:
+        """
+        Closes the instance, which removes all of its watches.
+        """
+        if self._fd >= 0:
+            close(self._fd)
+            self._fd = -1
@@ -0,0 +1,70 @@
+from PyQt5.QtCore import QObject, QTimer
+from PyQt5.QtGui import QGuiApplication
+
+
+class CoalescingDispatcher(QObject):
+    """
+    Merges bursts of updates into at most one update per screen frame. Each update has a key; an update that is
+    superseded by a newer one with the same key before the frame ends is dropped, and an update whose value is the
+    same as the one last sent for its key is never sent at all.
+    """
+
+    def __init__(self, parent: QObject = None) -> None:
+        """
+        Creates the dispatcher with a frame as long as the primary screen's refresh interval.
+
+        :param parent: An optional parent object for this dispatcher.
+        :type parent: QObject
+        """
+        super().__init__(parent)
+        self._pending = {}
+        self._sent = {}
+
+        screen = QGuiApplication.primaryScreen()
+        refresh_rate = screen.refreshRate() if screen is not None else 0
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(int(1000 / refresh_rate) if refresh_rate > 0 else 16)
+        self._timer.timeout.connect(self.flush)
+
+    def post(self, key, callback, *args) -> None:
+        """
+        Queues an update to be sent at the end of the current frame.
+
+        :param key: What the update is about. A later update with the same key replaces this one.
+        :param callback: The function the update is sent to, normally a signal's emit method.
+        :param args: The values of the update.
+        """
+        self._pending[key] = (callback, args)
+        if not self._timer.isActive():
+            self._timer.start()
+
+    def send(self, key, callback, *args) -> None:
+        """
+        Sends an update right away, replacing any update with the same key that is still queued.
+
+        :param key: What the update is about.
+        :param callback: The function the update is sent to, normally a signal's emit method.
+        :param args: The values of the update.
+        """
+        self._pending.pop(key, None)
+        self._sent[key] = args
+        callback(*args)
+
+    def clear(self) -> None:
+        """
+        Drops every queued update, normally because what they were about is no longer shown.
+        """
+        self._pending.clear()
+        self._timer.stop()
+
+    def flush(self) -> None:
+        """
+        Sends every queued update that changes what was last sent for its key.
+        """
+        pending = self._pending
+        self._pending = {}
+        for key, (callback, args) in pending.items():
+            if self._sent.get(key) != args:
+                self._sent[key] = args
+                callback(*args)
@@ -0,0 +1,277 @@
+from array import array
+from functools import wraps
+from json import dumps
+from logging import getLogger
+from time import perf_counter_ns, time
+from PyQt5.QtCore import QObject, QTimer
+from orchid.io import FileManager
+
+
+class LatencyHistogram:
+    """
+    Counts how long calls take in a fixed number of buckets, the way an HDR histogram does. Values below
+    :attr:`SUB_BUCKETS` each have their own bucket, and every power of two above that is split into half as many
+    buckets, so every value is kept within about 6% whatever its size and the histogram never grows.
+    """
+
+    # The number of values counted exactly, as a power of two.
+    SUB_BUCKET_BITS = 5
+    SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+    HALF_SUB_BUCKETS = SUB_BUCKETS // 2
+
+    # The number of powers of two of microseconds covered above the exact values, which reaches past a day.
+    MAGNITUDES = 32
+
+    def __init__(self) -> None:
+        """
+        Creates an empty histogram.
+        """
+        self._counts = array("Q", bytes(8 * (self.SUB_BUCKETS + self.HALF_SUB_BUCKETS * self.MAGNITUDES)))
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = 0
+
+    def record(self, microseconds: int) -> None:
+        """
+        Counts a call.
+
+        :param microseconds: How long the call took.
+        :type microseconds: int
+        """
+        self._counts[self._get_bucket(microseconds)] += 1
+        self.count += 1
+        self.total += microseconds
+        if self.min is None or microseconds < self.min:
+            self.min = microseconds
+        if microseconds > self.max:
+            self.max = microseconds
+
+    def get_percentile(self, percentile: float) -> int:
+        """
+        Returns the value that the given percent of calls took at most.
+
+        :param percentile: The percentile from 0 to 100.
+        :type percentile: float
+        :return: The highest value of the bucket the percentile falls in, in microseconds.
+        :rtype: int
+        """
+        if self.count == 0:
+            return 0
+        target = max(1, round(self.count * percentile / 100))
+        seen = 0
+        for bucket, count in enumerate(self._counts):
+            seen += count
+            if seen >= target:
+                return min(self._get_bucket_top(bucket), self.max)
+        return self.max
+
+    def to_dict(self) -> dict:
+        """
+        Returns a summary of the histogram that can be serialized as JSON.
+
+        :return: The count, total, min, max, mean and common percentiles, in microseconds.
+        :rtype: dict
+        """
+        return {"count": self.count,
+                "total": self.total,
+                "min": self.min or 0,
+                "max": self.max,
+                "mean": round(self.total / self.count, 1) if self.count else 0,
+                "p50": self.get_percentile(50),
+                "p90": self.get_percentile(90),
+                "p99": self.get_percentile(99),
+                "p999": self.get_percentile(99.9)}
+
+    def _get_bucket(self, value: int) -> int:
+        """
+        Returns the bucket a value is counted in.
+
+        :param value: The value.
+        :type value: int
+        :return: The index of the bucket.
+        :rtype: int
+        """
+        if value < self.SUB_BUCKETS:
+            return max(value, 0)
+        magnitude = value.bit_length() - self.SUB_BUCKET_BITS
+        if magnitude > self.MAGNITUDES:
+            return len(self._counts) - 1
+        # The value's top bits pick the bucket within its power of two; they always start with a one.
+        return self.SUB_BUCKETS + (magnitude - 1) * self.HALF_SUB_BUCKETS + (value >> magnitude) - self.HALF_SUB_BUCKETS
+
+    def _get_bucket_top(self, bucket: int) -> int:
+        """
+        Returns the highest value counted in a bucket.
+
+        :param bucket: The index of the bucket.
+        :type bucket: int
+        :return: The highest value of the bucket.
+        :rtype: int
+        """
+        if bucket < self.SUB_BUCKETS:
+            return bucket
+        magnitude, offset = divmod(bucket - self.SUB_BUCKETS, self.HALF_SUB_BUCKETS)
+        return ((offset + self.HALF_SUB_BUCKETS + 1) << (magnitude + 1)) - 1
+
+
+class Instrumentation:
+    """
+    Opt-in measurement of where time goes on the hot paths of :module:`orchid`. Once enabled, methods can be wrapped
+    so every call is counted in a :class:`LatencyHistogram` named after the method, and the histograms are dumped as
+    JSON every :attr:`DUMP_INTERVAL` milliseconds. Nothing is wrapped while it is disabled, so it then costs nothing.
+    This is a singleton.
+    """
+
+    instance = None
+
+    # How many milliseconds between dumps of the histograms.
+    DUMP_INTERVAL = 10000
+
+    def __init__(self) -> None:
+        """
+        Creates the instance of the :class:`_Instrumentation` if it does not already exist.
+        """
+        if not Instrumentation.instance:
+            Instrumentation.instance = _Instrumentation()
+
+    def enable(self, path: str) -> None:
+        """
+        Turns instrumentation on. Only methods wrapped after this are measured.
+
+        :param path: The file the histograms are dumped to.
+        :type path: str
+        """
+        Instrumentation.instance.enable(path)
+
+    def is_enabled(self) -> bool:
+        """
+        Returns whether instrumentation is on.
+
+        :return: True if methods are being measured.
+        :rtype: bool
+        """
+        return Instrumentation.instance.path is not None
+
+    def instrument_methods(self, cls: type, names: list = None, prefix: str = None) -> None:
+        """
+        Replaces methods of a class with ones that measure each call, if instrumentation is on. This must happen
+        before the methods are connected to signals, since connections hold on to the method they were given.
+
+        :param cls: The class whose methods to measure.
+        :type cls: type
+        :param names: The names of the methods to measure. Names the class has no method for are skipped.
+        :type names: list
+        :param prefix: Measures every method of the class, including inherited ones, whose name starts with this.
+        :type prefix: str
+        """
+        if self.is_enabled():
+            Instrumentation.instance.instrument_methods(cls, names or [], prefix)
+
+    def get_snapshot(self) -> dict:
+        """
+        Returns a summary of every histogram.
+
+        :return: The summary of each histogram keyed by its name.
+        :rtype: dict
+        """
+        return Instrumentation.instance.get_snapshot()
+
+    def dump(self) -> None:
+        """
+        Writes a summary of every histogram to the dump file, off the GUI thread.
+        """
+        Instrumentation.instance.dump()
+
+
+class _Instrumentation(QObject):
+    """
+    Contains the functionality of the :class:`Instrumentation` and is used to ensure only one
+    :class:`Instrumentation` exists. This is a singleton.
+    """
+
+    def __init__(self) -> None:
+        """
+        Creates the instrumentation, turned off.
+        """
+        super().__init__()
+        self._logger = getLogger(__name__)
+        self.path = None
+        self._histograms = {}
+        self._dump_timer = QTimer(self)
+        self._dump_timer.setInterval(Instrumentation.DUMP_INTERVAL)
+        self._dump_timer.timeout.connect(self.dump)
+
+    def enable(self, path: str) -> None:
+        """
+        Turns instrumentation on.
+
+        :param path: The file the histograms are dumped to.
+        :type path: str
+        """
+        self.path = path
+        self._dump_timer.start()
+        self._logger.info(f"Instrumentation is on; dumping to {path}")
+
+    def instrument_methods(self, cls: type, names: list, prefix: str) -> None:
+        """
+        Replaces methods of a class with ones that measure each call.
+
+        :param cls: The class whose methods to measure.
+        :type cls: type
+        :param names: The names of the methods to measure.
+        :type names: list
+        :param prefix: Measures every method whose name starts with this, or None.
+        :type prefix: str
+        """
+        names = set(names)
+        if prefix is not None:
+            names.update(name for name in dir(cls) if name.startswith(prefix) and callable(getattr(cls, name)))
+        for name in sorted(names):
+            method = getattr(cls, name, None)
+            if method is not None and not getattr(method, "_is_instrumented", False):
+                setattr(cls, name, self._wrap(method, f"{cls.__name__}.{name}"))
+
+    def _wrap(self, method, name: str):
+        """
+        Returns a function that calls a method and counts how long it took. The function keeps the method's name and
+        docstring but not the signature given by :func:`pyqtSlot`, since a connection to a decorated slot calls the
+        slot registered with Qt and would skip the measuring function.
+
+        :param method: The method to measure.
+        :param name: The name of the histogram.
+        :type name: str
+        :return: The measuring function.
+        """
+        histogram = self._histograms.setdefault(name, LatencyHistogram())
+
+        @wraps(method)
+        def instrumented(*args, **kwargs):
+            start = perf_counter_ns()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                histogram.record((perf_counter_ns() - start) // 1000)
+
+        instrumented.__dict__.pop("__pyqtSignature__", None)
+        instrumented._is_instrumented = True
+        return instrumented
+
+    def get_snapshot(self) -> dict:
+        """
+        Returns a summary of every histogram that has counted a call.
+
+        :return: The summary of each histogram keyed by its name.
+        :rtype: dict
+        """
+        return {name: histogram.to_dict() for name, histogram in self._histograms.items() if histogram.count}
+
+    def dump(self) -> None:
+        """
+        Writes a summary of every histogram to the dump file. The summary is made here, and serialized and written on
+        the :class:`FileManager`'s writer thread.
+        """
+        if self.path is None:
+            return
+        snapshot = {"time": time(), "unit": "us", "histograms": self.get_snapshot()}
+        FileManager().write_bytes(self.path, lambda: dumps(snapshot, indent=4).encode())
@@ -0,0 +1,39 @@
+try:
+    from os import sysconf
+except ImportError:
+    sysconf = None  # Windows has no sysconf.
+
+
+def get_resident_memory(pid: int) -> int:
+    """
+    Returns how much physical memory the process with the given id is using. This reads /proc, so it only works on
+    Linux.
+
+    :param pid: The id of the process.
+    :type pid: int
+    :return: The resident memory of the process in bytes or None if it could not be read.
+    :rtype: int
+    """
+    try:
+        with open("/proc/{}/statm".format(pid), "r") as file:
+            resident_pages = int(file.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return None
+    if sysconf is None:
+        return None
+    return resident_pages * sysconf("SC_PAGE_SIZE")
+
+
+def get_physical_memory() -> int:
+    """
+    Returns how much physical memory the machine has.
+
+    :return: The physical memory in bytes or None if it could not be read, which is always the case on Windows.
+    :rtype: int
+    """
+    if sysconf is None:
+        return None
+    try:
+        return sysconf("SC_PHYS_PAGES") * sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return None
@@ -0,0 +1,168 @@
+from collections import Counter, deque
+from logging import getLogger
+from os.path import basename
+from sys import _current_frames
+from threading import Thread, Event, get_ident
+from time import monotonic, time
+from PyQt5.QtCore import QObject, QTimer
+from orchid.io import FileManager
+
+
+def fold_stack(frame) -> str:
+    """
+    Returns a Python stack in the folded format flame graph tools read: the frames from the outermost call to the
+    innermost, separated by semicolons.
+
+    :param frame: The innermost frame of the stack.
+    :return: The folded stack.
+    :rtype: str
+    """
+    frames = []
+    while frame is not None:
+        code = frame.f_code
+        frames.append(f"{code.co_name} ({basename(code.co_filename)}:{frame.f_lineno})")
+        frame = frame.f_back
+    return ";".join(reversed(frames))
+
+
+class StallDetector(QObject):
+    """
+    Watches for the GUI thread's event loop freezing. A timer on the GUI thread marks every :attr:`PING_INTERVAL`
+    milliseconds that the loop is running, and a watchdog thread checks the mark. Once the mark is more than the
+    threshold late, the watchdog samples the GUI thread's Python stack every :attr:`SAMPLE_INTERVAL` seconds until the
+    loop runs again. The samples are counted per stack, so the stacks seen most are where the loop stalls the most.
+    """
+
+    # How many milliseconds between marks from the event loop.
+    PING_INTERVAL = 50
+
+    # How many seconds between the watchdog's checks, and between stack samples during a stall.
+    SAMPLE_INTERVAL = 0.01
+
+    # How many of the latest stalls are kept.
+    MAX_STALLS = 256
+
+    def __init__(self, threshold: int = 200, parent: QObject = None) -> None:
+        """
+        Creates the detector. It only watches once :method:`start()` is called.
+
+        :param threshold: How many milliseconds late a mark from the event loop has to be to count as a stall.
+        :type threshold: int
+        :param parent: An optional parent object for this detector.
+        :type parent: QObject
+        """
+        super().__init__(parent)
+        self._logger = getLogger(__name__)
+        self._threshold = (self.PING_INTERVAL + threshold) / 1000
+        self._last_ping = monotonic()
+        self._thread_id = get_ident()
+        self._thread = None
+        self._is_stopping = Event()
+        self._stacks = Counter()  # How many samples of each folded stack were taken during stalls.
+        self._stalls = deque(maxlen=self.MAX_STALLS)  # The (start time, seconds, innermost frame) of each stall.
+
+        self._ping_timer = QTimer(self)
+        self._ping_timer.setInterval(self.PING_INTERVAL)
+        self._ping_timer.timeout.connect(self._on_ping_timeout)
+
+    def start(self) -> None:
+        """
+        Starts watching the event loop of the thread this detector was created on.
+        """
+        if self._thread is None:
+            self._last_ping = monotonic()
+            self._is_stopping.clear()
+            self._ping_timer.start()
+            self._thread = Thread(target=self._run, args=(self._thread_id,), name="orchid-stall-detector",
+                                  daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        """
+        Stops watching and waits for the watchdog thread to finish.
+        """
+        if self._thread is not None:
+            self._is_stopping.set()
+            self._thread.join()
+            self._thread = None
+        self._ping_timer.stop()
+
+    def get_stalls(self) -> list:
+        """
+        Returns the latest stalls.
+
+        :return: The (start time in seconds since the epoch, duration in seconds, innermost frame) of each stall,
+        oldest first.
+        :rtype: list
+        """
+        return list(self._stalls)
+
+    def get_top_sites(self, limit: int = 10) -> list:
+        """
+        Returns the frames the event loop was most often stuck in.
+
+        :param limit: The most frames to return.
+        :type limit: int
+        :return: The (innermost frame, number of samples) of each frame, most samples first.
+        :rtype: list
+        """
+        sites = Counter()
+        for stack, count in self._stacks.items():
+            sites[stack.rsplit(";", 1)[-1]] += count
+        return sites.most_common(limit)
+
+    def to_folded(self) -> str:
+        """
+        Returns the sampled stacks in the folded format flame graph tools read, one stack and its sample count per
+        line.
+
+        :return: The folded stacks.
+        :rtype: str
+        """
+        return "".join(f"{stack} {count}\n" for stack, count in self._stacks.most_common())
+
+    def write_report(self, path: str) -> None:
+        """
+        Writes the sampled stacks as folded stacks to a file and logs the top stall sites. Call this once the detector
+        is stopped, since the watchdog thread changes the samples while it runs.
+
+        :param path: The file to write the folded stacks to.
+        :type path: str
+        """
+        for site, count in self.get_top_sites():
+            self._logger.info(f"Stalled {count * self.SAMPLE_INTERVAL * 1000:.0f} ms in {site}")
+        FileManager().write_bytes(path, self.to_folded().encode())
+
+    def _on_ping_timeout(self) -> None:
+        """
+        Marks that the event loop is running.
+        """
+        self._last_ping = monotonic()
+
+    def _run(self, thread_id: int) -> None:
+        """
+        Checks the marks from the event loop and samples the watched thread's stack while they are late. Runs on the
+        watchdog thread.
+
+        :param thread_id: The id of the thread whose event loop is watched.
+        :type thread_id: int
+        """
+        stall_start = None
+        stall_site = None
+        while not self._is_stopping.wait(self.SAMPLE_INTERVAL):
+            last_ping = self._last_ping
+            if monotonic() - last_ping > self._threshold:
+                frame = _current_frames().get(thread_id)
+                if frame is not None:
+                    stack = fold_stack(frame)
+                    self._stacks[stack] += 1
+                    if stall_start is None:
+                        stall_start = last_ping
+                        stall_site = stack.rsplit(";", 1)[-1]
+                del frame
+            elif stall_start is not None:
+                # The loop ran again; the stall lasted from the last mark before it to the first mark after it.
+                duration = last_ping - stall_start
+                self._stalls.append((time() - (monotonic() - stall_start), duration, stall_site))
+                self._logger.warning(f"Event loop stalled for {duration * 1000:.0f} ms in {stall_site}")
+                stall_start = None
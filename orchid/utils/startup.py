@@ -0,0 +1,149 @@
+from json import dumps
+from logging import getLogger
+from time import perf_counter
+from PyQt5.QtCore import QObject, QEvent, pyqtSignal
+from PyQt5.QtWidgets import QWidget
+
+
+# When this module was imported, which is where the startup trace starts.
+_START = perf_counter()
+
+
+class StartupTrace:
+    """
+    Records when each phase of startup finished, like creating the :class:`QApplication` or the first paint of the
+    desktop, so slow startups can be broken down. This is a singleton. The trace starts when this module is imported,
+    so import it as early as possible.
+    """
+
+    instance = None
+
+    def __init__(self) -> None:
+        """
+        Creates the instance of the :class:`_StartupTrace` if it does not already exist.
+        """
+        if not StartupTrace.instance:
+            StartupTrace.instance = _StartupTrace()
+
+    def mark(self, phase: str) -> None:
+        """
+        Records that a phase of startup just finished. Marking a phase again does nothing.
+
+        :param phase: The name of the phase, like "qapplication".
+        :type phase: str
+        """
+        StartupTrace.instance.mark(phase)
+
+    def get_phases(self) -> list:
+        """
+        Returns the phases of startup in the order they finished.
+
+        :return: The (phase, seconds since the start, seconds since the previous phase) of each phase.
+        :rtype: list
+        """
+        return StartupTrace.instance.get_phases()
+
+    def watch_first_paint(self, widget: QWidget, phase: str = "first paint") -> None:
+        """
+        Marks a phase once the given widget is painted for the first time.
+
+        :param widget: The widget to watch.
+        :type widget: QWidget
+        :param phase: The name of the phase to mark.
+        :type phase: str
+        """
+        StartupTrace.instance.watch_first_paint(widget, phase)
+
+    def get_signal_marked(self) -> pyqtSignal:
+        """
+        Returns the signal sent with the name of each phase as it is marked.
+
+        :return: The signal of the trace.
+        :rtype: pyqtSignal
+        """
+        return StartupTrace.instance.signal_marked
+
+    def to_json(self) -> str:
+        """
+        Returns the phases of startup as a JSON document.
+
+        :return: The phases as JSON.
+        :rtype: str
+        """
+        phases = [{"phase": phase, "at": round(at * 1000, 3), "duration": round(duration * 1000, 3)}
+                  for phase, at, duration in self.get_phases()]
+        return dumps({"unit": "ms", "phases": phases}, indent=4)
+
+
+class _StartupTrace(QObject):
+    """
+    Contains the functionality of the :class:`StartupTrace` and is used to ensure only one :class:`StartupTrace`
+    exists. This is a singleton.
+    """
+
+    # Class signals.
+    signal_marked = pyqtSignal(str)
+
+    def __init__(self) -> None:
+        """
+        Starts the trace.
+        """
+        super().__init__()
+        self._logger = getLogger(__name__)
+        self._start = _START
+        self._phases = {}  # When each phase finished, in the order they finished.
+        self._painted_widgets = {}  # The phase to mark when each watched widget is first painted.
+
+    def mark(self, phase: str) -> None:
+        """
+        Records that a phase of startup just finished.
+
+        :param phase: The name of the phase.
+        :type phase: str
+        """
+        if phase not in self._phases:
+            self._phases[phase] = perf_counter() - self._start
+            self._logger.debug(f"Startup phase {phase} done after {self._phases[phase] * 1000:.1f} ms")
+            self.signal_marked.emit(phase)
+
+    def get_phases(self) -> list:
+        """
+        Returns the phases of startup in the order they finished.
+
+        :return: The (phase, seconds since the start, seconds since the previous phase) of each phase.
+        :rtype: list
+        """
+        phases = []
+        previous = 0.0
+        for phase, at in self._phases.items():
+            phases.append((phase, at, at - previous))
+            previous = at
+        return phases
+
+    def watch_first_paint(self, widget: QWidget, phase: str) -> None:
+        """
+        Marks a phase once the given widget is painted for the first time.
+
+        :param widget: The widget to watch.
+        :type widget: QWidget
+        :param phase: The name of the phase to mark.
+        :type phase: str
+        """
+        self._painted_widgets[widget] = phase
+        widget.installEventFilter(self)
+
+    def eventFilter(self, watched: QObject, event: QEvent) -> bool:
+        """
+        Marks the phase of a watched widget once it is painted, then stops watching it.
+
+        :param watched: The object the event is for.
+        :type watched: QObject
+        :param event: The event.
+        :type event: QEvent
+        :return: False, so the event is always handled normally.
+        :rtype: bool
+        """
+        if event.type() == QEvent.Paint and watched in self._painted_widgets:
+            watched.removeEventFilter(self)
+            self.mark(self._painted_widgets.pop(watched))
+        return False
@@ -1,4 +1,9 @@
-from json import load
+from hashlib import sha1
+from json import loads
+from logging import getLogger
+from re import sub
+from os.path import exists
+from PyQt5.QtCore import QObject, QByteArray, QDataStream, QIODevice, QFileSystemWatcher, QTimer, pyqtSignal
 from PyQt5.QtWidgets import QApplication
 from PyQt5.QtGui import QColor, QPalette
 from orchid.io import FileManager
@@ -6,7 +11,9 @@ from orchid.io import FileManager
 
 class Themer:
     """
-    A theme manager for :module:`orchid`.
+    A theme manager for :module:`orchid`. Themes are compiled into a palette and a style sheet once, and the compiled
+    form is saved next to the theme file, so later starts neither parse the theme nor build its colors. The theme
+    file is watched, and changes to it are applied straight away.
     """
 
     instance = None
@@ -17,50 +24,221 @@ class Themer:
         """
         if not Themer.instance:
             Themer.instance = _Themer()
-        self.color_roles = [QPalette.Window, QPalette.WindowText, QPalette.Base, QPalette.AlternateBase, QPalette.Text,
-                            QPalette.BrightText, QPalette.Button, QPalette.ButtonText, QPalette.ToolTipBase,
-                            QPalette.ToolTipText, QPalette.Light, QPalette.Midlight, QPalette.Mid, QPalette.Dark,
-                            QPalette.Shadow, QPalette.Highlight, QPalette.HighlightedText, QPalette.Link,
-                            QPalette.LinkVisited]
 
     def apply_theme(self) -> None:
         """
-        Colors all the widgets of the app according to the current theme.
+        Colors all the widgets of the app according to the current theme, and keeps them colored as the theme file
+        changes.
         """
-        palette = QPalette()
-        for role in self.color_roles:
-            palette.setColor(role, Themer.instance.colors[role])  # Set each role to its corresponding color.
-        QApplication.setPalette(palette)
+        Themer.instance.apply_theme()
+
+    def get_palette(self) -> QPalette:
+        """
+        Returns the palette of the current theme.
+
+        :return: The palette of the theme.
+        :rtype: QPalette
+        """
+        return Themer.instance.palette
+
+    def get_style_sheet(self) -> str:
+        """
+        Returns the style sheet of the current theme.
+
+        :return: The style sheet of the theme, which is empty if the theme has none.
+        :rtype: str
+        """
+        return Themer.instance.style_sheet
+
+    def get_signal_theme_changed(self) -> pyqtSignal:
+        """
+        Returns the signal sent whenever the theme file changes and the new theme has been loaded.
+
+        :return: The signal of the themer.
+        :rtype: pyqtSignal
+        """
+        return Themer.instance.signal_theme_changed
 
 
-class _Themer:
+class _Themer(QObject):
     """
     Contains the real workings of the :class:`Themer` and is used to ensure only one :class:`Themer` can exist.
     This is a singleton.
     """
 
+    # Class signals.
+    signal_theme_changed = pyqtSignal()
+
+    # The key of each color role in the theme file.
+    COLOR_KEYS = {QPalette.Window: "window", QPalette.WindowText: "windowtext", QPalette.Base: "base",
+                  QPalette.AlternateBase: "altbase", QPalette.Text: "text", QPalette.BrightText: "brighttext",
+                  QPalette.Button: "button", QPalette.ButtonText: "buttontext", QPalette.ToolTipBase: "tooltipbase",
+                  QPalette.ToolTipText: "tooltiptext", QPalette.Light: "light", QPalette.Midlight: "midlight",
+                  QPalette.Mid: "mid", QPalette.Dark: "dark", QPalette.Shadow: "shadow",
+                  QPalette.Highlight: "highlight", QPalette.HighlightedText: "highlightedtext",
+                  QPalette.Link: "link", QPalette.LinkVisited: "linkvisited"}
+
+    # The version of the compiled theme format. Compiled themes of other versions are compiled again.
+    COMPILED_VERSION = 2
+
+    # How many milliseconds to wait after the theme file changes before reloading it, since editors often save a file
+    # in several writes.
+    RELOAD_DELAY = 100
+
     def __init__(self) -> None:
         """
-        Loads the theme from a file.
-        """
-        with open(FileManager().get_theme_file(), "r") as file:
-            json_doc = load(file)
-        self.colors = {QPalette.Window: QColor(json_doc["colors"]["window"]),
-                       QPalette.WindowText: QColor(json_doc["colors"]["windowtext"]),
-                       QPalette.Base: QColor(json_doc["colors"]["base"]),
-                       QPalette.AlternateBase: QColor(json_doc["colors"]["altbase"]),
-                       QPalette.Text: QColor(json_doc["colors"]["text"]),
-                       QPalette.BrightText: QColor(json_doc["colors"]["brighttext"]),
-                       QPalette.Button: QColor(json_doc["colors"]["button"]),
-                       QPalette.ButtonText: QColor(json_doc["colors"]["buttontext"]),
-                       QPalette.ToolTipBase: QColor(json_doc["colors"]["tooltipbase"]),
-                       QPalette.ToolTipText: QColor(json_doc["colors"]["tooltiptext"]),
-                       QPalette.Light: QColor(json_doc["colors"]["light"]),
-                       QPalette.Midlight: QColor(json_doc["colors"]["midlight"]),
-                       QPalette.Mid: QColor(json_doc["colors"]["mid"]),
-                       QPalette.Dark: QColor(json_doc["colors"]["dark"]),
-                       QPalette.Shadow: QColor(json_doc["colors"]["shadow"]),
-                       QPalette.Highlight: QColor(json_doc["colors"]["highlight"]),
-                       QPalette.HighlightedText: QColor(json_doc["colors"]["highlightedtext"]),
-                       QPalette.Link: QColor(json_doc["colors"]["link"]),
-                       QPalette.LinkVisited: QColor(json_doc["colors"]["linkvisited"])}
+        Loads the compiled theme, compiling the theme file first if it changed since it was last compiled, and starts
+        watching the theme file.
+        """
+        super().__init__()
+        self._logger = getLogger(__name__)
+        file_manager = FileManager()
+        self._theme_file = file_manager.get_theme_file()
+        self._compiled_theme_file = file_manager.get_compiled_theme_file()
+        self._is_applied = False
+        self._applied_style_sheet = ""
+        self.palette = QPalette()
+        self.style_sheet = ""
+        self.digest = None
+
+        # Read both files at once; the compiled theme is only used if it was compiled from this theme file.
+        theme_future = file_manager.read_bytes(self._theme_file)
+        compiled_future = None
+        if exists(self._compiled_theme_file):
+            compiled_future = file_manager.read_bytes(self._compiled_theme_file)
+        theme_data = theme_future.result()
+        if theme_data is None:
+            self._logger.error(f"Could not read the theme file {self._theme_file}")
+        elif compiled_future is None or not self._load_compiled(compiled_future.result(), sha1(theme_data).hexdigest()):
+            self._compile(theme_data)
+
+        self._reload_timer = QTimer(self)
+        self._reload_timer.setSingleShot(True)
+        self._reload_timer.setInterval(self.RELOAD_DELAY)
+        self._reload_timer.timeout.connect(self._on_reload_timeout)
+
+        self._watcher = QFileSystemWatcher(self)
+        self._watcher.fileChanged.connect(self._on_theme_file_changed)
+        self._watcher.addPath(self._theme_file)
+
+    def apply_theme(self) -> None:
+        """
+        Colors all the widgets of the app according to the current theme. Every window stops painting while the
+        palette and style sheet change, so each window is painted once afterwards rather than once per widget, and
+        the style sheet is only set if it changed, since setting one polishes every widget again.
+        """
+        self._is_applied = True
+        app = QApplication.instance()
+        windows = [window for window in app.topLevelWidgets() if window.isVisible() and window.updatesEnabled()]
+        for window in windows:
+            window.setUpdatesEnabled(False)
+        try:
+            if self.style_sheet != self._applied_style_sheet:
+                app.setStyleSheet(self.style_sheet)
+                self._applied_style_sheet = self.style_sheet
+            app.setPalette(self.palette)
+        finally:
+            for window in windows:
+                window.setUpdatesEnabled(True)  # This schedules a single repaint of the whole window.
+
+    def _load_compiled(self, data: bytes, digest: str) -> bool:
+        """
+        Loads a compiled theme.
+
+        :param data: The compiled theme, or None if it could not be read.
+        :type data: bytes
+        :param digest: The SHA-1 hash of the theme file the compiled theme has to be compiled from.
+        :type digest: str
+        :return: True if the compiled theme was loaded, or False if it is missing, outdated or broken.
+        :rtype: bool
+        """
+        if data is None:
+            return False
+
+        stream = QDataStream(QByteArray(data))
+        stream.setVersion(QDataStream.Qt_5_0)
+        if stream.readUInt32() != self.COMPILED_VERSION or stream.readQString() != digest:
+            return False
+        palette = QPalette()
+        stream >> palette
+        style_sheet = stream.readQString()
+        if stream.status() != QDataStream.Ok or not stream.atEnd():
+            self._logger.warning(f"The compiled theme {self._compiled_theme_file} is broken")
+            return False
+
+        self.palette = palette
+        self.style_sheet = style_sheet
+        self.digest = digest
+        return True
+
+    def _compile(self, theme_data: bytes) -> bool:
+        """
+        Builds the palette and style sheet of a theme file and saves them as the compiled theme, off the GUI thread.
+        The style sheet is the theme's optional "stylesheet", with "{key}" replaced by the color of each key. Any other
+        braces, like those around the style sheet's rules, are kept.
+
+        :param theme_data: The contents of the theme file.
+        :type theme_data: bytes
+        :return: True if the theme was compiled, or False if the theme file is broken, in which case the current theme
+        is kept.
+        :rtype: bool
+        """
+        try:
+            json_doc = loads(theme_data)
+            colors = {key: QColor(json_doc["colors"][key]) for key in self.COLOR_KEYS.values()}
+            names = {key: color.name() for key, color in colors.items()}
+            style_sheet = sub(r"\{(\w+)\}", lambda match: names.get(match.group(1), match.group(0)),
+                              json_doc.get("stylesheet", ""))
+        except (ValueError, KeyError, IndexError, TypeError, AttributeError) as error:
+            self._logger.error(f"Could not compile the theme file {self._theme_file}: {error!r}")
+            return False
+
+        palette = QPalette()
+        for role, key in self.COLOR_KEYS.items():
+            palette.setColor(role, colors[key])
+        self.palette = palette
+        self.style_sheet = style_sheet
+        self.digest = sha1(theme_data).hexdigest()
+
+        data = QByteArray()
+        stream = QDataStream(data, QIODevice.WriteOnly)
+        stream.setVersion(QDataStream.Qt_5_0)
+        stream.writeUInt32(self.COMPILED_VERSION)
+        stream.writeQString(self.digest)
+        stream << palette
+        stream.writeQString(style_sheet)
+        FileManager().write_bytes(self._compiled_theme_file, bytes(data))
+        self._logger.debug(f"Compiled the theme file {self._theme_file}")
+        return True
+
+    def _on_theme_file_changed(self, path: str) -> None:
+        """
+        Reloads the theme shortly after the theme file changes.
+
+        :param path: The path of the theme file.
+        :type path: str
+        """
+        self._reload_timer.start()
+
+    def _on_reload_timeout(self) -> None:
+        """
+        Reads the changed theme file off the GUI thread. Editors that save by replacing the file make the watcher
+        lose it, so it is watched again.
+        """
+        if self._theme_file not in self._watcher.files():
+            self._watcher.addPath(self._theme_file)
+        FileManager().read_bytes(self._theme_file, callback=self._on_theme_file_read)
+
+    def _on_theme_file_read(self, theme_data: bytes) -> None:
+        """
+        Compiles the changed theme file and applies it if the theme is in use.
+
+        :param theme_data: The contents of the theme file, or None if it could not be read.
+        :type theme_data: bytes
+        """
+        if theme_data is None or sha1(theme_data).hexdigest() == self.digest or not self._compile(theme_data):
+            return
+        self._logger.info(f"Reloaded the theme file {self._theme_file}")
+        if self._is_applied:
+            self.apply_theme()
+        self.signal_theme_changed.emit()
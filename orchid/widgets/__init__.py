@@ -1,9 +1,19 @@
 from logging import getLogger
-from PyQt5.QtCore import Qt, pyqtSignal, QUrl, QPoint
+from time import monotonic, perf_counter
+from PyQt5.QtCore import Qt, pyqtSignal, pyqtSlot, QUrl, QPoint, QTimer, QByteArray
 from PyQt5.QtGui import QIcon, QKeySequence, QCursor
 from PyQt5.QtWidgets import QWidget, QTabWidget, QTabBar, QMenu, QToolButton
-from PyQt5.QtWebEngineWidgets import QWebEngineProfile
+from PyQt5.QtWebEngineWidgets import QWebEngineProfile, QWebEnginePage
 from orchid.widgets.web import WebView, WebPage
+from orchid.widgets.web.pool import WebViewPool
+from orchid.widgets.clients import ClientContainer
+from orchid.widgets.placeholder import PlaceholderTab
+from orchid.utils.memory import get_resident_memory
+from orchid.utils.dispatch import CoalescingDispatcher
+from orchid.search import SearchIndex, KIND_TAB
+from orchid.io.history import HistoryStore
+from orchid.io.session import SessionJournal
+from orchid.io.icons import IconCache, get_origin
 
 
 class TabWidget(QTabWidget):
@@ -19,12 +29,18 @@ class TabWidget(QTabWidget):
     signal_favicon_changed = pyqtSignal(QIcon)
     signal_webaction_state_changed = pyqtSignal(WebPage.WebAction,  bool)
     signal_dev_tools_requested = pyqtSignal(WebPage)
+    signal_client_close_requested = pyqtSignal(int)
 
-    def __init__(self, profile: QWebEngineProfile, parent: QWidget = None) -> None:
+    # How much memory to assume a WebView uses when its renderer's memory cannot be read.
+    ESTIMATED_WEBVIEW_MEMORY = 150 * 1024 * 1024
+
+    def __init__(self, profile: QWebEngineProfile = None, parent: QWidget = None) -> None:
         """
         Creates the tab widget and listens for changes in its tab bar.
 
-        :param profile: The :class:`QWebEngineProfile` to use for this :class:`TabWidget`.
+        :param profile: The :class:`QWebEngineProfile` to use for this :class:`TabWidget`, or None to use the default
+        profile. The default profile is only fetched when the first web page is created, since that starts the web
+        engine.
         :type profile: QWebEngineProfile
         :param parent: An optional parent widget of this tab widget.
         :type parent: QWidget
@@ -37,6 +53,27 @@ class TabWidget(QTabWidget):
 
         self._profile = profile
         self._logger = getLogger(__name__)
+        self._client_containers = {}  # Application windows shown in tabs keyed by window id.
+        self._last_activated = {}  # When each tab was last the current tab keyed by widget.
+        self._tab_indexes = None  # The index of each tab keyed by widget, rebuilt after the tabs change.
+        self._search_index = None
+        self._searchable_tabs = set()  # The widgets whose tabs are in the search index.
+        self._history_store = None
+        self._session_journal = None
+        self._icon_cache = None
+
+        # Keep renderers warm for new tabs.
+        self._webview_pool = WebViewPool(self._create_webview, self)
+        self._opening_tabs = {}  # When each new tab was opened and whether its view was warm, keyed by view.
+
+        # Merge the frequent updates of the current tab into one update per frame.
+        self._dispatcher = CoalescingDispatcher(self)
+
+        # Periodically discard background tabs when they use more memory than the budget allows.
+        self._memory_budget = 0
+        self._memory_timer = QTimer(self)
+        self._memory_timer.setInterval(30000)
+        self._memory_timer.timeout.connect(self.discard_background_tabs)
 
         # Configure the tab bar.
         tab_bar = self.tabBar()
@@ -48,12 +85,13 @@ class TabWidget(QTabWidget):
         # Listen for tab bar changes.
         tab_bar.customContextMenuRequested.connect(self._on_context_menu_requested)
         tab_bar.tabCloseRequested.connect(self.close_tab)
+        tab_bar.tabMoved.connect(self._on_tab_moved)
 
         # Listen for tab changes.
         self.currentChanged.connect(self._on_current_tab_changed)
 
         # Handle private tabs.
-        if profile.isOffTheRecord():
+        if self._is_private():
             # TODO: Show incognito icon on tab bar maybe.
             pass
 
@@ -66,49 +104,250 @@ class TabWidget(QTabWidget):
         tab_bar.setTabButton(new_tab_index, QTabBar.RightSide, new_tab_button)
         tab_bar.setTabEnabled(new_tab_index, False)  # Stop the user from being able to change to this fake tab.
 
-    def create_tab(self) -> WebView:
+    def create_tab(self, url: QUrl = None) -> WebView:
         """
         Creates a new background tab and then sets that background tab to be the current tab.
 
+        :param url: The URL to load in the tab, None for the home page, or an empty URL to load nothing.
+        :type url: QUrl
         :return: The :class:`WebView` created.
         :rtype: WebView
         """
-        webview = self.create_background_tab()
+        webview = self.create_background_tab(url)
         self.setCurrentWidget(webview)
         return webview
 
-    def create_background_tab(self) -> WebView:
-        """
-        Creates a new tab with a new :class:`WebPage` in a new :class:`WebView`.
+    def create_background_tab(self, url: QUrl = None) -> WebView:
         """
-        # Create the new WebView and WebPage.
-        webview = WebView(self)
-        webpage = WebPage(self._profile, webview)
-        webview.set_page(webpage)
-
-        # Listen for WebView changes.
-        webview.titleChanged.connect(lambda title, webview=webview: self._on_webview_title_changed(title, webview))
-        webview.urlChanged.connect(lambda url, webview=webview: self._on_webview_url_changed(url, webview))
-        webview.loadProgress.connect(lambda progress, webview=webview: self._on_webview_load_progress_changed(progress, webview))
-        webview.signal_favicon_changed.connect(lambda icon, webview=webview: self._on_webview_favicon_changed(icon, webview))
-        webview.signal_webaction_state_changed.connect(lambda action, enabled, webview=webview: self._on_webview_webaction_state_changed(action, enabled, webview))
-        webview.signal_dev_tools_requested.connect(self.signal_dev_tools_requested)
-
-        # Listen for WebPage changes.
-        webpage.linkHovered.connect(lambda url, webview=webview: self._on_webpage_link_hovered(url, webview))
-        webpage.windowCloseRequested.connect(lambda webview=webview: self._on_webpage_window_close_requested(webview))
+        Creates a new tab with a :class:`WebView`, taken from the pool of warm views when it has one.
 
+        :param url: The URL to load in the tab, None for the home page, or an empty URL to load nothing, like when the
+        web engine loads the page itself.
+        :type url: QUrl
+        :return: The :class:`WebView` created.
+        :rtype: WebView
+        """
         # Configure the new WebView.
+        webview, is_warm = self._webview_pool.take()
         index = self.insertTab(self.count() - 1, webview, self.tr("(Untitled)"))
         self.setTabIcon(index, webview.get_favicon())
         webview.resize(self.currentWidget().size())
         webview.show()
+        self._opening_tabs[webview] = (perf_counter(), is_warm)
 
         # TODO: Use user defaults for a homepage.
-        webpage.setUrl(QUrl("https://www.google.com"))
+        if url is None:
+            url = QUrl("https://www.google.com")
+        if not url.isEmpty():
+            webview.page().setUrl(url)
 
         return webview
 
+    def create_lazy_tab(self, url: QUrl, title: str = "", icon: QIcon = None,
+                        history: QByteArray = None) -> PlaceholderTab:
+        """
+        Creates a new background tab that only remembers its URL, title, and icon. The :class:`WebView` and
+        :class:`WebPage` are only created the first time the tab becomes the current tab, so tabs that are never
+        looked at never start a renderer.
+
+        :param url: The URL the tab loads once it is shown.
+        :type url: QUrl
+        :param title: The title to show on the tab until then.
+        :type title: str
+        :param icon: The icon to show on the tab until then.
+        :type icon: QIcon
+        :param history: An optional navigation history to restore once the tab is shown, as saved by
+        :method:`WebView.save_history()`.
+        :type history: QByteArray
+        :return: The :class:`PlaceholderTab` created.
+        :rtype: PlaceholderTab
+        """
+        if icon is None and self._icon_cache is not None:
+            icon = self._icon_cache.get_icon(url)  # The icon is set once it is decoded if it is not yet.
+        placeholder = PlaceholderTab(url, title, icon, history, parent=self)
+        index = self.insertTab(self.count() - 1, placeholder, title or self.tr("(Untitled)"))
+        self.setTabToolTip(index, title)
+        self.setTabIcon(index, placeholder.get_favicon())
+        self.tabBar().setTabData(index, url)
+        self._update_search_index(placeholder)
+        return placeholder
+
+    def set_search_index(self, search_index: SearchIndex) -> None:
+        """
+        Sets the :class:`SearchIndex` the titles and URLs of the open tabs are kept in, so the omni-search can find
+        them. The index entries are keyed by the widget in the tab.
+
+        :param search_index: The index to keep the tabs in, or None to stop indexing tabs.
+        :type search_index: SearchIndex
+        """
+        if self._search_index is not None:
+            for widget in self._searchable_tabs:
+                self._search_index.remove(KIND_TAB, widget)
+        self._searchable_tabs.clear()
+
+        self._search_index = search_index
+        for i in range(self.count() - 1):
+            self._update_search_index(self.widget(i))
+
+    def set_history_store(self, history_store: HistoryStore) -> None:
+        """
+        Sets the :class:`HistoryStore` the pages visited in this :class:`TabWidget` are recorded in. Nothing is
+        recorded for private profiles.
+
+        :param history_store: The history to record visits in, or None to stop recording.
+        :type history_store: HistoryStore
+        """
+        self._history_store = history_store if not self._is_private() else None
+
+    def set_icon_cache(self, icon_cache: IconCache) -> None:
+        """
+        Sets the :class:`IconCache` the icons of lazy tabs are looked up in before their pages are loaded. The icons
+        of pages loaded in this :class:`TabWidget` are saved in it, except for private profiles.
+
+        :param icon_cache: The cache to look icons up in.
+        :type icon_cache: IconCache
+        """
+        self._icon_cache = icon_cache
+        icon_cache.signal_icon_ready.connect(self._on_icon_ready)
+
+    def set_session_journal(self, session_journal: SessionJournal) -> None:
+        """
+        Sets the :class:`SessionJournal` the open web tabs are saved in. Nothing is saved for private profiles.
+
+        :param session_journal: The journal to save the tabs in, or None to stop saving them.
+        :type session_journal: SessionJournal
+        """
+        self._session_journal = session_journal if not self._is_private() else None
+        if self._session_journal is not None:
+            for i in range(self.count() - 1):
+                self._open_session_tab(self.widget(i))
+            self._save_session_order()
+            self._session_journal.set_active(self.currentWidget())
+
+    def restore_session(self, tabs: list, active: int) -> bool:
+        """
+        Reopens the tabs of a saved session as lazy tabs, so only the current tab starts loading.
+
+        :param tabs: The :class:`SessionTab`s to reopen.
+        :type tabs: list
+        :param active: The index in the tabs of the tab to make the current tab, or -1 for the first tab.
+        :type active: int
+        :return: True if any tab was reopened.
+        :rtype: bool
+        """
+        first = self.count() - 1
+        for tab in tabs:
+            self.create_lazy_tab(tab.url, tab.title, history=tab.history)
+        if tabs:
+            self.setCurrentIndex(first + max(active, 0))
+        return bool(tabs)
+
+    def set_memory_budget(self, megabytes: int) -> None:
+        """
+        Sets how much memory the web pages in this :class:`TabWidget` may use before the least recently used
+        background tabs are discarded. Discarded tabs keep their history and scroll position and reload when they are
+        next shown.
+
+        :param megabytes: The memory budget in megabytes, or 0 to never discard tabs.
+        :type megabytes: int
+        """
+        self._memory_budget = megabytes * 1024 * 1024
+        if self._memory_budget > 0:
+            self._memory_timer.start()
+        else:
+            self._memory_timer.stop()
+
+    def discard_background_tabs(self) -> None:
+        """
+        Discards the least recently used background tabs until the web pages fit within the memory budget. Tabs that
+        are playing audio are never discarded.
+        """
+        if self._memory_budget <= 0:
+            return
+
+        # Renderers can be shared between pages, so share each renderer's memory between its pages.
+        views = [self.widget(i) for i in range(self.count() - 1)]
+        views = [view for view in views if isinstance(view, WebView) and not self._is_discarded(view)]
+        pids = {}
+        for view in views:
+            pid = view.page().renderProcessPid() if hasattr(view.page(), "renderProcessPid") else 0
+            pids.setdefault(pid, []).append(view)
+
+        usage = {}
+        for pid, pid_views in pids.items():
+            memory = get_resident_memory(pid) if pid > 0 else None
+            if memory is None:
+                memory = self.ESTIMATED_WEBVIEW_MEMORY * len(pid_views)
+            for view in pid_views:
+                usage[view] = memory / len(pid_views)
+
+        total = sum(usage.values())
+        current = self.currentWidget()
+        candidates = sorted((view for view in views if view is not current and not view.page().recentlyAudible()),
+                            key=lambda view: self._last_activated.get(view, 0))
+        for view in candidates:
+            if total <= self._memory_budget:
+                break
+            total -= usage[view]
+            self._discard_tab(self._get_tab_index(view))
+
+    def add_client_tab(self, window_id: int, title: str) -> ClientContainer:
+        """
+        Creates a new tab showing the application window with the given id and makes it the current tab.
+
+        :param window_id: The id of the application's window.
+        :type window_id: int
+        :param title: The title of the application's window.
+        :type title: str
+        :return: The :class:`ClientContainer` created.
+        :rtype: ClientContainer
+        """
+        container = ClientContainer(window_id, title, self)
+        self._client_containers[window_id] = container
+        index = self.insertTab(self.count() - 1, container, title or self.tr("(Untitled)"))
+        self.setTabToolTip(index, title)
+        self.setCurrentIndex(index)
+        self._update_search_index(container)
+        return container
+
+    def set_client_title(self, window_id: int, title: str) -> None:
+        """
+        Updates the tab of the application window with the given id with the window's new title.
+
+        :param window_id: The id of the application's window.
+        :type window_id: int
+        :param title: The new title of the window.
+        :type title: str
+        """
+        container = self._client_containers.get(window_id)
+        if container is not None:
+            container.set_title(title)
+            index = self._get_tab_index(container)
+            self.setTabText(index, title)
+            self.setTabToolTip(index, title)
+            self._update_search_index(container)
+            if index == self.currentIndex():
+                self.signal_title_changed.emit(title)
+
+    def remove_client_tab(self, window_id: int) -> None:
+        """
+        Removes the tab of the application window with the given id, normally because the window was destroyed.
+
+        :param window_id: The id of the application's window.
+        :type window_id: int
+        """
+        container = self._client_containers.pop(window_id, None)
+        if container is not None:
+            self._last_activated.pop(container, None)
+            self.removeTab(self._get_tab_index(container))
+            container.deleteLater()
+
+            # Don't leave the new tab button as the current tab.
+            if self.count() == 1:
+                self.create_tab()
+            elif self.currentIndex() == self.count() - 1:
+                self.previous_tab()
+
     def reload_all_tabs(self) -> None:
         """
         Calls :method:`reload()` method of each :class:`WebView` in this :class:`TabWidget`.
@@ -139,9 +378,11 @@ class TabWidget(QTabWidget):
         :type index: int
         """
         widget = self.widget(index)
-        if isinstance(widget, WebView):
+        if isinstance(widget, (WebView, PlaceholderTab)):
             # Check if the widget has focus before removing it.
             had_focus = widget.hasFocus()
+            self._last_activated.pop(widget, None)
+            self._opening_tabs.pop(widget, None)
             self.removeTab(index)
             widget.deleteLater()
 
@@ -154,6 +395,9 @@ class TabWidget(QTabWidget):
             # Make a new tab if the last tab was removed.
             if self.count() == 1:
                 self.create_tab()
+        elif isinstance(widget, ClientContainer):
+            # Ask the application to close; its tab is removed once its window is destroyed.
+            self.signal_client_close_requested.emit(widget.get_window_id())
         else:
             self._logger.warning("Cannot close a tab that is not a WebView")
 
@@ -168,6 +412,9 @@ class TabWidget(QTabWidget):
         if isinstance(widget, WebView):
             new_tab = self.create_tab()
             new_tab.setUrl(widget.url())
+        elif isinstance(widget, PlaceholderTab):
+            new_tab = self.create_tab()
+            new_tab.setUrl(widget.get_url())
         else:
             self._logger.warning("Cannot clone a tab that is not a WebView")
 
@@ -229,6 +476,210 @@ class TabWidget(QTabWidget):
         if isinstance(widget, WebView):
             widget.reload()
 
+    def tabInserted(self, index: int) -> None:
+        """
+        Marks the tab index registry as out of date after a tab was inserted.
+
+        :param index: The index of the new tab.
+        :type index: int
+        """
+        super().tabInserted(index)
+        self._tab_indexes = None
+
+        if self._session_journal is not None:
+            self._open_session_tab(self.widget(index))
+            self._save_session_order()
+
+    def tabRemoved(self, index: int) -> None:
+        """
+        Marks the tab index registry as out of date after a tab was removed.
+
+        :param index: The index the tab was removed from.
+        :type index: int
+        """
+        super().tabRemoved(index)
+        self._tab_indexes = None
+
+        # The journal closes the tabs that are no longer in the order.
+        if self._session_journal is not None:
+            self._save_session_order()
+
+        # Forget the tabs that are gone from the search index.
+        if self._searchable_tabs:
+            widgets = {self.widget(i) for i in range(self.count())}
+            for widget in self._searchable_tabs - widgets:
+                self._searchable_tabs.discard(widget)
+                self._search_index.remove(KIND_TAB, widget)
+
+    def _get_tab_index(self, widget: QWidget) -> int:
+        """
+        Returns the index of the tab holding the given widget. Unlike :method:`indexOf()`, this does not scan the tabs;
+        the registry is only rebuilt after tabs are inserted, removed, or moved, so the many signals a loading page
+        sends each cost a dictionary lookup.
+
+        :param widget: The widget to find.
+        :type widget: QWidget
+        :return: The index of the widget's tab or -1 if it has no tab.
+        :rtype: int
+        """
+        if self._tab_indexes is None:
+            self._tab_indexes = {self.widget(i): i for i in range(self.count())}
+        return self._tab_indexes.get(widget, -1)
+
+    def _open_session_tab(self, widget: QWidget) -> None:
+        """
+        Starts saving the given tab's widget in the session journal, unless it is not a web tab or already saved.
+
+        :param widget: The widget in the tab.
+        :type widget: QWidget
+        """
+        if self._session_journal.has_tab(widget):
+            return
+        if isinstance(widget, WebView):
+            self._session_journal.open_tab(widget, widget.url(), widget.title())
+        elif isinstance(widget, PlaceholderTab):
+            self._session_journal.open_tab(widget, widget.get_url(), widget.get_title(), widget.get_history())
+
+    def _save_session_order(self) -> None:
+        """
+        Saves the order of the tabs in the session journal.
+        """
+        self._session_journal.set_order([self.widget(i) for i in range(self.count() - 1)])
+
+    def _update_search_index(self, widget: QWidget) -> None:
+        """
+        Puts the current title and URL of the given tab's widget in the search index.
+
+        :param widget: The widget in the tab.
+        :type widget: QWidget
+        """
+        if self._search_index is None:
+            return
+
+        if isinstance(widget, WebView):
+            title, url = widget.title(), widget.url().toDisplayString()
+        elif isinstance(widget, PlaceholderTab):
+            title, url = widget.get_title(), widget.get_url().toDisplayString()
+        elif isinstance(widget, ClientContainer):
+            title, url = widget.get_title(), ""
+        else:
+            return
+        self._search_index.add(KIND_TAB, widget, title, url)
+        self._searchable_tabs.add(widget)
+
+    def _create_webview(self) -> WebView:
+        """
+        Creates a new :class:`WebView` with a new :class:`WebPage` and listens for its changes.
+
+        :return: The :class:`WebView` created.
+        :rtype: WebView
+        """
+        # Create the new WebView and WebPage.
+        webview = WebView(self)
+        if self._profile is None:
+            self._profile = QWebEngineProfile.defaultProfile()
+        webpage = WebPage(self._profile, webview)
+        webview.set_page(webpage)
+
+        # Listen for WebView changes. The slots find the view with sender(), so every tab shares the same slots.
+        webview.titleChanged.connect(self._on_webview_title_changed)
+        webview.urlChanged.connect(self._on_webview_url_changed)
+        webview.loadProgress.connect(self._on_webview_load_progress_changed)
+        webview.loadFinished.connect(self._on_webview_load_finished)
+        webview.signal_favicon_changed.connect(self._on_webview_favicon_changed)
+        webview.signal_webaction_state_changed.connect(self._on_webview_webaction_state_changed)
+        webview.signal_dev_tools_requested.connect(self.signal_dev_tools_requested)
+
+        # Listen for WebPage changes.
+        webpage.linkHovered.connect(self._on_webpage_link_hovered)
+        webpage.windowCloseRequested.connect(self._on_webpage_window_close_requested)
+
+        return webview
+
+    def _is_private(self) -> bool:
+        """
+        Returns whether the tabs use an off the record profile. The default profile is never off the record.
+
+        :return: True if nothing about the tabs may be saved.
+        :rtype: bool
+        """
+        return self._profile is not None and self._profile.isOffTheRecord()
+
+    def _is_discarded(self, webview: WebView) -> bool:
+        """
+        Returns whether the given :class:`WebView`'s page was discarded in place.
+
+        :param webview: The view to check.
+        :type webview: WebView
+        :return: True if the page is discarded.
+        :rtype: bool
+        """
+        page = webview.page()
+        return hasattr(page, "lifecycleState") and page.lifecycleState() == QWebEnginePage.LifecycleState.Discarded
+
+    def _discard_tab(self, index: int) -> None:
+        """
+        Frees the memory of the background tab at the given index. When the web engine supports lifecycle states the
+        page is discarded in place and reloads itself when shown again. Otherwise the :class:`WebView` is replaced by a
+        :class:`PlaceholderTab` that remembers its history and scroll position.
+
+        :param index: The index of the tab to discard.
+        :type index: int
+        """
+        webview = self.widget(index)
+        page = webview.page()
+        self._logger.debug("Discarding tab {}: {}".format(index, webview.url().toDisplayString()))
+
+        if hasattr(page, "setLifecycleState"):
+            page.setLifecycleState(QWebEnginePage.LifecycleState.Discarded)
+            return
+
+        placeholder = PlaceholderTab(webview.url(), webview.title(), webview.get_favicon(), webview.save_history(),
+                                     page.scrollPosition(), parent=self)
+        if self._session_journal is not None:
+            self._session_journal.replace_tab(webview, placeholder)
+        self.blockSignals(True)
+        self.insertTab(index, placeholder, self.tabIcon(index), self.tabText(index))
+        self.setTabToolTip(index, self.tabToolTip(index + 1))
+        self.tabBar().setTabData(index, webview.url())
+        self.removeTab(index + 1)
+        self.blockSignals(False)
+        self._last_activated[placeholder] = self._last_activated.pop(webview, 0)
+        self._update_search_index(placeholder)
+        webview.deleteLater()
+
+    def _materialize_tab(self, index: int) -> WebView:
+        """
+        Replaces the :class:`PlaceholderTab` at the given index with a real :class:`WebView` that loads the
+        placeholder's URL.
+
+        :param index: The index of the placeholder tab.
+        :type index: int
+        :return: The :class:`WebView` that replaced the placeholder.
+        :rtype: WebView
+        """
+        placeholder = self.widget(index)
+        webview, _ = self._webview_pool.take()
+        if self._session_journal is not None:
+            self._session_journal.replace_tab(placeholder, webview)
+
+        # Swap the widgets without telling listeners about the tab briefly changing.
+        self.blockSignals(True)
+        self.insertTab(index, webview, self.tabIcon(index + 1), self.tabText(index + 1))
+        self.setTabToolTip(index, self.tabToolTip(index + 1))
+        self.tabBar().setTabData(index, placeholder.get_url())
+        self.removeTab(index + 1)
+        self.setCurrentIndex(index)
+        self.blockSignals(False)
+        placeholder.deleteLater()
+
+        self._last_activated.pop(placeholder, None)
+        if placeholder.get_history() is not None:
+            webview.restore_history(placeholder.get_history(), placeholder.get_scroll_position())
+        else:
+            webview.page().setUrl(placeholder.get_url())
+        return webview
+
     def _on_current_tab_changed(self, index: int) -> None:
         """
         Callback for when the current tab in the :class:`TabWidget` changes. This updates listeners as to the current
@@ -250,6 +701,11 @@ class TabWidget(QTabWidget):
         if index >= 0:
             # Make a new web page and focus it.
             view = self.widget(index)  # This should be a WebView.
+            if isinstance(view, PlaceholderTab):
+                view = self._materialize_tab(index)
+            self._last_activated[view] = monotonic()
+            if self._session_journal is not None:
+                self._session_journal.set_active(view)
             if isinstance(view, WebView):
                 if not view.url().isEmpty():
                     view.setFocus()
@@ -263,16 +719,35 @@ class TabWidget(QTabWidget):
                 forward_state = view.is_webaction_enabled(WebPage.Forward)
                 stop_state = view.is_webaction_enabled(WebPage.Stop)
                 reload_state = view.is_webaction_enabled(WebPage.Reload)
+            elif isinstance(view, ClientContainer):
+                title = view.get_title()
+                reload_state = False
 
-        # Notify listeners of tab values.
+        # Notify listeners of tab values. Queued updates belong to the previous tab, so drop them.
+        self._dispatcher.clear()
         self.signal_title_changed.emit(title)
-        self.signal_load_progress_changed.emit(load_progress)
+        self._dispatcher.send("progress", self.signal_load_progress_changed.emit, load_progress)
         self.signal_url_changed.emit(url)
         self.signal_favicon_changed.emit(favicon)
-        self.signal_webaction_state_changed.emit(WebPage.Back, back_state)
-        self.signal_webaction_state_changed.emit(WebPage.Forward, forward_state)
-        self.signal_webaction_state_changed.emit(WebPage.Stop, stop_state)
-        self.signal_webaction_state_changed.emit(WebPage.Reload, reload_state)
+        self._dispatcher.send(WebPage.Back, self.signal_webaction_state_changed.emit, WebPage.Back, back_state)
+        self._dispatcher.send(WebPage.Forward, self.signal_webaction_state_changed.emit, WebPage.Forward,
+                              forward_state)
+        self._dispatcher.send(WebPage.Stop, self.signal_webaction_state_changed.emit, WebPage.Stop, stop_state)
+        self._dispatcher.send(WebPage.Reload, self.signal_webaction_state_changed.emit, WebPage.Reload, reload_state)
+        self._dispatcher.send("link", self.signal_link_hovered.emit, "")
+
+    def _on_tab_moved(self, from_index: int, to_index: int) -> None:
+        """
+        Marks the tab index registry as out of date and saves the new order after a tab was dragged to a new position.
+
+        :param from_index: The index the tab was moved from.
+        :type from_index: int
+        :param to_index: The index the tab was moved to.
+        :type to_index: int
+        """
+        self._tab_indexes = None
+        if self._session_journal is not None:
+            self._save_session_order()
 
     def _on_context_menu_requested(self, point: QPoint) -> None:
         """
@@ -302,77 +777,130 @@ class TabWidget(QTabWidget):
         # Show the new menu.
         menu.exec(QCursor.pos())
 
-    def _on_webview_title_changed(self, title: str, webview: WebView) -> None:
+    @pyqtSlot(str)
+    def _on_webview_title_changed(self, title: str) -> None:
         """
         Updates the tab's title and tooltip text with the given title.
 
         :param title: The new title for this tab.
         :type title: str
-        :param webview: The :class:`WebView` whose title was changed.
-        :type webview: WebView
         """
-        index = self.indexOf(webview)
+        webview = self.sender()
+        index = self._get_tab_index(webview)
 
         # Update the tab text if this widget has a tab.
         if index >= 0:
             self.setTabText(index, title)
             self.setTabToolTip(index, title)
+            self._update_search_index(webview)
+
+        # Save the title of the tab in the session.
+        if self._session_journal is not None:
+            self._session_journal.set_title(webview, title)
+
+        # Remember the title of the page in the history.
+        if self._history_store is not None:
+            self._history_store.set_title(webview.url(), title)
 
         # Notify listeners of a title change if this widget is the current widget.
         if index == self.currentIndex():
             self.signal_title_changed.emit(title)
 
-    def _on_webview_url_changed(self, url: QUrl, webview: WebView) -> None:
+    @pyqtSlot(QUrl)
+    def _on_webview_url_changed(self, url: QUrl) -> None:
         """
         Updates the tab with the given :class:`QUrl`.
 
         :param url: The :class:`QUrl` the :class:`WebView` was changed to.
         :type url: QUrl
-        :param webview: The :class:`WebView` that had its URL changed.
-        :type webview: WebView
         """
-        index = self.indexOf(webview)
+        webview = self.sender()
+        index = self._get_tab_index(webview)
 
         # Update the tab data with the new URL.
         if index >= 0:
             self.tabBar().setTabData(index, url)
+            self._update_search_index(webview)
+
+        # Save the URL of the tab in the session.
+        if self._session_journal is not None:
+            self._session_journal.set_url(webview, url)
+
+        # Record the visit in the history.
+        if self._history_store is not None and not url.isEmpty():
+            self._history_store.add_visit(url)
 
         # Notify listeners of the URL change.
         if index == self.currentIndex():
             self.signal_url_changed.emit(url)
 
-    def _on_webview_load_progress_changed(self, progress: int, webview: WebView) -> None:
+    @pyqtSlot(int)
+    def _on_webview_load_progress_changed(self, progress: int) -> None:
         """
         Notifies listeners that the load progress percentage has changed.
 
         :param progress: The load progress in percent out of 100.
         :type progress: int
-        :param webview: The :class:`WebView` whose load progress has changed.
-        :type webview: WebView
         """
-        if self.currentIndex() == self.indexOf(webview):
-            self.signal_load_progress_changed.emit(progress)
+        webview = self.sender()
+        if self.currentIndex() == self._get_tab_index(webview):
+            self._dispatcher.post("progress", self.signal_load_progress_changed.emit, progress)
+
+    @pyqtSlot(bool)
+    def _on_webview_load_finished(self, success: bool) -> None:
+        """
+        Logs how long a new tab took to load its first page, and whether its view came warm from the pool.
+
+        :param success: Whether the page loaded.
+        :type success: bool
+        """
+        webview = self.sender()
+        if webview in self._opening_tabs and webview.url() != QUrl("about:blank"):
+            opened, is_warm = self._opening_tabs.pop(webview)
+            self._logger.debug("New tab loaded after {:.1f} ms with a {} renderer".format(
+                (perf_counter() - opened) * 1000, "warm" if is_warm else "cold"))
 
-    def _on_webview_favicon_changed(self, icon: QIcon, webview: WebView) -> None:
+    @pyqtSlot(QIcon)
+    def _on_webview_favicon_changed(self, icon: QIcon) -> None:
         """
         Notifies listeners that the :class:`QIcon` of this tab has been changed.
 
         :param icon: The new :class:`QIcon` for this tab.
         :type icon: QIcon
-        :param webview: The :class:`WebView` whose icon just changed.
-        :type webview: WebView
         """
-        index = self.indexOf(webview)
+        webview = self.sender()
+        index = self._get_tab_index(webview)
 
         # Update this tab's icon with the new icon.
         if index >= 0:
             self.setTabIcon(index, icon)
 
+        # Remember the site's favicon. When a load starts the view can still have the last page's icon, so wait for
+        # the page's own.
+        if self._icon_cache is not None and webview.get_load_progress() > 0 and not self._is_private():
+            self._icon_cache.set_icon(webview.url(), webview.icon())
+
         # Notify listeners of the icon change.
         if self.currentIndex() == index:
             self.signal_favicon_changed.emit(icon)
 
-    def _on_webview_webaction_state_changed(self, webaction: WebPage.WebAction, state: bool, webview: WebView) -> None:
+    def _on_icon_ready(self, origin: str, icon: QIcon) -> None:
+        """
+        Shows a site's icon from the :class:`IconCache` on the lazy tabs of the site.
+
+        :param origin: The origin of the site.
+        :type origin: str
+        :param icon: The icon of the site.
+        :type icon: QIcon
+        """
+        for index in range(self.count() - 1):
+            widget = self.widget(index)
+            if isinstance(widget, PlaceholderTab) and get_origin(widget.get_url()) == origin:
+                widget.set_favicon(icon)
+                self.setTabIcon(index, icon)
+
+    @pyqtSlot(WebPage.WebAction, bool)
+    def _on_webview_webaction_state_changed(self, webaction: WebPage.WebAction, state: bool) -> None:
         """
         Notifies listeners of state changes in the given :class:`WebPage.WebAction`.
 
@@ -380,31 +908,29 @@ class TabWidget(QTabWidget):
         :type webaction: WebPage.WebAction
         :param state: The current state of the action. If this is False then the action is disabled.
         :type state: bool
-        :param webview: The :class:`WebView` whose :class:`WebPage` has an action whose state has changed.
-        :type webview: WebView
         """
-        if self.currentIndex() == self.indexOf(webview):
-            self.signal_webaction_state_changed.emit(webaction, state)
+        webview = self.sender()
+        if self.currentIndex() == self._get_tab_index(webview):
+            self._dispatcher.post(webaction, self.signal_webaction_state_changed.emit, webaction, state)
 
-    def _on_webpage_link_hovered(self, url: str, webview: WebView) -> None:
+    @pyqtSlot(str)
+    def _on_webpage_link_hovered(self, url: str) -> None:
         """
         Notifies listeners when a :class:`WebPage` has a hyperlink that is being hovered over by the mouse.
 
         :param url: The URL of the hyperlink that is being hovered as a string.
         :type url: str
-        :param webview: The :class:`WebView` whose link is being hovered over.
-        :type webview: WebView
         """
-        if self.currentIndex() == self.indexOf(webview):
-            self.signal_link_hovered.emit(url)
+        webview = self.sender().view()
+        if self.currentIndex() == self._get_tab_index(webview):
+            self._dispatcher.post("link", self.signal_link_hovered.emit, url)
 
-    def _on_webpage_window_close_requested(self, webview: WebView) -> None:
+    @pyqtSlot()
+    def _on_webpage_window_close_requested(self) -> None:
         """
-        Closes the tab containing the given :class:`WebView`.
-
-        :param webview: The :class:`WebView` whose tab is being closed.
-        :type webview: WebView
+        Closes the tab containing the :class:`WebView` whose :class:`WebPage` asked to be closed.
         """
-        index = self.indexOf(webview)
+        webview = self.sender().view()
+        index = self._get_tab_index(webview)
         if 0 <= index < self.count() - 1:
             self.close_tab(index)
@@ -1,8 +1,15 @@
 from sys import exit
-from PyQt5.QtCore import QUrl, pyqtSignal, QDir
-from PyQt5.QtWidgets import QWidget, QToolBar, QToolButton, QSizePolicy, QLineEdit, QStyle, QMenu, QAction, QMessageBox
-from PyQt5.QtGui import QPaintEvent
+from PyQt5.QtCore import Qt, QUrl, pyqtSignal, QDir, QModelIndex, QTimer
+from PyQt5.QtWidgets import QWidget, QToolBar, QToolButton, QSizePolicy, QLineEdit, QStyle, QMenu, QAction, \
+    QMessageBox, QCompleter
+from PyQt5.QtGui import QPaintEvent, QIcon
 from orchid.widgets.web import WebPage
+from orchid.widgets.suggestions import SuggestionModel
+from orchid.search import SearchIndex, SearchResult, KIND_TAB, KIND_BOOKMARK
+from orchid.search.incremental import IncrementalSearch
+from orchid.io.history import HistoryStore, strip_url
+from orchid.io import FileManager
+from orchid.io.icons import IconCache, get_origin
 
 
 class SearchBar(QToolBar):
@@ -14,6 +21,7 @@ class SearchBar(QToolBar):
     signal_webpage_action = pyqtSignal(WebPage.WebAction)
     signal_browser_home_pressed = pyqtSignal(QUrl)
     signal_file_home_pressed = pyqtSignal(QUrl)
+    signal_tab_requested = pyqtSignal(QWidget)
 
     def __init__(self, parent: QWidget = None) -> None:
         """
@@ -27,6 +35,11 @@ class SearchBar(QToolBar):
 
         self._webactions = {}
         self._percent = 0
+        self._search_index = None
+        self._search = None
+        self._is_suggestion_activated = False
+        self._history_store = None
+        self._typed_length = 0  # How much of the search bar's text the user typed, to only complete while typing.
 
         # Configure tool bar.
         self.setMovable(False)
@@ -76,8 +89,18 @@ class SearchBar(QToolBar):
         self._search_bar.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Maximum)
         self._search_bar.setClearButtonEnabled(True)
         self._search_bar.returnPressed.connect(self._on_return_pressed)
+        self._search_bar.textEdited.connect(self._on_text_edited)
         self.addWidget(self._search_bar)
 
+        # Suggestions popup. The search index ranks the suggestions, so the completer shows them as they are.
+        self._suggestions = SuggestionModel(self)
+        completer = QCompleter(self._suggestions, self)
+        completer.setCompletionMode(QCompleter.UnfilteredPopupCompletion)
+        completer.setMaxVisibleItems(10)
+        completer.popup().setUniformItemSizes(True)  # Lets the view only lay out the rows that are visible.
+        completer.activated[QModelIndex].connect(self._on_suggestion_activated)
+        self._search_bar.setCompleter(completer)
+
         # File home button.
         button = QToolButton(self)
         button.setIcon(self.style().standardIcon(QStyle.SP_DirHomeIcon))
@@ -118,6 +141,41 @@ class SearchBar(QToolBar):
         menu.addAction(action)
         button.setMenu(menu)
 
+    def set_search_index(self, search_index: SearchIndex) -> None:
+        """
+        Sets the :class:`SearchIndex` to look up what the user types in.
+
+        :param search_index: The index to search, or None to only open what is typed as a URL.
+        :type search_index: SearchIndex
+        """
+        self._search_index = search_index
+        if self._search is not None:
+            self._search.cancel()
+            self._search.deleteLater()
+            self._search = None
+
+        if search_index is not None:
+            self._search = IncrementalSearch(search_index, parent=self)
+            self._search.signal_results_ready.connect(self._on_search_results_ready)
+
+    def set_history_store(self, history_store: HistoryStore) -> None:
+        """
+        Sets the :class:`HistoryStore` whose most frecent page is completed inline while a URL is typed.
+
+        :param history_store: The history to complete URLs from, or None to not complete URLs.
+        :type history_store: HistoryStore
+        """
+        self._history_store = history_store
+
+    def set_icon_cache(self, icon_cache: IconCache) -> None:
+        """
+        Sets the :class:`IconCache` the icons of suggested sites are looked up in.
+
+        :param icon_cache: The cache to look icons up in.
+        :type icon_cache: IconCache
+        """
+        self._suggestions.set_icon_cache(icon_cache)
+
     def set_url(self, url: QUrl) -> None:
         """
         Shows the given :class:`QUrl` in the search bar.
@@ -190,12 +248,127 @@ class SearchBar(QToolBar):
 
     def _on_return_pressed(self) -> None:
         """
-        Signals that return was pressed with the :class:`QUrl` from the search bar at the time of the press.
+        Opens what the user typed. Text that looks like a URL or a path is opened as is; anything else is looked up in
+        the search index and the best match is opened, switching to it if it is an open tab.
         """
-        url = QUrl.fromUserInput(self._search_bar.text())
+        # The completer already opened the suggestion this return press picked.
+        if self._is_suggestion_activated:
+            self._is_suggestion_activated = False
+            return
+
+        if self._search is not None:
+            self._search.cancel()
+        self._search_bar.completer().popup().hide()
+
+        text = self._search_bar.text().strip()
+        if self._search_index is not None and not self._is_location(text):
+            results = self._search_index.search(text, 1)
+            if results:
+                self._open_result(results[0])
+                return
+
+        url = QUrl.fromUserInput(text)
         if url is not None:
             self.signal_return_pressed.emit(url)
 
+    def _on_text_edited(self, text: str) -> None:
+        """
+        Looks up suggestions for what the user is typing.
+
+        :param text: The text in the search bar.
+        :type text: str
+        """
+        is_typing = len(text) > self._typed_length
+        self._typed_length = len(text)
+        if is_typing:
+            self._complete_url(text)
+
+        if self._search is None:
+            return
+        if text.strip():
+            self._search.set_query(text)
+        else:
+            self._search.cancel()
+            self._suggestions.set_results([])
+
+    def _complete_url(self, text: str) -> None:
+        """
+        Completes the URL being typed with the most frecent page in the history that starts with it. The completed
+        part is selected so typing on replaces it.
+
+        :param text: The text typed in the search bar.
+        :type text: str
+        """
+        if self._history_store is None or not text or any(c.isspace() for c in text):
+            return
+
+        matches = self._history_store.get_prefix_matches(text, 1)
+        if matches:
+            stripped = strip_url(matches[0].url)
+            completion = text + stripped[len(strip_url(text)):]
+            if completion != text:
+                self._search_bar.setText(completion)
+                self._search_bar.setSelection(len(text), len(completion) - len(text))
+
+    def _on_search_results_ready(self, results: list) -> None:
+        """
+        Shows the suggestions found for what the user typed.
+
+        :param results: The :class:`SearchResult`s found, best first.
+        :type results: list
+        """
+        self._suggestions.set_results(results)
+        completer = self._search_bar.completer()
+        if results and self._search_bar.hasFocus():
+            completer.complete()
+        else:
+            completer.popup().hide()
+
+    def _on_suggestion_activated(self, index: QModelIndex) -> None:
+        """
+        Opens the suggestion the user picked from the popup.
+
+        :param index: The index of the suggestion in the model.
+        :type index: QModelIndex
+        """
+        result = self._suggestions.get_result(index.row())
+        if result is not None:
+            self._open_result(result)
+
+            # When return picked the suggestion, the search bar sees the same key press right after, so ignore it.
+            self._is_suggestion_activated = True
+            QTimer.singleShot(0, self._on_suggestion_handled)
+
+    def _on_suggestion_handled(self) -> None:
+        """
+        Stops ignoring return presses once the one that picked a suggestion, if any, has been seen.
+        """
+        self._is_suggestion_activated = False
+
+    def _open_result(self, result: SearchResult) -> None:
+        """
+        Switches to the given result if it is an open tab and otherwise opens it in the current tab.
+
+        :param result: The result to open.
+        :type result: SearchResult
+        """
+        if result.kind == KIND_TAB:
+            self.signal_tab_requested.emit(result.key)
+        else:
+            self.signal_return_pressed.emit(QUrl.fromUserInput(result.url))
+
+    @staticmethod
+    def _is_location(text: str) -> bool:
+        """
+        Returns whether the given text looks like a URL or a path rather than something to search for.
+
+        :param text: The text typed in the search bar.
+        :type text: str
+        :return: True if the text should be opened as is.
+        :rtype: bool
+        """
+        return bool(text) and not any(c.isspace() for c in text) and ("." in text or ":" in text or "/" in text)
+
     def _on_empty_trash_pressed(self) -> None:
         """
         Called when the user presses the "empty trash" menu item. This prompts for confirmation and then deletes all
@@ -232,13 +405,84 @@ class BookmarksBar(QToolBar):
         super().__init__(parent)
         tr = self.tr
 
+        # The title and URL of each bookmark, from the settings file, which is already loaded at startup.
+        self._bookmarks = self._load_bookmarks() or [(tr("google.com"), QUrl("https://www.google.com"))]
+
         # Configure tool bar.
         self.setMovable(False)
 
-        button = QToolButton(self)
-        button.setText(tr("google.com"))
-        button.setSizePolicy(QSizePolicy.Maximum, QSizePolicy.Maximum)
-        self.addWidget(button)
+        self._buttons = []  # The URL and button of each bookmark.
+        for title, url in self._bookmarks:
+            button = QToolButton(self)
+            button.setText(title)
+            button.setToolTip(url.toDisplayString())
+            button.setToolButtonStyle(Qt.ToolButtonTextBesideIcon)
+            button.setSizePolicy(QSizePolicy.Maximum, QSizePolicy.Maximum)
+            self.addWidget(button)
+            self._buttons.append((url, button))
+
+    def set_icon_cache(self, icon_cache: IconCache) -> None:
+        """
+        Shows the icon of each bookmarked site from the given :class:`IconCache`, as soon as it is decoded.
+
+        :param icon_cache: The cache to look icons up in.
+        :type icon_cache: IconCache
+        """
+        icon_cache.signal_icon_ready.connect(self._on_icon_ready)
+        for url, button in self._buttons:
+            icon = icon_cache.get_icon(url)
+            if icon is not None:
+                button.setIcon(icon)
+
+    def set_search_index(self, search_index: SearchIndex) -> None:
+        """
+        Puts the bookmarks in the given :class:`SearchIndex` so the omni-search can find them. The index entries are
+        keyed by the bookmark's URL.
+
+        :param search_index: The index to put the bookmarks in.
+        :type search_index: SearchIndex
+        """
+        for title, url in self._bookmarks:
+            search_index.add(KIND_BOOKMARK, url.toString(), title, url.toDisplayString())
+
+    @staticmethod
+    def _load_bookmarks() -> list:
+        """
+        Returns the bookmarks in the settings file, a "bookmarks" list of objects with a "url" and an optional "title".
+        Bookmarks without a valid URL are skipped.
+
+        :return: The title and :class:`QUrl` of each bookmark.
+        :rtype: list
+        """
+        settings = FileManager().get_cached_json(FileManager().get_settings_file())
+        bookmarks = settings.get("bookmarks") if isinstance(settings, dict) else None
+        if not isinstance(bookmarks, list):
+            return []
+
+        result = []
+        for bookmark in bookmarks:
+            if not isinstance(bookmark, dict) or not isinstance(bookmark.get("url"), str):
+                continue
+            url = QUrl.fromUserInput(bookmark["url"])
+            if url.isValid():
+                title = bookmark.get("title")
+                if not isinstance(title, str) or not title:
+                    title = url.host() or url.toDisplayString()
+                result.append((title, url))
+        return result
+
+    def _on_icon_ready(self, origin: str, icon: QIcon) -> None:
+        """
+        Shows a site's icon from the :class:`IconCache` on the bookmarks of the site.
+
+        :param origin: The origin of the site.
+        :type origin: str
+        :param icon: The icon of the site.
+        :type icon: QIcon
+        """
+        for url, button in self._buttons:
+            if get_origin(url) == origin:
+                button.setIcon(icon)
 
 
 class SideBar(QToolBar):
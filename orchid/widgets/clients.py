@@ -0,0 +1,96 @@
+from logging import getLogger
+from time import perf_counter
+from PyQt5.QtCore import QTimer
+from PyQt5.QtGui import QWindow, QShowEvent, QHideEvent
+from PyQt5.QtWidgets import QWidget, QVBoxLayout
+
+
+class ClientContainer(QWidget):
+    """
+    A :class:`QWidget` that shows the window of another application inside :module:`orchid`. The application's window
+    is only mapped while the container is visible, so applications in background tabs stop drawing.
+    """
+
+    def __init__(self, window_id: int, title: str = "", parent: QWidget = None) -> None:
+        """
+        Takes the window with the given id and puts it inside this container.
+
+        :param window_id: The id of the application's window.
+        :type window_id: int
+        :param title: The title of the application's window.
+        :type title: str
+        :param parent: An optional parent widget of this container.
+        :type parent: QWidget
+        """
+        super().__init__(parent)
+        self._logger = getLogger(__name__)
+        self._window_id = window_id
+        self._title = title
+        self._shown_at = None
+
+        # Wrap the foreign window and embed it.
+        self._window = QWindow.fromWinId(window_id)
+        container = QWidget.createWindowContainer(self._window, self)
+
+        layout = QVBoxLayout()
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addWidget(container)
+        self.setLayout(layout)
+
+    def get_window_id(self) -> int:
+        """
+        Returns the id of the application window in this container.
+
+        :return: The id of the window.
+        :rtype: int
+        """
+        return self._window_id
+
+    def get_title(self) -> str:
+        """
+        Returns the title of the application window in this container.
+
+        :return: The title of the window.
+        :rtype: str
+        """
+        return self._title
+
+    def set_title(self, title: str) -> None:
+        """
+        Sets the title of the application window in this container.
+
+        :param title: The new title of the window.
+        :type title: str
+        """
+        self._title = title
+
+    def showEvent(self, event: QShowEvent) -> None:
+        """
+        Maps the application window now that its tab is visible and measures how long the remap takes.
+
+        :param event: The show event.
+        :type event: QShowEvent
+        """
+        super().showEvent(event)
+        self._shown_at = perf_counter()
+        self._window.show()
+        QTimer.singleShot(0, self._on_remapped)
+
+    def hideEvent(self, event: QHideEvent) -> None:
+        """
+        Unmaps the application window so it stops drawing while its tab is hidden.
+
+        :param event: The hide event.
+        :type event: QHideEvent
+        """
+        super().hideEvent(event)
+        self._window.hide()
+
+    def _on_remapped(self) -> None:
+        """
+        Logs how long it took from the tab being shown until the event loop was free again after the remap.
+        """
+        if self._shown_at is not None:
+            self._logger.debug("Remapped window {:#x} in {:.2f} ms".format(self._window_id,
+                                                                         (perf_counter() - self._shown_at) * 1000))
+            self._shown_at = None
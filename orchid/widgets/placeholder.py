@@ -0,0 +1,91 @@
+from PyQt5.QtCore import QUrl, QByteArray, QPointF
+from PyQt5.QtGui import QIcon
+from PyQt5.QtWidgets import QWidget
+
+
+class PlaceholderTab(QWidget):
+    """
+    A lightweight stand-in for a :class:`WebView` in a tab that has not been looked at yet. It only remembers what the
+    tab needs to show in the tab bar, and the :class:`TabWidget` replaces it with a real :class:`WebView` the first
+    time the tab becomes the current tab.
+    """
+
+    def __init__(self, url: QUrl, title: str = "", icon: QIcon = None, history: QByteArray = None,
+                 scroll_position: QPointF = None, parent: QWidget = None) -> None:
+        """
+        Creates the placeholder.
+
+        :param url: The URL the tab will load once it is shown.
+        :type url: QUrl
+        :param title: The title to show on the tab until the page is loaded.
+        :type title: str
+        :param icon: The icon to show on the tab until the page is loaded.
+        :type icon: QIcon
+        :param history: The navigation history of a discarded :class:`WebView` to restore, as saved by
+        :method:`WebView.save_history()`.
+        :type history: QByteArray
+        :param scroll_position: The scroll position of a discarded :class:`WebView` to restore.
+        :type scroll_position: QPointF
+        :param parent: An optional parent widget of this placeholder.
+        :type parent: QWidget
+        """
+        super().__init__(parent)
+        self._url = url
+        self._title = title
+        self._icon = icon if icon is not None else QIcon()
+        self._history = history
+        self._scroll_position = scroll_position
+
+    def get_url(self) -> QUrl:
+        """
+        Returns the URL the tab will load once it is shown.
+
+        :return: The URL of the tab.
+        :rtype: QUrl
+        """
+        return self._url
+
+    def get_title(self) -> str:
+        """
+        Returns the title of the tab.
+
+        :return: The title of the tab.
+        :rtype: str
+        """
+        return self._title
+
+    def get_favicon(self) -> QIcon:
+        """
+        Returns the icon of the tab.
+
+        :return: The icon of the tab.
+        :rtype: QIcon
+        """
+        return self._icon
+
+    def set_favicon(self, icon: QIcon) -> None:
+        """
+        Changes the icon of the tab, like when the icon of the tab's site is found in the :class:`IconCache`.
+
+        :param icon: The new icon of the tab.
+        :type icon: QIcon
+        """
+        self._icon = icon
+
+    def get_history(self) -> QByteArray:
+        """
+        Returns the saved navigation history of the tab.
+
+        :return: The saved history or None if the tab has none.
+        :rtype: QByteArray
+        """
+        return self._history
+
+    def get_scroll_position(self) -> QPointF:
+        """
+        Returns the saved scroll position of the tab.
+
+        :return: The saved scroll position or None if the tab has none.
+        :rtype: QPointF
+        """
+        return self._scroll_position
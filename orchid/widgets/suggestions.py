@@ -0,0 +1,108 @@
+from PyQt5.QtCore import Qt, QAbstractListModel, QModelIndex, QObject, QUrl
+from PyQt5.QtGui import QIcon
+from PyQt5.QtWidgets import QApplication, QStyle
+from orchid.search import KIND_TAB, KIND_BOOKMARK, KIND_FILE
+from orchid.io.icons import IconCache, get_origin
+
+
+class SuggestionModel(QAbstractListModel):
+    """
+    A list model of the :class:`SearchResult`s suggested for what the user typed in the search bar. The model only
+    hands out the data of the rows a view asks for, so a view with uniform item sizes only does work for the rows that
+    are visible.
+    """
+
+    # The role the SearchResult of a row is returned for.
+    ResultRole = Qt.UserRole
+
+    def __init__(self, parent: QObject = None) -> None:
+        """
+        Creates an empty model.
+
+        :param parent: An optional parent object for this model.
+        :type parent: QObject
+        """
+        super().__init__(parent)
+        self._results = []
+        self._icon_cache = None
+
+        # Show what kind of thing each suggestion is.
+        style = QApplication.style()
+        self._icons = {KIND_TAB: style.standardIcon(QStyle.SP_TitleBarNormalButton),
+                       KIND_BOOKMARK: style.standardIcon(QStyle.SP_DialogYesButton),
+                       KIND_FILE: style.standardIcon(QStyle.SP_FileIcon)}
+        self._default_icon = style.standardIcon(QStyle.SP_BrowserReload)
+
+    def set_icon_cache(self, icon_cache: IconCache) -> None:
+        """
+        Sets the :class:`IconCache` the icons of the suggested sites are looked up in. Suggestions without a cached
+        icon show what kind of thing they are instead.
+
+        :param icon_cache: The cache to look icons up in.
+        :type icon_cache: IconCache
+        """
+        self._icon_cache = icon_cache
+        icon_cache.signal_icon_ready.connect(self._on_icon_ready)
+
+    def set_results(self, results: list) -> None:
+        """
+        Replaces the suggestions.
+
+        :param results: The new :class:`SearchResult`s, best first.
+        :type results: list
+        """
+        self.beginResetModel()
+        self._results = results
+        self.endResetModel()
+
+    def get_result(self, row: int):
+        """
+        Returns the :class:`SearchResult` of the given row.
+
+        :param row: The row of the suggestion.
+        :type row: int
+        :return: The result or None if there is no such row.
+        :rtype: SearchResult
+        """
+        return self._results[row] if 0 <= row < len(self._results) else None
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._results)
+
+    def data(self, index: QModelIndex, role: int = Qt.DisplayRole):
+        result = self.get_result(index.row())
+        if result is None:
+            return None
+
+        if role == Qt.DisplayRole:
+            if result.title and result.url:
+                return "{} - {}".format(result.title, result.url)
+            return result.title or result.url
+        elif role == Qt.EditRole:
+            # What the search bar shows while a suggestion is highlighted.
+            return result.url or result.title
+        elif role == Qt.ToolTipRole:
+            return result.url
+        elif role == Qt.DecorationRole:
+            if self._icon_cache is not None and result.kind != KIND_FILE and result.url:
+                icon = self._icon_cache.get_icon(QUrl(result.url))
+                if icon is not None:
+                    return icon
+            return self._icons.get(result.kind, self._default_icon)
+        elif role == self.ResultRole:
+            return result
+        return None
+
+    def _on_icon_ready(self, origin: str, icon: QIcon) -> None:
+        """
+        Shows a site's icon from the :class:`IconCache` on the suggestions of the site.
+
+        :param origin: The origin of the site.
+        :type origin: str
+        :param icon: The icon of the site.
+        :type icon: QIcon
+        """
+        for row, result in enumerate(self._results):
+            if result.kind != KIND_FILE and result.url and get_origin(QUrl(result.url)) == origin:
+                index = self.index(row)
+                self.dataChanged.emit(index, index, [Qt.DecorationRole])
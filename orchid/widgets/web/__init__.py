@@ -1,4 +1,4 @@
-from PyQt5.QtCore import Qt, pyqtSignal, QObject, QUrl, QRect
+from PyQt5.QtCore import Qt, pyqtSignal, pyqtSlot, QObject, QUrl, QRect, QByteArray, QDataStream, QIODevice, QPointF
 from PyQt5.QtWidgets import QWidget, QDialog, QMessageBox, QStyle, QAction, QLineEdit, QSizePolicy, QVBoxLayout
 from PyQt5.QtGui import QIcon, QContextMenuEvent
 from PyQt5.QtWebEngineCore import QWebEngineRegisterProtocolHandlerRequest
@@ -161,11 +161,15 @@ class WebView(QWebEngineView):
         """
         super().__init__(parent)
         self._load_progress = 100
+        self._scroll_position = None  # A restored scroll position to apply once the page loads.
+        self._webactions = {}  # The page's navigation actions mapped to the web actions they trigger.
+        self._is_warm = False  # Whether the history holds the empty page loaded by warm_up().
         self.loadStarted.connect(self._on_load_started)
         self.loadProgress.connect(self._on_load_progress_changed)
         self.loadFinished.connect(self._on_load_finished)
         self.iconChanged.connect(self._on_favicon_changed)
         self.renderProcessTerminated.connect(self._on_render_process_terminated)
+        self.urlChanged.connect(self._on_url_changed)
 
     def set_page(self, page: WebPage) -> None:
         """
@@ -174,25 +178,12 @@ class WebView(QWebEngineView):
         :param page: The class:`WebPage` that this view should display.
         :type page: WebPage
         """
-        # Forward webaction.
-        webaction = WebPage.Forward
-        action = page.action(webaction)
-        action.changed.connect(lambda webaction=webaction: self._on_webaction_changed(webaction, self.page().action(webaction).isEnabled()))
-
-        # Back webaction.
-        webaction = WebPage.Back
-        action = page.action(webaction)
-        action.changed.connect(lambda webaction=webaction: self._on_webaction_changed(webaction, self.page().action(webaction).isEnabled()))
-
-        # Reload webaction.
-        webaction = WebPage.Reload
-        action = page.action(webaction)
-        action.changed.connect(lambda webaction=webaction: self._on_webaction_changed(webaction, self.page().action(webaction).isEnabled()))
-
-        # Stop webaction.
-        webaction = WebPage.Stop
-        action = page.action(webaction)
-        action.changed.connect(lambda webaction=webaction: self._on_webaction_changed(webaction, self.page().action(webaction).isEnabled()))
+        # Listen for changes to the navigation actions. One slot serves all of them and looks the action up.
+        self._webactions = {}
+        for webaction in (WebPage.Forward, WebPage.Back, WebPage.Reload, WebPage.Stop):
+            action = page.action(webaction)
+            self._webactions[action] = webaction
+            action.changed.connect(self._on_page_action_changed)
 
         super().setPage(page)
 
@@ -242,6 +233,41 @@ class WebView(QWebEngineView):
             # TODO: Make a default favicon.
             return self.style().standardIcon(QStyle.SP_MessageBoxInformation)
 
+    def warm_up(self) -> None:
+        """
+        Loads an empty page so the web engine starts this view's renderer before the view is needed. The empty page
+        is dropped from the history once the view goes somewhere else.
+        """
+        self._is_warm = True
+        self.page().setUrl(QUrl("about:blank"))
+
+    def save_history(self) -> QByteArray:
+        """
+        Returns this view's navigation history in a form that :method:`restore_history()` can restore.
+
+        :return: The serialized history.
+        :rtype: QByteArray
+        """
+        data = QByteArray()
+        stream = QDataStream(data, QIODevice.WriteOnly)
+        stream << self.history()
+        return data
+
+    def restore_history(self, data: QByteArray, scroll_position: QPointF = None) -> None:
+        """
+        Restores the navigation history saved by :method:`save_history()`, which loads the history's current page,
+        and scrolls back to the given position once it has loaded.
+
+        :param data: The serialized history.
+        :type data: QByteArray
+        :param scroll_position: An optional position to scroll to once the page has loaded.
+        :type scroll_position: QPointF
+        """
+        self._scroll_position = scroll_position
+        self._is_warm = False  # The restored history replaces the empty page.
+        stream = QDataStream(data, QIODevice.ReadOnly)
+        stream >> self.history()
+
     def createWindow(self, window_type: WebPage.WebWindowType) -> QWebEngineView:
         """
         Returns a new :class:`QWebEngineView` to display a newly requested page in. This commonly happens when a link
@@ -252,17 +278,18 @@ class WebView(QWebEngineView):
         :return: A :class:`QWebEngineView` that will hold the page being opened.
         :rtype: QWebEngineView
         """
-        tab_widget = self.window().get_tab_widget()
+        tab_widget = self.window().centralWidget()
 
+        # The web engine loads the new page itself, so the new tabs are given no URL.
         if window_type == WebPage.WebBrowserTab:
             # Add a new tab to the main tab widget for the new page.
-            return tab_widget.add_tab()
+            return tab_widget.create_tab(QUrl())
         elif window_type == WebPage.WebBrowserBackgroundTab:
             # Add a new background tab to the main tab widget for the new page.
-            return tab_widget.add_background_tab()
+            return tab_widget.create_background_tab(QUrl())
         elif window_type == WebPage.WebBrowserWindow:
             # Use this view's tab for the new page.
-            return tab_widget.current_tab()
+            return self
         elif window_type == WebPage.WebDialog:
             # Show a popup window for the new page.
             popup_window = PopupWindow(self.page().profile())
@@ -326,6 +353,10 @@ class WebView(QWebEngineView):
         :type success: bool
         """
         self._load_progress = 100 if success else -1
+        if success and self._scroll_position is not None:
+            self.page().runJavaScript("window.scrollTo({}, {});".format(self._scroll_position.x(),
+                                                                        self._scroll_position.y()))
+            self._scroll_position = None
         #self._on_webaction_changed(WebPage.Reload, True)
         #self._on_webaction_changed(WebPage.Stop, False)
         # TODO: Do I need this?
@@ -340,6 +371,18 @@ class WebView(QWebEngineView):
         """
         self.signal_favicon_changed.emit(self.get_favicon())
 
+    def _on_url_changed(self, url: QUrl) -> None:
+        """
+        Drops the empty page loaded by :method:`warm_up()` from the history once the view leaves it, so going back
+        never shows it.
+
+        :param url: The new URL of the view.
+        :type url: QUrl
+        """
+        if self._is_warm and url != QUrl("about:blank"):
+            self._is_warm = False
+            self.history().clear()
+
     def _on_render_process_terminated(self, status: WebPage.RenderProcessTerminationStatus, status_code: int) -> None:
         """
         Shows the user a notification that the page failed to load and checks if they want to try to reload it.
@@ -364,6 +407,16 @@ class WebView(QWebEngineView):
             # TODO: Should this be done in a new thread?
             self.reload()
 
+    @pyqtSlot()
+    def _on_page_action_changed(self) -> None:
+        """
+        Called when one of the page's navigation actions changes. The action is found with :method:`sender()`.
+        """
+        action = self.sender()
+        webaction = self._webactions.get(action)
+        if webaction is not None:
+            self._on_webaction_changed(webaction, action.isEnabled())
+
     def _on_webaction_changed(self, webaction: WebPage.WebAction, state: bool) -> None:
         """
         Notifies listeners that a page's :class:`WebPage.WebAction` has been enabled or disabled.
@@ -0,0 +1,113 @@
+from collections import deque
+from time import monotonic
+from PyQt5.QtCore import QObject, QTimer
+
+
+class WebViewPool(QObject):
+    """
+    Keeps a few hidden :class:`WebView`s whose renderers are already running, so a new tab does not wait for the web
+    engine to start a renderer. Views are made in idle time, one per event loop pass, and the pool grows with how
+    quickly tabs are being opened: a single spare view while tabs are opened now and then, and up to
+    :attr:`MAX_SIZE` while they are opened in a burst.
+    """
+
+    # The fewest and most spare views to keep.
+    MIN_SIZE = 1
+    MAX_SIZE = 4
+
+    # How many seconds of tab openings count towards the pool's size.
+    RATE_WINDOW = 10.0
+
+    # How many milliseconds to wait after the last tab was opened before shrinking the pool.
+    SHRINK_DELAY = 60000
+
+    def __init__(self, create_view, parent: QObject = None) -> None:
+        """
+        Creates an empty pool. Nothing is made until the first view is taken, so the pool never starts the web
+        engine by itself.
+
+        :param create_view: A function that returns a new :class:`WebView` with its :class:`WebPage` set.
+        :param parent: An optional parent object for this pool.
+        :type parent: QObject
+        """
+        super().__init__(parent)
+        self._create_view = create_view
+        self._views = deque()
+        self._taken_times = deque()  # When views were recently taken, oldest first.
+        self.hits = 0
+        self.misses = 0
+
+        self._fill_timer = QTimer(self)
+        self._fill_timer.setInterval(0)
+        self._fill_timer.timeout.connect(self._on_fill_timeout)
+
+        self._shrink_timer = QTimer(self)
+        self._shrink_timer.setSingleShot(True)
+        self._shrink_timer.setInterval(self.SHRINK_DELAY)
+        self._shrink_timer.timeout.connect(self._on_shrink_timeout)
+
+    def take(self) -> tuple:
+        """
+        Takes a warm view out of the pool, or makes a new one if the pool is empty, and refills the pool in idle time.
+
+        :return: The view and whether it came from the pool.
+        :rtype: tuple
+        """
+        now = monotonic()
+        self._taken_times.append(now)
+        while self._taken_times[0] < now - self.RATE_WINDOW:
+            self._taken_times.popleft()
+
+        if self._views:
+            view = self._views.popleft()
+            self.hits += 1
+            is_warm = True
+        else:
+            view = self._create_view()
+            self.misses += 1
+            is_warm = False
+
+        self._fill_timer.start()
+        self._shrink_timer.start()
+        return view, is_warm
+
+    def get_target_size(self) -> int:
+        """
+        Returns how many spare views the pool is filled to, which is one more than the number of tabs opened within
+        :attr:`RATE_WINDOW`, within the pool's limits.
+
+        :return: The number of spare views to keep.
+        :rtype: int
+        """
+        return max(self.MIN_SIZE, min(self.MAX_SIZE, len(self._taken_times) + 1))
+
+    def clear(self) -> None:
+        """
+        Deletes every spare view, which stops their renderers.
+        """
+        self._fill_timer.stop()
+        while self._views:
+            self._views.pop().deleteLater()
+
+    def _on_fill_timeout(self) -> None:
+        """
+        Makes one spare view, so filling the pool never holds up the event loop for long.
+        """
+        if len(self._views) >= self.get_target_size():
+            self._fill_timer.stop()
+            return
+
+        view = self._create_view()
+        view.hide()  # Stay hidden even when the parent is shown, until the view is put in a tab.
+        view.warm_up()
+        self._views.append(view)
+
+    def _on_shrink_timeout(self) -> None:
+        """
+        Deletes the spare views beyond what the current rate of opening tabs needs.
+        """
+        now = monotonic()
+        while self._taken_times and self._taken_times[0] < now - self.RATE_WINDOW:
+            self._taken_times.popleft()
+        while len(self._views) > self.get_target_size():
+            self._views.pop().deleteLater()
@@ -1,9 +1,13 @@
 from typing import Union
 from PyQt5.QtCore import Qt
 from PyQt5.QtWidgets import QWidget, QMainWindow
-from PyQt5.QtWebEngineWidgets import QWebEngineProfile
 from orchid.widgets import TabWidget
 from orchid.widgets.bars import SearchBar, BookmarksBar, SideBar
+from orchid.search import SearchIndex
+from orchid.io import FileManager
+from orchid.io.history import HistoryStore
+from orchid.io.session import SessionJournal
+from orchid.io.icons import IconCache
 
 
 class DesktopWindow:
@@ -39,6 +43,46 @@ class DesktopWindow:
         """
         return DesktopWindow.instance.centralWidget()
 
+    @staticmethod
+    def get_search_index() -> SearchIndex:
+        """
+        Returns the index the omni-search looks things up in.
+
+        :return: The search index of the desktop.
+        :rtype: SearchIndex
+        """
+        return DesktopWindow.instance.search_index
+
+    @staticmethod
+    def get_history_store() -> HistoryStore:
+        """
+        Returns the browsing history of the desktop.
+
+        :return: The history store of the desktop.
+        :rtype: HistoryStore
+        """
+        return DesktopWindow.instance.history_store
+
+    @staticmethod
+    def get_session_journal() -> SessionJournal:
+        """
+        Returns the journal the open tabs of the desktop are saved in.
+
+        :return: The session journal of the desktop.
+        :rtype: SessionJournal
+        """
+        return DesktopWindow.instance.session_journal
+
+    @staticmethod
+    def get_icon_cache() -> IconCache:
+        """
+        Returns the cache of the favicons of visited sites.
+
+        :return: The icon cache of the desktop.
+        :rtype: IconCache
+        """
+        return DesktopWindow.instance.icon_cache
+
     @staticmethod
     def show() -> None:
         """
@@ -47,6 +91,14 @@ class DesktopWindow:
         #DesktopWindow.instance.showFullScreen()
         DesktopWindow.instance.show()
 
+    @staticmethod
+    def open_tabs() -> None:
+        """
+        Reopens the tabs of the last session, or opens a new tab if there were none, and saves the tabs from then on.
+        This starts the web engine, so it is called once the bare window has been shown.
+        """
+        DesktopWindow.instance.open_tabs()
+
 
 class _DesktopWindow(QMainWindow):
     """
@@ -71,8 +123,21 @@ class _DesktopWindow(QMainWindow):
         # Configure the main window.
         self.setContextMenuPolicy(Qt.NoContextMenu)
 
+        # Create the index of everything the search bar can find.
+        self.search_index = SearchIndex()
+
+        # Create the browsing history, which is searchable too.
+        self.history_store = HistoryStore(FileManager().get_history_file(), self)
+        self.history_store.set_search_index(self.search_index)
+
+        # Create the journal the open tabs are saved in.
+        self.session_journal = SessionJournal(FileManager().get_session_file(), self)
+
+        # Create the cache of the favicons of visited sites.
+        self.icon_cache = IconCache(FileManager().get_icon_store_file(), self)
+
         # Create the main area apps get drawn in.
-        central_widget = TabWidget(QWebEngineProfile.defaultProfile(), self)
+        central_widget = TabWidget(parent=self)  # The default profile is fetched with the first page.
         self.setCentralWidget(central_widget)
 
         # Create the top search bar that will manage the central widget.
@@ -101,8 +166,32 @@ class _DesktopWindow(QMainWindow):
             search_bar.signal_webpage_action.connect(central_widget.trigger_webpage_action)
             search_bar.signal_browser_home_pressed.connect(central_widget.set_url)
             search_bar.signal_file_home_pressed.connect(central_widget.set_url)
+            search_bar.signal_tab_requested.connect(central_widget.setCurrentWidget)
+
+            # Let the search bar find the bookmarks and open tabs.
+            search_bar.set_search_index(self.search_index)
+            bookmarks_bar.set_search_index(self.search_index)
+            central_widget.set_search_index(self.search_index)
+            search_bar.set_history_store(self.history_store)
+            central_widget.set_history_store(self.history_store)
 
-        central_widget.create_tab()
+            # Show the favicons of visited sites on tabs, bookmarks and suggestions before their pages load.
+            central_widget.set_icon_cache(self.icon_cache)
+            search_bar.set_icon_cache(self.icon_cache)
+            bookmarks_bar.set_icon_cache(self.icon_cache)
+
+        # Dev tools are opened on a page, so they start the web engine right away.
+        if for_dev_tools:
+            central_widget.create_tab()
+
+    def open_tabs(self) -> None:
+        """
+        Reopens the tabs of the last session, or opens a new tab if there were none, and saves the tabs from then on.
+        """
+        central_widget = self.centralWidget()
+        if not central_widget.restore_session(*self.session_journal.load()):
+            central_widget.create_tab()
+        central_widget.set_session_journal(self.session_journal)
 
     def _on_link_hovered(self, url: str) -> None:
         """
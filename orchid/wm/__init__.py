@@ -1,17 +1,25 @@
-from os import environ
+from os import environ, getpid
 from logging import getLogger
-from PyQt5.QtCore import QObject
-from PyQt5.QtWidgets import QApplication
+from PyQt5.QtCore import QObject, QSocketNotifier, pyqtSlot
+from Xlib import Xatom
 from Xlib.display import Display
-from Xlib.X import SubstructureRedirectMask, MapRequest, KeyPress, RevertToParent, CurrentTime, Above
-from Xlib.error import ConnectionClosedError, BadAccess
+from Xlib.X import (SubstructureRedirectMask, SubstructureNotifyMask, StructureNotifyMask, MapRequest, KeyPress,
+                    ConfigureRequest, ConfigureNotify, CreateNotify, DestroyNotify, MapNotify, UnmapNotify,
+                    PropertyNotify, ReparentNotify, Above, IsViewable, IsUnmapped, CWX, CWY, CWWidth,
+                    CWHeight, CWBorderWidth, CWSibling, CWStackMode, CurrentTime, NoEventMask, NONE)
+from Xlib.error import ConnectionClosedError, BadAccess, CatchError, DisplayError, XError
+from Xlib.protocol import event as events
+from orchid.wm.bridge import EventBridge, CLIENT_MAPPED, CLIENT_TITLE_CHANGED, CLIENT_DESTROYED
+from orchid.wm.clients import Client, ClientRegistry
+from orchid.wm.requests import RequestQueue
+from orchid.wm.screens import Monitor, MonitorLayout
 
 
 class WindowsManager(QObject):
     """
     A base window manager class with shared functionality between all other window managers.
     """
-    
+
     def __init__(self) -> None:
         """
         Creates the :class:`QObject` and initializes a logger.
@@ -21,6 +29,38 @@ class WindowsManager(QObject):
         # TODO: Add a file handler and formatter.
         self._logger = getLogger(__name__)
         self.is_running = False
+        self.embed_clients = False
+
+        # The GUI learns about application windows through the bridge rather than through signals.
+        self._bridge = EventBridge()
+
+    def get_event_bridge(self) -> EventBridge:
+        """
+        Returns the :class:`EventBridge` the GUI reads this window manager's events from.
+
+        :return: The bridge to the GUI.
+        :rtype: EventBridge
+        """
+        return self._bridge
+
+    def set_embed_clients(self, embed_clients: bool) -> None:
+        """
+        Changes whether new application windows are handed to the GUI to be shown in tabs rather than being placed on
+        the screen.
+
+        :param embed_clients: True to hand new windows to the GUI.
+        :type embed_clients: bool
+        """
+        self.embed_clients = embed_clients
+
+    @pyqtSlot(int)
+    def close_client(self, window_id: int) -> None:
+        """
+        Asks the given application window to close.
+
+        :param window_id: The id of the window to close.
+        :type window_id: int
+        """
 
     def start(self) -> None:
         """
@@ -62,46 +102,405 @@ class XWindowsManager(WindowsManager):
     def __init__(self) -> None:
         """
         Requests resources from the X system.
+
+        :raises ConnectionError: If there is no X server to connect to, or another window manager is running on it.
         """
         super().__init__()
         
         display_num = environ.get("DISPLAY")
         if not display_num:
             display_num = ":0"
-        self._display = Display(display_num)  # Create the connection to the X server.
+        try:
+            self._display = Display(display_num)  # Create the connection to the X server.
+        except DisplayError as error:
+            raise ConnectionError(f"Could not connect to the X server on {display_num}: {error}") from error
 
         # Take control of window management on the default screen.
         # TODO: Manage more than just the default screen.
-        # TODO: Manage more than just the mapping events.
-        try:
-            self._display.screen().root.change_attributes(event_mask=SubstructureRedirectMask)
-        except BadAccess as error:
-            print("Access error:", error)
+        # Only one client can redirect the root window's children, and the X server reports it asynchronously if
+        # another one already does, so wait for the answer.
+        root = self._display.screen().root
+        access_error = CatchError(BadAccess)
+        root.change_attributes(event_mask=SubstructureRedirectMask | SubstructureNotifyMask | StructureNotifyMask,
+                               onerror=access_error)
+        self._display.sync()
+        if access_error.get_error() is not None:
+            self._logger.warning(f"The X server refused window management: {access_error.get_error()}")
+            self._display.close()
+            raise ConnectionError(f"Another window manager is running on {display_num}")
+
+        # Keep track of every window so placement never has to ask the X server for a window's state.
+        self._root = root
+        self._clients = ClientRegistry(root)
+        self._clients.adopt_existing()
+
+        # Keep track of the monitors so new windows open on the monitor being worked on.
+        self._monitors = MonitorLayout(self._display, root)
+        self._focused_window_id = None
+
+        # Windows float unless a tiling layout is chosen. Each monitor gets its own layout.
+        self._layout_type = None
+        self._layouts = {}
+        self._window_layouts = {}
+
+        # Requests made while handling a batch of events are sent together once the batch is done.
+        self._requests = RequestQueue(self._display)
+
+        # Windows handed to the GUI to be shown in tabs.
+        self._embedded = set()
+        self._wm_protocols = self._display.intern_atom("WM_PROTOCOLS")
+        self._wm_delete_window = self._display.intern_atom("WM_DELETE_WINDOW")
+        self._net_wm_pid = self._display.intern_atom("_NET_WM_PID")
+
+        self._notifier = None
+        self._event_handlers = {KeyPress: self._on_key_press,
+                                MapRequest: self._on_map_request,
+                                ConfigureRequest: self._on_configure_request,
+                                CreateNotify: self._on_create_notify,
+                                ConfigureNotify: self._on_configure_notify,
+                                MapNotify: self._on_map_notify,
+                                UnmapNotify: self._on_unmap_notify,
+                                DestroyNotify: self._on_destroy_notify,
+                                ReparentNotify: self._on_reparent_notify,
+                                PropertyNotify: self._on_property_notify}
+        if self._monitors.screen_change_event is not None:
+            self._event_handlers[self._monitors.screen_change_event] = self._on_screen_change_notify
 
     def run(self) -> None:
         """
-        The main loop of the :class:`XWindowsManager`.
+        Starts listening to the X connection. Rather than polling the connection, a :class:`QSocketNotifier` watches
+        the connection's socket and events are handled in batches whenever it becomes readable.
         """
         super().run()
-        screen_geometry = QApplication.desktop().screenGeometry()
 
+        # The notifier must be created here so it belongs to the thread that runs the event loop.
+        self._notifier = QSocketNotifier(self._display.fileno(), QSocketNotifier.Read, self)
+        self._notifier.activated.connect(self._on_display_readable)
+
+        # Handle anything that was queued before the notifier existed.
+        self._process_pending_events()
+
+    def stop(self) -> None:
+        """
+        Stops the :class:`XWindowsManager` running and stops listening to the X connection.
+        """
+        super().stop()
+        if self._notifier is not None:
+            self._notifier.setEnabled(False)
+
+    def set_layout(self, layout_type: type) -> None:
+        """
+        Changes how windows are arranged. Every managed window is placed again in a new layout of the given type on
+        its monitor.
+
+        :param layout_type: The :class:`Layout` subclass to tile windows with or None to let windows float.
+        :type layout_type: type
+        """
+        self._layout_type = layout_type
+        self._retile()
+        self._requests.flush()
+
+    @pyqtSlot(int)
+    def close_client(self, window_id: int) -> None:
+        """
+        Asks the given window to close using WM_DELETE_WINDOW, or disconnects its application if it does not support
+        being asked.
+
+        :param window_id: The id of the window to close.
+        :type window_id: int
+        """
+        client = self._clients.get(window_id)
+        if client is None:
+            return
+
+        protocols = client.window.get_wm_protocols() or []
+        if self._wm_delete_window in protocols:
+            message = events.ClientMessage(window=client.window, client_type=self._wm_protocols,
+                                           data=(32, [self._wm_delete_window, CurrentTime, 0, 0, 0]))
+            client.window.send_event(message, event_mask=NoEventMask)
+        else:
+            client.window.kill_client()
+        self._display.flush()
+
+    def _on_display_readable(self, fileno: int) -> None:
+        """
+        Called whenever the X connection's socket has data waiting to be read.
+
+        :param fileno: The file descriptor of the X connection.
+        :type fileno: int
+        """
+        self._process_pending_events()
+
+    def _process_pending_events(self) -> None:
+        """
+        Handles every event in the X event queue. Replies to requests made while handling events can pull more events
+        off the socket, so this keeps going until the queue is empty rather than handling a single event. The requests
+        made by the handlers are sent with a single flush once the whole batch has been handled. An event whose window
+        is destroyed while it is handled is logged and skipped, so it cannot cost the rest of the batch.
+        """
         try:
-            while self.is_running:
-                if self._display.pending_events() > 0:  # Check if there are any pending events in the queue.
-                    event = self._display.next_event()  # Get the next pending event.
-                    if event.type == KeyPress:
-                        print("Got a key press event!")
-                    elif event.type == MapRequest:
-                        print("Got a map request event!")
-                        x = screen_geometry.center().x() - event.window.get_geometry().width / 2
-                        y = screen_geometry.center().y() - event.window.get_geometry().height / 2
-                        event.window.configure(x=int(x), y=int(y), border_width=0, stack_mode=Above)  # Place the window where we want it.
-                        event.window.map()  # Draw the window on the screen.
-                        event.window.set_input_focus(RevertToParent, CurrentTime)  # Focus window
-                    else:
-                        print("Got an unknown event!")
-                        print(event)
+            while self.is_running and self._display.pending_events() > 0:
+                event = self._display.next_event()  # Get the next pending event.
+                handler = self._event_handlers.get(event.type, self._on_unknown_event)
+                try:
+                    handler(event)
+                except XError as error:
+                    self._logger.warning("Could not handle {}: {}".format(type(event).__name__, error))
+            self._requests.flush()
         except ConnectionClosedError as error:
-            print("Connection closed:", error)
-        except KeyboardInterrupt as error:
-            print("Closing due to keyboard interrupt")
+            self._logger.error("Connection closed: {}".format(error))
+            self.stop()
+
+    def _on_key_press(self, event: events.KeyPress) -> None:
+        """
+        Called when a key is pressed in a window managed by the :class:`XWindowsManager`.
+
+        :param event: The key press event.
+        :type event: events.KeyPress
+        """
+        self._logger.debug("Got a key press event!")
+
+    def _on_map_request(self, event: events.MapRequest) -> None:
+        """
+        Centers, maps, and focuses the window that requested to be mapped.
+
+        :param event: The map request event.
+        :type event: events.MapRequest
+        """
+        client = self._clients.adopt(event.window)
+        if client is None:
+            return
+        if self.embed_clients and self._should_embed(client):
+            # The GUI reparents the window into a tab, which maps it.
+            self._embedded.add(client.id)
+            self._bridge.push(CLIENT_MAPPED, client.id, client.get_wm_name())
+            return
+
+        monitor = self._get_placement_monitor()
+        if self._layout_type is not None:
+            self._tile(client.id, monitor)
+            self._requests.stack(event.window, Above)
+        else:
+            x, y = monitor.center_of(client.width, client.height)
+            self._requests.configure(event.window, x=x, y=y, border_width=0, stack_mode=Above)  # Place the window.
+            client.update_geometry(x, y, client.width, client.height, 0)
+        self._requests.map(event.window)  # Draw the window on the screen.
+        if client.accepts_focus():
+            self._requests.focus(event.window)
+            self._focused_window_id = client.id
+            if client.id in self._window_layouts:
+                self._window_layouts[client.id].focus(client.id)
+
+    def _on_configure_request(self, event: events.ConfigureRequest) -> None:
+        """
+        Grants a window's request to change its geometry or stacking. Tiled windows keep the geometry their layout
+        gave them, and only have their stacking changed.
+
+        :param event: The configure request event.
+        :type event: events.ConfigureRequest
+        """
+        # Only pass along the values the window asked to change.
+        requested = {CWX: "x", CWY: "y", CWWidth: "width", CWHeight: "height", CWBorderWidth: "border_width",
+                     CWSibling: "sibling", CWStackMode: "stack_mode"}
+        changes = {name: getattr(event, name) for flag, name in requested.items() if event.value_mask & flag}
+
+        layout = self._window_layouts.get(event.window.id)
+        geometry = layout.get_geometry(event.window.id) if layout is not None else None
+        if geometry is not None:
+            # Tell the window where it really is with a synthetic configure notify, as ICCCM 4.1.5 asks.
+            x, y, width, height = geometry
+            notify = events.ConfigureNotify(event=event.window, window=event.window, above_sibling=NONE, x=x, y=y,
+                                            width=width, height=height, border_width=0, override=False)
+            event.window.send_event(notify, event_mask=StructureNotifyMask)
+            changes = {name: value for name, value in changes.items() if name in ("sibling", "stack_mode")}
+            if not changes:
+                return
+        self._requests.configure(event.window, **changes)
+
+    def _on_create_notify(self, event: events.CreateNotify) -> None:
+        """
+        Starts tracking a newly created window using the geometry reported in the event.
+
+        :param event: The create notify event.
+        :type event: events.CreateNotify
+        """
+        self._clients.add(event.window, event.x, event.y, event.width, event.height, event.border_width,
+                          bool(event.override))
+
+    def _on_configure_notify(self, event: events.ConfigureNotify) -> None:
+        """
+        Updates the cached geometry of a window or of the screen after it changed.
+
+        :param event: The configure notify event.
+        :type event: events.ConfigureNotify
+        """
+        if event.window.id == self._root.id:
+            self._clients.update_screen_size(event.width, event.height)
+            self._monitors.refresh()
+            self._retile()
+            return
+
+        client = self._clients.get(event.window.id)
+        if client is not None:
+            client.update_geometry(event.x, event.y, event.width, event.height, event.border_width)
+
+    def _on_map_notify(self, event: events.MapNotify) -> None:
+        """
+        Marks a window as mapped.
+
+        :param event: The map notify event.
+        :type event: events.MapNotify
+        """
+        client = self._clients.get(event.window.id)
+        if client is not None:
+            client.map_state = IsViewable
+
+    def _on_unmap_notify(self, event: events.UnmapNotify) -> None:
+        """
+        Marks a window as unmapped.
+
+        :param event: The unmap notify event.
+        :type event: events.UnmapNotify
+        """
+        client = self._clients.get(event.window.id)
+        if client is not None:
+            client.map_state = IsUnmapped
+        self._untile(event.window.id)
+
+    def _on_destroy_notify(self, event: events.DestroyNotify) -> None:
+        """
+        Stops tracking a window that was destroyed.
+
+        :param event: The destroy notify event.
+        :type event: events.DestroyNotify
+        """
+        self._untile(event.window.id)
+        self._clients.remove(event.window.id)
+        self._requests.discard(event.window.id)
+        if self._focused_window_id == event.window.id:
+            self._focused_window_id = None
+        if event.window.id in self._embedded:
+            self._embedded.discard(event.window.id)
+            self._bridge.push(CLIENT_DESTROYED, event.window.id)
+
+    def _on_reparent_notify(self, event: events.ReparentNotify) -> None:
+        """
+        Stops tiling a window that was moved out of the root window, normally into a tab.
+
+        :param event: The reparent notify event.
+        :type event: events.ReparentNotify
+        """
+        if event.parent.id != self._root.id:
+            self._untile(event.window.id)
+
+    def _on_property_notify(self, event: events.PropertyNotify) -> None:
+        """
+        Marks the changed property of a window as stale so it is fetched again when next needed.
+
+        :param event: The property notify event.
+        :type event: events.PropertyNotify
+        """
+        client = self._clients.get(event.window.id)
+        if client is not None:
+            client.invalidate_property(event.atom)
+            if event.atom == Xatom.WM_NAME and client.id in self._embedded:
+                self._bridge.push(CLIENT_TITLE_CHANGED, client.id, client.get_wm_name())
+
+    def _on_screen_change_notify(self, event: events.AnyEvent) -> None:
+        """
+        Reads the monitors again after RandR reported that the screen changed.
+
+        :param event: The RandR screen change notify event.
+        :type event: events.AnyEvent
+        """
+        self._monitors.refresh()
+        self._retile()
+
+    def _tile(self, window_id: int, monitor: Monitor) -> None:
+        """
+        Adds a window to the layout of the given monitor and queues the geometry changes that causes.
+
+        :param window_id: The id of the window to tile.
+        :type window_id: int
+        :param monitor: The monitor to tile the window on.
+        :type monitor: Monitor
+        """
+        key = (monitor.x, monitor.y, monitor.width, monitor.height)
+        layout = self._layouts.get(key)
+        if layout is None:
+            layout = self._layout_type()
+            layout.set_area(*key)
+            self._layouts[key] = layout
+        self._window_layouts[window_id] = layout
+        self._queue_geometries(layout.add(window_id))
+
+    def _retile(self) -> None:
+        """
+        Places every tiled window again in fresh layouts, normally after the layout type or the monitors changed.
+        """
+        window_ids = [client.id for client in self._clients if client.is_mapped() and not client.override_redirect]
+        self._layouts.clear()
+        self._window_layouts.clear()
+        if self._layout_type is not None:
+            for window_id in window_ids:
+                client = self._clients.get(window_id)
+                self._tile(window_id, self._monitors.get_monitor_at(client.x, client.y))
+
+    def _untile(self, window_id: int) -> None:
+        """
+        Removes a window from its layout and queues the geometry changes that causes.
+
+        :param window_id: The id of the window to remove.
+        :type window_id: int
+        """
+        layout = self._window_layouts.pop(window_id, None)
+        if layout is not None:
+            self._queue_geometries(layout.remove(window_id))
+
+    def _queue_geometries(self, geometries: dict) -> None:
+        """
+        Queues a configure request for every geometry handed out by a layout.
+
+        :param geometries: The new (x, y, width, height) of the windows keyed by window id.
+        :type geometries: dict
+        """
+        for window_id, (x, y, width, height) in geometries.items():
+            client = self._clients.get(window_id)
+            if client is not None:
+                self._requests.configure(client.window, x=x, y=y, width=width, height=height, border_width=0)
+                client.update_geometry(x, y, width, height, 0)
+
+    def _should_embed(self, client: Client) -> bool:
+        """
+        Returns whether a window should be shown in a tab. Dialogs, popups and windows of :module:`orchid` itself are
+        placed on the screen instead.
+
+        :param client: The window that wants to be mapped.
+        :type client: Client
+        :return: True if the window should be handed to the GUI.
+        :rtype: bool
+        """
+        return (not client.override_redirect and client.get_wm_transient_for() is None and
+                client.get_pid(self._net_wm_pid) != getpid())
+
+    def _get_placement_monitor(self) -> Monitor:
+        """
+        Returns the monitor new windows should be placed on. This is the monitor of the focused window, or the monitor
+        under the pointer if no window has the focus.
+
+        :return: The monitor to place new windows on.
+        :rtype: Monitor
+        """
+        focused = self._clients.get(self._focused_window_id)
+        if focused is not None:
+            return self._monitors.get_monitor_at(focused.x + focused.width // 2, focused.y + focused.height // 2)
+        return self._monitors.get_pointer_monitor()
+
+    def _on_unknown_event(self, event: events.AnyEvent) -> None:
+        """
+        Called for any event the :class:`XWindowsManager` does not handle.
+
+        :param event: The unhandled event.
+        :type event: events.AnyEvent
+        """
+        self._logger.debug("Got an unknown event: {}".format(event))
@@ -0,0 +1,80 @@
+from collections import deque, namedtuple
+from PyQt5.QtCore import QObject, pyqtSignal
+
+
+# A compact record of something the window manager wants the GUI to know about.
+ClientEvent = namedtuple("ClientEvent", ["kind", "window_id", "title"])
+
+# The kinds of client events.
+CLIENT_MAPPED = 0
+CLIENT_TITLE_CHANGED = 1
+CLIENT_DESTROYED = 2
+
+
+class EventBridge(QObject):
+    """
+    Carries :class:`ClientEvent` records from the window manager's thread to the GUI thread. Records are put in a
+    queue and the GUI is woken with a single queued signal when the queue stops being empty, so a burst of events
+    costs one wake-up instead of one signal per event. Title changes are kept apart, one per window with the latest
+    title winning, so a window that keeps renaming itself cannot flood the queue. The bridge relies on :class:`deque`
+    and :class:`dict` operations being atomic and takes no locks, so neither side can block the other.
+    """
+
+    # Class signals.
+    signal_ready = pyqtSignal()
+
+    def __init__(self, parent: QObject = None) -> None:
+        """
+        Creates an empty bridge.
+
+        :param parent: An optional parent object for this bridge.
+        :type parent: QObject
+        """
+        super().__init__(parent)
+        self._queue = deque()
+        self._titles = {}  # The latest title of each window whose title changed since the last drain.
+        self._is_signalled = False
+
+    def push(self, kind: int, window_id: int, title: str = "") -> None:
+        """
+        Queues a record for the GUI. Called from the window manager's thread. A title change replaces any title change
+        of the same window that is still waiting.
+
+        :param kind: The kind of the event, like :data:`CLIENT_MAPPED`.
+        :type kind: int
+        :param window_id: The id of the window the event is about.
+        :type window_id: int
+        :param title: The title of the window, if the event carries one.
+        :type title: str
+        """
+        if kind == CLIENT_TITLE_CHANGED:
+            self._titles[window_id] = title
+        else:
+            self._queue.append(ClientEvent(kind, window_id, title))
+        if not self._is_signalled:
+            self._is_signalled = True
+            self.signal_ready.emit()
+
+    def drain(self) -> list:
+        """
+        Takes every record out of the bridge. Called from the GUI thread in response to :attr:`signal_ready`.
+
+        :return: The mapped and destroyed records in the order they were pushed, followed by the latest title change
+        of each window that was not destroyed.
+        :rtype: list
+        """
+        # Clear the flag before draining so a record pushed during the drain signals again rather than being missed.
+        # The titles are taken before the queue, so a window's mapped record is always drained with or before its
+        # title changes.
+        self._is_signalled = False
+        titles = []
+        while self._titles:
+            titles.append(self._titles.popitem())
+        records = []
+        while self._queue:
+            records.append(self._queue.popleft())
+
+        destroyed = {record.window_id for record in records if record.kind == CLIENT_DESTROYED}
+        records.extend(ClientEvent(CLIENT_TITLE_CHANGED, window_id, title) for window_id, title in reversed(titles)
+                       if window_id not in destroyed)
+        return records
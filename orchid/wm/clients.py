@@ -0,0 +1,295 @@
+from Xlib import Xatom
+from Xlib.X import IsUnmapped, IsViewable, StructureNotifyMask, PropertyChangeMask
+from Xlib.Xutil import InputHint
+from Xlib.error import XError
+from Xlib.xobject.drawable import Window
+
+
+class Client:
+    """
+    The cached state of a single window managed by the :class:`XWindowsManager`.
+    """
+
+    def __init__(self, window: Window, x: int = 0, y: int = 0, width: int = 0, height: int = 0,
+                 border_width: int = 0, override_redirect: bool = False) -> None:
+        """
+        Creates the cached state of the given window.
+
+        :param window: The X window this client wraps.
+        :type window: Window
+        :param x: The x position of the window relative to its parent.
+        :type x: int
+        :param y: The y position of the window relative to its parent.
+        :type y: int
+        :param width: The width of the window.
+        :type width: int
+        :param height: The height of the window.
+        :type height: int
+        :param border_width: The width of the window's border.
+        :type border_width: int
+        :param override_redirect: True if the window does not want to be managed.
+        :type override_redirect: bool
+        """
+        self.window = window
+        self.x = x
+        self.y = y
+        self.width = width
+        self.height = height
+        self.border_width = border_width
+        self.override_redirect = override_redirect
+        self.map_state = IsUnmapped
+        self._properties = {}  # Properties fetched from the X server keyed by atom.
+
+    @property
+    def id(self) -> int:
+        """
+        Returns the X resource id of this client's window.
+
+        :return: The id of the window.
+        :rtype: int
+        """
+        return self.window.id
+
+    def is_mapped(self) -> bool:
+        """
+        Returns whether this client's window is currently mapped.
+
+        :return: True if the window is viewable, false otherwise.
+        :rtype: bool
+        """
+        return self.map_state == IsViewable
+
+    def get_wm_hints(self):
+        """
+        Returns the WM_HINTS of this client. Like every property, it is only fetched from the X server the first time
+        it is needed and again after a PropertyNotify has marked it stale.
+
+        :return: The window's WM_HINTS or None if it has none.
+        """
+        return self._get_property(Xatom.WM_HINTS, self.window.get_wm_hints)
+
+    def get_wm_normal_hints(self):
+        """
+        Returns the WM_NORMAL_HINTS of this client.
+
+        :return: The window's WM_NORMAL_HINTS or None if it has none.
+        """
+        return self._get_property(Xatom.WM_NORMAL_HINTS, self.window.get_wm_normal_hints)
+
+    def get_wm_name(self) -> str:
+        """
+        Returns the title of this client.
+
+        :return: The window's WM_NAME or an empty string if it has none.
+        :rtype: str
+        """
+        name = self._get_property(Xatom.WM_NAME, self.window.get_wm_name)
+        if isinstance(name, bytes):
+            name = name.decode("latin-1")
+        return name or ""
+
+    def get_wm_transient_for(self) -> Window:
+        """
+        Returns the window this client is a dialog or popup for.
+
+        :return: The window's WM_TRANSIENT_FOR or None if it is not transient.
+        :rtype: Window
+        """
+        return self._get_property(Xatom.WM_TRANSIENT_FOR, self.window.get_wm_transient_for)
+
+    def get_pid(self, net_wm_pid: int) -> int:
+        """
+        Returns the id of the process that owns this client.
+
+        :param net_wm_pid: The atom of _NET_WM_PID.
+        :type net_wm_pid: int
+        :return: The window's _NET_WM_PID or None if it has none.
+        :rtype: int
+        """
+        prop = self._get_property(net_wm_pid, lambda: self.window.get_full_property(net_wm_pid, Xatom.CARDINAL))
+        return prop.value[0] if prop is not None and len(prop.value) else None
+
+    def accepts_focus(self) -> bool:
+        """
+        Returns whether this client wants to be given the input focus according to its WM_HINTS.
+
+        :return: True if the window takes input, false otherwise.
+        :rtype: bool
+        """
+        hints = self.get_wm_hints()
+        if hints is None or not hints.flags & InputHint:
+            return True
+        return bool(hints.input)
+
+    def update_geometry(self, x: int, y: int, width: int, height: int, border_width: int) -> None:
+        """
+        Updates the cached geometry of this client.
+
+        :param x: The x position of the window relative to its parent.
+        :type x: int
+        :param y: The y position of the window relative to its parent.
+        :type y: int
+        :param width: The width of the window.
+        :type width: int
+        :param height: The height of the window.
+        :type height: int
+        :param border_width: The width of the window's border.
+        :type border_width: int
+        """
+        self.x = x
+        self.y = y
+        self.width = width
+        self.height = height
+        self.border_width = border_width
+
+    def invalidate_property(self, atom: int) -> None:
+        """
+        Marks the given property as stale so it is fetched again the next time it is needed.
+
+        :param atom: The atom of the property that changed.
+        :type atom: int
+        """
+        self._properties.pop(atom, None)
+
+    def _get_property(self, atom: int, getter):
+        """
+        Returns the cached value of a property, calling the given getter only if the property is not cached. A window
+        that vanished in the meantime is treated as having no property.
+
+        :param atom: The atom of the property.
+        :type atom: int
+        :param getter: The function that fetches the property from the X server.
+        :return: The property or None.
+        """
+        if atom not in self._properties:
+            try:
+                self._properties[atom] = getter()
+            except XError:
+                self._properties[atom] = None
+        return self._properties[atom]
+
+
+class ClientRegistry:
+    """
+    A registry of every window managed by the :class:`XWindowsManager`. The registry is kept up to date from the
+    structure and property events of the windows so placement and focus decisions never need to ask the X server.
+    """
+
+    # The events every managed window is asked to report.
+    CLIENT_EVENT_MASK = StructureNotifyMask | PropertyChangeMask
+
+    def __init__(self, root: Window) -> None:
+        """
+        Creates an empty registry for the children of the given root window.
+
+        :param root: The root window whose children are managed.
+        :type root: Window
+        """
+        self._root = root
+        self._clients = {}
+
+        # The size of the whole X screen.
+        geometry = root.get_geometry()
+        self.screen_width = geometry.width
+        self.screen_height = geometry.height
+
+    def __contains__(self, window_id: int) -> bool:
+        return window_id in self._clients
+
+    def __iter__(self):
+        return iter(self._clients.values())
+
+    def __len__(self) -> int:
+        return len(self._clients)
+
+    def update_screen_size(self, width: int, height: int) -> None:
+        """
+        Updates the cached size of the X screen, normally from a ConfigureNotify on the root window.
+
+        :param width: The new width of the screen.
+        :type width: int
+        :param height: The new height of the screen.
+        :type height: int
+        """
+        self.screen_width = width
+        self.screen_height = height
+
+    def get(self, window_id: int) -> Client:
+        """
+        Returns the client for the given window id.
+
+        :param window_id: The id of the window.
+        :type window_id: int
+        :return: The client or None if the window is not managed.
+        :rtype: Client
+        """
+        return self._clients.get(window_id)
+
+    def add(self, window: Window, x: int, y: int, width: int, height: int, border_width: int,
+            override_redirect: bool) -> Client:
+        """
+        Adds a window to the registry with the geometry it was reported with, normally from a CreateNotify event.
+
+        :param window: The window to add.
+        :type window: Window
+        :param x: The x position of the window.
+        :type x: int
+        :param y: The y position of the window.
+        :type y: int
+        :param width: The width of the window.
+        :type width: int
+        :param height: The height of the window.
+        :type height: int
+        :param border_width: The width of the window's border.
+        :type border_width: int
+        :param override_redirect: True if the window does not want to be managed.
+        :type override_redirect: bool
+        :return: The newly added client.
+        :rtype: Client
+        """
+        client = Client(window, x, y, width, height, border_width, override_redirect)
+        self._clients[window.id] = client
+        if not override_redirect:
+            window.change_attributes(event_mask=self.CLIENT_EVENT_MASK)
+        return client
+
+    def adopt_existing(self) -> None:
+        """
+        Adds every window that already exists under the root window to the registry. Windows destroyed while they
+        are being adopted are skipped.
+        """
+        for window in self._root.query_tree().children:
+            self.adopt(window)
+
+    def adopt(self, window: Window) -> Client:
+        """
+        Returns the client for the given window, asking the X server for its state only if the window was never seen
+        before. This happens for windows that existed before the window manager started.
+
+        :param window: The window to adopt.
+        :type window: Window
+        :return: The client for the window, or None if the window no longer exists.
+        :rtype: Client
+        """
+        client = self._clients.get(window.id)
+        if client is None:
+            try:
+                geometry = window.get_geometry()
+                attributes = window.get_attributes()
+            except XError:
+                return None  # The window was destroyed before the X server answered.
+            client = self.add(window, geometry.x, geometry.y, geometry.width, geometry.height, geometry.border_width,
+                              bool(attributes.override_redirect))
+            client.map_state = attributes.map_state
+        return client
+
+    def remove(self, window_id: int) -> Client:
+        """
+        Removes the client for the given window id from the registry.
+
+        :param window_id: The id of the window that was destroyed.
+        :type window_id: int
+        :return: The removed client or None if the window was not managed.
+        :rtype: Client
+        """
+        return self._clients.pop(window_id, None)
@@ -0,0 +1,407 @@
+from abc import ABC, abstractmethod
+from math import ceil, sqrt
+
+
+class Layout(ABC):
+    """
+    A base tiling layout. A layout places the windows it holds inside its area and hands back only the geometries
+    that changed, so adding or removing one window never re-places every window. Layouts only deal with window ids
+    and rectangles, which are (x, y, width, height) tuples, so they can be used without an X server.
+    """
+
+    def __init__(self) -> None:
+        """
+        Creates an empty layout without an area.
+        """
+        self._area = (0, 0, 0, 0)
+        self._geometries = {}  # The last geometry handed out for each window.
+
+    def __contains__(self, window_id: int) -> bool:
+        return window_id in self._geometries
+
+    def __len__(self) -> int:
+        return len(self._geometries)
+
+    def get_geometry(self, window_id: int) -> tuple:
+        """
+        Returns the geometry this layout last gave the given window.
+
+        :param window_id: The id of the window.
+        :type window_id: int
+        :return: The (x, y, width, height) of the window or None if it is not in this layout.
+        :rtype: tuple
+        """
+        return self._geometries.get(window_id)
+
+    def set_area(self, x: int, y: int, width: int, height: int) -> dict:
+        """
+        Changes the area the windows are tiled in. Every window is placed again.
+
+        :param x: The x position of the area.
+        :type x: int
+        :param y: The y position of the area.
+        :type y: int
+        :param width: The width of the area.
+        :type width: int
+        :param height: The height of the area.
+        :type height: int
+        :return: The new geometry of every window whose geometry changed, keyed by window id.
+        :rtype: dict
+        """
+        self._area = (x, y, width, height)
+        return self._commit(self._arrange_all())
+
+    def add(self, window_id: int) -> dict:
+        """
+        Adds a window to this layout.
+
+        :param window_id: The id of the window to add.
+        :type window_id: int
+        :return: The new geometry of every window whose geometry changed, keyed by window id.
+        :rtype: dict
+        """
+        if window_id in self._geometries:
+            return {}
+        self._geometries[window_id] = None
+        return self._commit(self._insert(window_id))
+
+    def remove(self, window_id: int) -> dict:
+        """
+        Removes a window from this layout.
+
+        :param window_id: The id of the window to remove.
+        :type window_id: int
+        :return: The new geometry of every window whose geometry changed, keyed by window id.
+        :rtype: dict
+        """
+        if window_id not in self._geometries:
+            return {}
+        del self._geometries[window_id]
+        return self._commit(self._delete(window_id))
+
+    def focus(self, window_id: int) -> None:
+        """
+        Tells this layout which window has the focus. Some layouts use this to decide where new windows go.
+
+        :param window_id: The id of the focused window.
+        :type window_id: int
+        """
+
+    @abstractmethod
+    def _insert(self, window_id: int) -> dict:
+        """
+        Adds a window to the layout's own structures and returns the geometries of the windows that were affected.
+
+        :param window_id: The id of the window to add.
+        :type window_id: int
+        :return: The geometries of the affected windows keyed by window id.
+        :rtype: dict
+        """
+
+    @abstractmethod
+    def _delete(self, window_id: int) -> dict:
+        """
+        Removes a window from the layout's own structures and returns the geometries of the windows that were affected.
+
+        :param window_id: The id of the window to remove.
+        :type window_id: int
+        :return: The geometries of the affected windows keyed by window id.
+        :rtype: dict
+        """
+
+    @abstractmethod
+    def _arrange_all(self) -> dict:
+        """
+        Returns the geometry of every window in the layout.
+
+        :return: The geometries of every window keyed by window id.
+        :rtype: dict
+        """
+
+    def _commit(self, geometries: dict) -> dict:
+        """
+        Remembers the given geometries and returns only the ones that differ from what the windows already have.
+
+        :param geometries: The newly computed geometries keyed by window id.
+        :type geometries: dict
+        :return: The geometries that changed keyed by window id.
+        :rtype: dict
+        """
+        changes = {}
+        for window_id, geometry in geometries.items():
+            if self._geometries.get(window_id) != geometry:
+                self._geometries[window_id] = geometry
+                changes[window_id] = geometry
+        return changes
+
+
+class MasterStackLayout(Layout):
+    """
+    A layout with one large master window on the left and every other window stacked in a column on the right.
+    Adding or removing a window from the stack only re-places the stack.
+    """
+
+    def __init__(self, master_ratio: float = 0.55) -> None:
+        """
+        Creates an empty master/stack layout.
+
+        :param master_ratio: The fraction of the width given to the master window.
+        :type master_ratio: float
+        """
+        super().__init__()
+        self._master_ratio = master_ratio
+        self._windows = []
+
+    def _insert(self, window_id: int) -> dict:
+        self._windows.append(window_id)
+        if len(self._windows) <= 2:
+            return self._arrange_all()  # The master has to make room for the stack.
+        return self._arrange_stack()
+
+    def _delete(self, window_id: int) -> dict:
+        index = self._windows.index(window_id)
+        self._windows.pop(index)
+        if index == 0 or len(self._windows) <= 1:
+            return self._arrange_all()  # The master changed or the stack disappeared.
+        return self._arrange_stack()
+
+    def _arrange_all(self) -> dict:
+        geometries = self._arrange_stack()
+        if self._windows:
+            x, y, width, height = self._area
+            if len(self._windows) > 1:
+                width = int(width * self._master_ratio)
+            geometries[self._windows[0]] = (x, y, width, height)
+        return geometries
+
+    def _arrange_stack(self) -> dict:
+        """
+        Returns the geometries of the windows in the stack.
+
+        :return: The geometries keyed by window id.
+        :rtype: dict
+        """
+        stack = self._windows[1:]
+        if not stack:
+            return {}
+
+        x, y, width, height = self._area
+        master_width = int(width * self._master_ratio)
+        return {window_id: geometry for window_id, geometry in
+                zip(stack, _split(x + master_width, y, width - master_width, height, len(stack), False))}
+
+
+class GridLayout(Layout):
+    """
+    A layout that tiles windows in a grid that is as square as possible. Windows fill the grid row by row, so adding
+    or removing a window only re-places the rows from its own row onward unless the grid itself changes shape.
+    """
+
+    def __init__(self) -> None:
+        """
+        Creates an empty grid layout.
+        """
+        super().__init__()
+        self._windows = []
+
+    def _insert(self, window_id: int) -> dict:
+        shape = self._get_shape()
+        self._windows.append(window_id)
+        if self._get_shape() != shape:
+            return self._arrange_all()
+        return self._arrange_from(len(self._windows) - 1)
+
+    def _delete(self, window_id: int) -> dict:
+        shape = self._get_shape()
+        index = self._windows.index(window_id)
+        self._windows.pop(index)
+        if self._get_shape() != shape:
+            return self._arrange_all()
+        return self._arrange_from(index)
+
+    def _arrange_all(self) -> dict:
+        return self._arrange_from(0)
+
+    def _get_shape(self) -> tuple:
+        """
+        Returns the number of columns and rows in the grid.
+
+        :return: The columns and rows.
+        :rtype: tuple
+        """
+        columns = max(1, ceil(sqrt(len(self._windows))))
+        return columns, ceil(len(self._windows) / columns)
+
+    def _arrange_from(self, index: int) -> dict:
+        """
+        Returns the geometries of the windows in every row from the row of the given window onward.
+
+        :param index: The index of the first window that moved.
+        :type index: int
+        :return: The geometries keyed by window id.
+        :rtype: dict
+        """
+        columns, rows = self._get_shape()
+        x, y, width, height = self._area
+        row_areas = _split(x, y, width, height, rows, False)
+
+        geometries = {}
+        for row in range(index // columns, rows):
+            row_windows = self._windows[row * columns:(row + 1) * columns]
+            row_x, row_y, row_width, row_height = row_areas[row]
+            geometries.update(zip(row_windows, _split(row_x, row_y, row_width, row_height, len(row_windows), True)))
+        return geometries
+
+
+class BSPLayout(Layout):
+    """
+    A binary space partitioning layout. A new window splits the area of the focused window in two along its longer
+    side, and a removed window gives its area back to its sibling, so only that one part of the tree is re-placed.
+    """
+
+    def __init__(self, ratio: float = 0.5) -> None:
+        """
+        Creates an empty BSP layout.
+
+        :param ratio: The fraction of a split area given to the window that was already there.
+        :type ratio: float
+        """
+        super().__init__()
+        self._ratio = ratio
+        self._root = None
+        self._leaves = {}
+        self._focused = None
+
+    def focus(self, window_id: int) -> None:
+        if window_id in self._leaves:
+            self._focused = window_id
+
+    def _insert(self, window_id: int) -> dict:
+        leaf = _Node(window_id)
+        self._leaves[window_id] = leaf
+
+        if self._root is None:
+            leaf.area = self._area
+            self._root = leaf
+            self._focused = window_id
+            return self._arrange(leaf)
+
+        # Turn the target leaf into a split holding the target and the new window.
+        target = self._leaves.get(self._focused) or next(node for node in self._leaves.values() if node is not leaf)
+        split = _Node(None, target.parent)
+        split.area = target.area
+        split.children = [target, leaf]
+        self._replace(target, split)
+        target.parent = split
+        leaf.parent = split
+        self._focused = window_id
+        return self._arrange(split)
+
+    def _delete(self, window_id: int) -> dict:
+        leaf = self._leaves.pop(window_id)
+        if self._focused == window_id:
+            self._focused = None
+
+        parent = leaf.parent
+        if parent is None:
+            self._root = None
+            return {}
+
+        # The sibling takes over the whole area of the split.
+        sibling = parent.children[1] if parent.children[0] is leaf else parent.children[0]
+        sibling.parent = parent.parent
+        sibling.area = parent.area
+        self._replace(parent, sibling)
+        return self._arrange(sibling)
+
+    def _arrange_all(self) -> dict:
+        if self._root is None:
+            return {}
+        self._root.area = self._area
+        return self._arrange(self._root)
+
+    def _replace(self, old: "_Node", new: "_Node") -> None:
+        """
+        Puts a node in the place of another node in the tree.
+
+        :param old: The node being replaced.
+        :type old: _Node
+        :param new: The node taking its place.
+        :type new: _Node
+        """
+        if old.parent is None:
+            self._root = new
+        else:
+            old.parent.children[old.parent.children.index(old)] = new
+
+    def _arrange(self, node: "_Node") -> dict:
+        """
+        Splits the area of the given node between its descendants and returns the geometries of its windows.
+
+        :param node: The root of the subtree to arrange.
+        :type node: _Node
+        :return: The geometries keyed by window id.
+        :rtype: dict
+        """
+        geometries = {}
+        pending = [node]
+        while pending:
+            node = pending.pop()
+            if node.window_id is not None:
+                geometries[node.window_id] = node.area
+                continue
+
+            x, y, width, height = node.area
+            first, second = node.children
+            if width >= height:
+                first_width = int(width * self._ratio)
+                first.area = (x, y, first_width, height)
+                second.area = (x + first_width, y, width - first_width, height)
+            else:
+                first_height = int(height * self._ratio)
+                first.area = (x, y, width, first_height)
+                second.area = (x, y + first_height, width, height - first_height)
+            pending.extend(node.children)
+        return geometries
+
+
+class _Node:
+    """
+    A node of a :class:`BSPLayout` tree. Leaves hold a window and splits hold two children.
+    """
+
+    def __init__(self, window_id: int = None, parent: "_Node" = None) -> None:
+        self.window_id = window_id
+        self.parent = parent
+        self.children = []
+        self.area = (0, 0, 0, 0)
+
+
+def _split(x: int, y: int, width: int, height: int, count: int, horizontal: bool) -> list:
+    """
+    Splits an area into equal parts, giving any leftover pixels to the last part.
+
+    :param x: The x position of the area.
+    :type x: int
+    :param y: The y position of the area.
+    :type y: int
+    :param width: The width of the area.
+    :type width: int
+    :param height: The height of the area.
+    :type height: int
+    :param count: The number of parts to split the area into.
+    :type count: int
+    :param horizontal: True to split the area into columns, false to split it into rows.
+    :type horizontal: bool
+    :return: The (x, y, width, height) of each part.
+    :rtype: list
+    """
+    parts = []
+    size = (width if horizontal else height) // max(count, 1)
+    for i in range(count):
+        last = i == count - 1
+        if horizontal:
+            parts.append((x + i * size, y, width - i * size if last else size, height))
+        else:
+            parts.append((x, y + i * size, width, height - i * size if last else size))
+    return parts
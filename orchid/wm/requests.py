@@ -0,0 +1,128 @@
+from Xlib.display import Display
+from Xlib.X import RevertToParent, CurrentTime
+from Xlib.xobject.drawable import Window
+
+
+class RequestQueue:
+    """
+    Collects the requests the :class:`XWindowsManager` makes while handling a batch of events and sends them to the X
+    server all at once. Requests that are superseded before the batch ends are never sent.
+    """
+
+    def __init__(self, display: Display) -> None:
+        """
+        Creates an empty queue for the given X connection.
+
+        :param display: The connection to the X server the requests are sent on.
+        :type display: Display
+        """
+        self._display = display
+        self._windows = {}
+        self._configures = {}
+        self._maps = {}
+        self._mapped_first = set()  # The windows whose first map or unmap in this batch was a map.
+        self._focus = None
+
+    def __len__(self) -> int:
+        return len(self._configures) + len(self._maps) + (1 if self._focus is not None else 0)
+
+    def configure(self, window: Window, **changes) -> None:
+        """
+        Queues a change to the geometry or stacking of a window. Changes to the same window are merged so only the
+        latest value of each attribute is sent.
+
+        :param window: The window to configure.
+        :type window: Window
+        :param changes: The keyword arguments for :method:`Window.configure()`.
+        """
+        self._windows[window.id] = window
+        self._configures.setdefault(window.id, {}).update(changes)
+
+    def stack(self, window: Window, stack_mode: int) -> None:
+        """
+        Queues a change to the stacking order of a window.
+
+        :param window: The window to restack.
+        :type window: Window
+        :param stack_mode: Where to put the window in the stack, like :attr:`X.Above`.
+        :type stack_mode: int
+        """
+        self.configure(window, stack_mode=stack_mode)
+
+    def map(self, window: Window) -> None:
+        """
+        Queues a window to be mapped.
+
+        :param window: The window to map.
+        :type window: Window
+        """
+        self._windows[window.id] = window
+        if window.id not in self._maps:
+            self._mapped_first.add(window.id)
+        self._maps[window.id] = True
+
+    def unmap(self, window: Window) -> None:
+        """
+        Queues a window to be unmapped. If the window's first change in this batch was a map, the window was unmapped
+        before the batch, so the queued map cancels out with the unmap.
+
+        :param window: The window to unmap.
+        :type window: Window
+        """
+        self._windows[window.id] = window
+        if self._maps.get(window.id) and window.id in self._mapped_first:
+            del self._maps[window.id]
+            self._mapped_first.discard(window.id)
+        else:
+            self._maps[window.id] = False
+        if self._focus == window.id:
+            self._focus = None  # An unmapped window cannot take the focus.
+
+    def focus(self, window: Window) -> None:
+        """
+        Queues the input focus to be given to a window. Only the last window focused in a batch gets the focus.
+
+        :param window: The window to focus.
+        :type window: Window
+        """
+        self._windows[window.id] = window
+        self._focus = window.id
+
+    def discard(self, window_id: int) -> None:
+        """
+        Drops every queued request for a window, normally because it was destroyed.
+
+        :param window_id: The id of the window.
+        :type window_id: int
+        """
+        self._windows.pop(window_id, None)
+        self._configures.pop(window_id, None)
+        self._maps.pop(window_id, None)
+        self._mapped_first.discard(window_id)
+        if self._focus == window_id:
+            self._focus = None
+
+    def flush(self) -> None:
+        """
+        Sends every queued request and flushes the connection once. Windows are configured before they are mapped so
+        they appear in their final place, and are mapped before they are focused.
+        """
+        if not len(self):
+            return
+
+        for window_id, changes in self._configures.items():
+            self._windows[window_id].configure(**changes)
+        for window_id, is_mapped in self._maps.items():
+            if is_mapped:
+                self._windows[window_id].map()
+            else:
+                self._windows[window_id].unmap()
+        if self._focus is not None:
+            self._windows[self._focus].set_input_focus(RevertToParent, CurrentTime)
+        self._display.flush()
+
+        self._windows.clear()
+        self._configures.clear()
+        self._maps.clear()
+        self._mapped_first.clear()
+        self._focus = None
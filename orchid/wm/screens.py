@@ -0,0 +1,239 @@
+from bisect import bisect_right
+from logging import getLogger
+from Xlib.display import Display
+from Xlib.error import XError
+from Xlib.ext import randr, xinerama
+from Xlib.xobject.drawable import Window
+
+
+class Monitor:
+    """
+    A rectangle of the X screen that is shown on one physical monitor.
+    """
+
+    def __init__(self, x: int, y: int, width: int, height: int, is_primary: bool = False) -> None:
+        """
+        Creates a monitor with the given geometry.
+
+        :param x: The x position of the monitor on the X screen.
+        :type x: int
+        :param y: The y position of the monitor on the X screen.
+        :type y: int
+        :param width: The width of the monitor.
+        :type width: int
+        :param height: The height of the monitor.
+        :type height: int
+        :param is_primary: True if this is the primary monitor.
+        :type is_primary: bool
+        """
+        self.x = x
+        self.y = y
+        self.width = width
+        self.height = height
+        self.is_primary = is_primary
+
+    def __repr__(self) -> str:
+        return "Monitor({}, {}, {}, {}{})".format(self.x, self.y, self.width, self.height,
+                                                  ", primary" if self.is_primary else "")
+
+    def contains(self, x: int, y: int) -> bool:
+        """
+        Returns whether the given point is on this monitor.
+
+        :param x: The x position of the point.
+        :type x: int
+        :param y: The y position of the point.
+        :type y: int
+        :return: True if the point is on this monitor, false otherwise.
+        :rtype: bool
+        """
+        return self.x <= x < self.x + self.width and self.y <= y < self.y + self.height
+
+    def center_of(self, width: int, height: int) -> tuple:
+        """
+        Returns the position that centers a window of the given size on this monitor.
+
+        :param width: The width of the window.
+        :type width: int
+        :param height: The height of the window.
+        :type height: int
+        :return: The x and y position of the window.
+        :rtype: tuple
+        """
+        return self.x + int((self.width - width) / 2), self.y + int((self.height - height) / 2)
+
+
+class MonitorIndex:
+    """
+    A spatial index of monitor rectangles. The screen is cut into vertical slabs at every left and right monitor edge
+    and each slab keeps its monitors sorted top to bottom, so finding the monitor under a point is two binary searches.
+    """
+
+    def __init__(self, monitors: list) -> None:
+        """
+        Builds the index for the given monitors.
+
+        :param monitors: The monitors to index.
+        :type monitors: list
+        """
+        # Cloned outputs show the same rectangle, so only index one of them.
+        unique = {}
+        for monitor in monitors:
+            key = (monitor.x, monitor.y, monitor.width, monitor.height)
+            if key not in unique or monitor.is_primary:
+                unique[key] = monitor
+        self.monitors = list(unique.values())
+
+        self._edges = sorted({edge for monitor in self.monitors for edge in (monitor.x, monitor.x + monitor.width)})
+        self._slabs = []
+        for left in self._edges[:-1]:
+            slab = sorted((monitor for monitor in self.monitors if monitor.x <= left < monitor.x + monitor.width),
+                          key=lambda monitor: monitor.y)
+            self._slabs.append(([monitor.y for monitor in slab], slab))
+
+    def __len__(self) -> int:
+        return len(self.monitors)
+
+    def at(self, x: int, y: int) -> Monitor:
+        """
+        Returns the monitor under the given point.
+
+        :param x: The x position of the point.
+        :type x: int
+        :param y: The y position of the point.
+        :type y: int
+        :return: The monitor under the point or None if the point is not on any monitor.
+        :rtype: Monitor
+        """
+        slab_index = bisect_right(self._edges, x) - 1
+        if not 0 <= slab_index < len(self._slabs):
+            return None
+
+        tops, slab = self._slabs[slab_index]
+        index = bisect_right(tops, y) - 1
+        if index >= 0 and slab[index].contains(x, y):
+            return slab[index]
+
+        # Overlapping monitors are rare, but the monitor above may still reach down to the point.
+        for monitor in reversed(slab[:max(index, 0)]):
+            if monitor.contains(x, y):
+                return monitor
+        return None
+
+
+class MonitorLayout:
+    """
+    Keeps track of the monitors of an X screen. Monitors are read using RandR when it is available, falling back to
+    Xinerama and then to the whole screen, and are read again whenever RandR reports that the screen changed.
+    """
+
+    def __init__(self, display: Display, root: Window) -> None:
+        """
+        Reads the monitors of the given screen and asks to be told when they change.
+
+        :param display: The connection to the X server.
+        :type display: Display
+        :param root: The root window of the screen.
+        :type root: Window
+        """
+        self._logger = getLogger(__name__)
+        self._display = display
+        self._root = root
+        self._has_randr = display.has_extension(randr.extname)
+        self._has_xinerama = display.has_extension(xinerama.extname)
+        self._randr_version = (0, 0)
+        self.screen_change_event = None
+
+        if self._has_randr:
+            version = display.xrandr_query_version()
+            self._randr_version = (version.major_version, version.minor_version)
+            self.screen_change_event = display.query_extension(randr.extname).first_event + randr.RRScreenChangeNotify
+            root.xrandr_select_input(randr.RRScreenChangeNotifyMask)
+
+        self.index = MonitorIndex([])
+        self.refresh()
+
+    def refresh(self) -> None:
+        """
+        Reads the monitors of the screen again and rebuilds the index.
+        """
+        monitors = []
+        try:
+            if self._has_randr:
+                monitors = self._read_randr_monitors()
+            if not monitors and self._has_xinerama and self._display.xinerama_is_active().state:
+                monitors = [Monitor(screen.x, screen.y, screen.width, screen.height)
+                            for screen in self._display.xinerama_query_screens().screens]
+        except XError as error:
+            self._logger.warning("Failed to read monitors: {}".format(error))
+
+        if not monitors:
+            # Treat the whole screen as one monitor.
+            geometry = self._root.get_geometry()
+            monitors = [Monitor(0, 0, geometry.width, geometry.height, True)]
+
+        if not any(monitor.is_primary for monitor in monitors):
+            monitors[0].is_primary = True
+
+        self.index = MonitorIndex(monitors)
+        self._logger.debug("Monitors: {}".format(self.index.monitors))
+
+    def get_primary(self) -> Monitor:
+        """
+        Returns the primary monitor.
+
+        :return: The primary monitor.
+        :rtype: Monitor
+        """
+        for monitor in self.index.monitors:
+            if monitor.is_primary:
+                return monitor
+        return self.index.monitors[0]
+
+    def get_monitor_at(self, x: int, y: int) -> Monitor:
+        """
+        Returns the monitor under the given point or the primary monitor if the point is not on any monitor.
+
+        :param x: The x position of the point.
+        :type x: int
+        :param y: The y position of the point.
+        :type y: int
+        :return: The monitor under the point.
+        :rtype: Monitor
+        """
+        monitor = self.index.at(x, y)
+        return monitor if monitor is not None else self.get_primary()
+
+    def get_pointer_monitor(self) -> Monitor:
+        """
+        Returns the monitor the mouse pointer is on.
+
+        :return: The monitor under the pointer.
+        :rtype: Monitor
+        """
+        pointer = self._root.query_pointer()
+        return self.get_monitor_at(pointer.root_x, pointer.root_y)
+
+    def _read_randr_monitors(self) -> list:
+        """
+        Reads the monitors using RandR. Servers with RandR 1.5 report monitors directly, servers with RandR 1.2 to
+        1.4 report the active CRTCs instead, and older servers report nothing.
+
+        :return: The monitors of the screen.
+        :rtype: list
+        """
+        if self._randr_version >= (1, 5):
+            return [Monitor(info.x, info.y, info.width_in_pixels, info.height_in_pixels, bool(info.primary))
+                    for info in self._root.xrandr_get_monitors(is_active=True).monitors]
+        if self._randr_version < (1, 2):
+            return []
+
+        resources = self._root.xrandr_get_screen_resources()
+        # The primary output was added in RandR 1.3.
+        primary_output = self._root.xrandr_get_output_primary().output if self._randr_version >= (1, 3) else None
+        monitors = []
+        for crtc in resources.crtcs:
+            info = self._display.xrandr_get_crtc_info(crtc, resources.config_timestamp)
+            if info.mode and info.width and info.height:
+                monitors.append(Monitor(info.x, info.y, info.width, info.height, primary_output in info.outputs))
+        return monitors
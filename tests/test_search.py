@@ -0,0 +1,61 @@
+from random import Random
+from unittest import TestCase, main
+from orchid.search import SearchIndex, KIND_HISTORY
+
+
+# The syllables the words of the corpus are made of, so queries that add letters keep matching many entries.
+SYLLABLES = ["ka", "lo", "mi", "ne", "ru", "ta", "vo", "shi", "pe", "zu", "dan", "gor", "bel", "fin", "mar"]
+
+
+class SearchIndexTest(TestCase):
+    """
+    Checks that narrowing down the answer to a query gives the same answer as looking the longer query up afresh.
+    """
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        random = Random(0)
+
+        def make_word() -> str:
+            return "".join(random.choice(SYLLABLES) for _ in range(random.randint(2, 4)))
+
+        cls.index = SearchIndex()
+        for i in range(30000):
+            title = " ".join(make_word() for _ in range(4))
+            url = "https://www.{}.com/{}/{}".format(make_word(), make_word(), make_word())
+            cls.index.add(KIND_HISTORY, i, title, url, random.random() * 10)
+
+    def search(self, query: str, previous=None):
+        """
+        Answers a query in one go.
+
+        :param query: The query.
+        :type query: str
+        :param previous: The state of the previous query to narrow down, if any.
+        :type previous: SearchState
+        :return: The state of the query.
+        :rtype: SearchState
+        """
+        for state in self.index.iter_search(query, previous=previous):
+            pass
+        return state
+
+    def test_narrowed_matches_fresh(self) -> None:
+        random = Random(1)
+        queries = [random.choice(SYLLABLES) + random.choice(SYLLABLES) for _ in range(40)]
+        queries += ["tavo", "zupe", "ruta", "kalo mar", "gor fi"]
+        narrowed_count = 0  # How many of the longer queries could be narrowed down.
+        for query in queries:
+            previous = self.search(query)
+            for letter in "aeiorsnt":
+                longer = query + letter
+                narrowed_count += previous.is_complete
+                narrowed = self.search(longer, previous)
+                fresh = self.search(longer)
+                self.assertEqual([(result.key, result.score) for result in narrowed.results],
+                                 [(result.key, result.score) for result in fresh.results], longer)
+        self.assertGreater(narrowed_count, 0)
+
+
+if __name__ == '__main__':
+    main()
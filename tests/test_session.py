@@ -0,0 +1,86 @@
+from os.path import join
+from tempfile import TemporaryDirectory
+from unittest import TestCase, main
+from PyQt5.QtCore import QCoreApplication, QUrl
+from orchid.io import FileManager
+from orchid.io.session import SessionJournal
+
+
+class SessionJournalTest(TestCase):
+    """
+    Saves sessions with a :class:`SessionJournal` and checks a new journal loads them back.
+    """
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.app = QCoreApplication.instance() or QCoreApplication([])
+
+    def setUp(self) -> None:
+        self.folder = TemporaryDirectory()
+        self.path = join(self.folder.name, "session.jsonl")
+
+    def tearDown(self) -> None:
+        self.folder.cleanup()
+
+    def flush(self, journal: SessionJournal) -> None:
+        """
+        Flushes a journal and waits until the writer thread has written it.
+
+        :param journal: The journal to flush.
+        :type journal: SessionJournal
+        """
+        journal.flush()
+        FileManager().append_bytes(self.path, b"").result()
+
+    def load(self) -> list:
+        """
+        Loads the saved session with a new journal.
+
+        :return: The URL and title of each tab in order, and the index of the current tab.
+        :rtype: tuple
+        """
+        tabs, active = SessionJournal(self.path).load()
+        return [(tab.url.toString(), tab.title) for tab in tabs], active
+
+    def test_round_trip(self) -> None:
+        journal = SessionJournal(self.path)
+        first, second, third = object(), object(), object()
+        journal.open_tab(first, QUrl("https://one.example/"), "One")
+        journal.open_tab(second, QUrl("https://two.example/"), "Two")
+        journal.set_order([first, second])
+        journal.set_active(second)
+        self.flush(journal)
+        self.assertEqual(self.load(), ([("https://one.example/", "One"), ("https://two.example/", "Two")], 1))
+
+        # The new tab is opened and placed, and only then navigates, all within one flush.
+        journal.open_tab(third, QUrl("https://three.example/"), "Three")
+        journal.set_order([third, first, second])
+        journal.set_url(third, QUrl("https://three.example/next"))
+        journal.set_title(third, "Next")
+        journal.set_url(first, QUrl("https://one.example/next"))
+        self.flush(journal)
+        self.assertEqual(self.load(), ([("https://three.example/next", "Next"), ("https://one.example/next", "One"),
+                                        ("https://two.example/", "Two")], 2))
+
+        journal.set_order([second, third])
+        journal.set_active(third)
+        self.flush(journal)
+        self.assertEqual(self.load(), ([("https://two.example/", "Two"), ("https://three.example/next", "Next")], 1))
+
+    def test_close_before_flush(self) -> None:
+        journal = SessionJournal(self.path)
+        first, second = object(), object()
+        journal.open_tab(first, QUrl("https://one.example/"), "One")
+        journal.set_order([first])
+        self.flush(journal)
+
+        journal.open_tab(second, QUrl("https://two.example/"), "Two")
+        journal.set_order([first, second])
+        journal.set_title(second, "Closed")
+        journal.set_order([first])
+        self.flush(journal)
+        self.assertEqual(self.load(), ([("https://one.example/", "One")], -1))
+
+
+if __name__ == '__main__':
+    main()